@@ -2,11 +2,12 @@ import asyncio
 import json
 import os
 
-from fastapi import APIRouter, BackgroundTasks, HTTPException
-from fastapi.responses import FileResponse, StreamingResponse
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import ValidationError
 
 from app.routes.presentation.schemas import (
+    JobStatusResponse,
     PresentationDownloadResponse,
     PresentationRequest,
     PresentationResponse,
@@ -14,7 +15,8 @@ from app.routes.presentation.schemas import (
 from app.routes.presentation.utils import generate_pprt_id
 from core.consts import FILE_PATH
 from core.logger_config import logger
-from mcp_server.workflow import run_ppt_workflow
+from mcp_server.helper.job_metrics import report_path
+from mcp_server.job_queue import job_queue
 
 presentation_router = APIRouter(
     prefix="/presentation",
@@ -23,12 +25,10 @@ presentation_router = APIRouter(
 
 
 @presentation_router.post("/generate_ppt", status_code=202)
-async def generate_ppt(
-    request: PresentationRequest, background_tasks: BackgroundTasks
-) -> PresentationResponse:
+async def generate_ppt(request: PresentationRequest) -> PresentationResponse:
     """
     Generate a PowerPoint presentation based on the given topic and number of slides. The endpoint accepts a topic
-    and triggers
+    and queues the generation, which is run by the job workers.
 
     Args:
         request: PresentationRequest - The request containing the topic and number of slides.
@@ -41,8 +41,8 @@ async def generate_ppt(
         f"Generating presentation: topic='{request.topic}', slides={request.slides}, pprt_id={pprt_id}"
     )
     try:
-        background_tasks.add_task(
-            run_ppt_workflow, topic=request.topic, num_slides=request.slides, filename=pprt_id
+        await asyncio.to_thread(
+            job_queue.enqueue, pprt_id, {"topic": request.topic, "num_slides": request.slides}
         )
         return PresentationResponse(
             message="Presentation generation task created successfully! To retrieve the presentation, please use the pprt_id in the response.",
@@ -86,6 +86,52 @@ async def download_ppt(pprt_id: str) -> FileResponse | PresentationDownloadRespo
         )
 
 
+@presentation_router.get("/report/{pprt_id}", response_model=None)
+async def presentation_report(pprt_id: str) -> JSONResponse | PresentationDownloadResponse:
+    """Return the metrics report of a presentation: stage latencies, token totals, estimated
+    cost and MCP tool latencies. The report is written when the generation finishes or fails.
+
+    Args:
+        pprt_id (str): The presentation ID.
+
+    Returns:
+        JSONResponse | PresentationDownloadResponse: The report or the presentation response with the status "Pending" if the report is not found.
+    """
+    path = report_path(FILE_PATH, pprt_id)
+    try:
+        report = await asyncio.to_thread(path.read_text, encoding="utf-8")
+    except FileNotFoundError:
+        return PresentationDownloadResponse(
+            message="Report not found. Please check the presentation ID and try again once the generation is over.",
+            status="Pending",
+        )
+    return JSONResponse(content=json.loads(report))
+
+
+@presentation_router.get("/job/{pprt_id}")
+async def presentation_job(pprt_id: str) -> JobStatusResponse:
+    """Return the state of the generation job of a presentation: queued, running, done or failed.
+
+    Args:
+        pprt_id (str): The presentation ID.
+
+    Returns:
+        JobStatusResponse: The state of the job, its attempts, error and timestamps.
+    """
+    job = await asyncio.to_thread(job_queue.get, pprt_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job found for pprt_id={pprt_id}")
+    return JobStatusResponse(
+        pprt_id=job["id"],
+        status=job["status"],
+        attempts=job["attempts"],
+        error=job["error"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+    )
+
+
 @presentation_router.get("/status/{pprt_id}")
 async def presentation_status(pprt_id: str) -> StreamingResponse:
     """Stream the status of the presentation generation using Server-Sent Events (SSE).
@@ -112,6 +158,11 @@ async def presentation_status(pprt_id: str) -> StreamingResponse:
                 logger.info(f"SSE: File ready for pprt_id={pprt_id}")
                 yield f"data: {json.dumps({'status': 'ready', 'pprt_id': pprt_id})}\n\n"
                 return
+            job = await asyncio.to_thread(job_queue.get, pprt_id)
+            if job is not None and job["status"] == "failed":
+                logger.warning(f"SSE: Job failed for pprt_id={pprt_id}")
+                yield f"data: {json.dumps({'status': 'failed', 'error': job['error']})}\n\n"
+                return
             yield f"data: {json.dumps({'status': 'processing', 'elapsed': elapsed})}\n\n"
             await asyncio.sleep(interval)
             elapsed += interval
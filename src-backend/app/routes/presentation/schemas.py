@@ -21,3 +21,13 @@ class PresentationDownloadRequest(BaseModel):
 class PresentationDownloadResponse(BaseModel):
     message: str
     status: Literal["Completed", "Pending", "Error"]
+
+
+class JobStatusResponse(BaseModel):
+    pprt_id: str
+    status: Literal["queued", "running", "done", "failed"]
+    attempts: int
+    error: str | None = None
+    created_at: float
+    started_at: float | None = None
+    finished_at: float | None = None
@@ -0,0 +1,77 @@
+"""Compares the BeautifulSoup `get_metadata` path with the streaming `MetadataScanner`.
+
+Run from src-backend: python -m benchmarks.metadata_parser
+"""
+
+import time
+
+from bs4 import BeautifulSoup
+
+from core.settings import settings
+from mcp_server.helper.metadata_scanner import MetadataScanner
+from mcp_server.helper.source_validator import SourceValidator
+
+CHUNK_SIZE = 16 * 1024
+ROUNDS = 5
+
+
+def build_page(paragraphs: int) -> str:
+    """Builds a news-like page with the metadata in the head and a long article body."""
+    head = (
+        "<html><head><title>Market report</title>"
+        '<meta name="author" content="Jane Doe">'
+        '<meta property="article:published_time" content="2026-01-30T10:00:00Z">'
+        + "<script>var tracking = {};</script>" * 20
+        + "</head><body>"
+    )
+    body = "".join(
+        f"<div class='block'><h3>Section {i}</h3><p>Revenue grew {i}% year over year, "
+        f"<a href='/link/{i}'>read more</a> about the <b>market</b>.</p></div>"
+        for i in range(paragraphs)
+    )
+    return head + body + "<h2>References</h2><ul><li>Source</li></ul></body></html>"
+
+
+def bench(label: str, func, html: str) -> dict:
+    """Runs the function over the page a few times and returns the best time."""
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        meta = func(html)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<28} {best * 1000:>9.1f} ms   {meta}")
+    return meta
+
+
+def soup_metadata(html: str) -> dict:
+    return SourceValidator().get_metadata(BeautifulSoup(html, "html.parser"))
+
+
+def scanner_metadata(html: str, max_bytes: int | None = None) -> dict:
+    scanner = MetadataScanner()
+    read = 0
+    for i in range(0, len(html), CHUNK_SIZE):
+        chunk = html[i : i + CHUNK_SIZE]
+        scanner.feed(chunk)
+        read += len(chunk.encode())
+        if scanner.done or (max_bytes and read >= max_bytes):
+            break
+    return scanner.metadata()
+
+
+def main():
+    for paragraphs in (100, 2_000, 10_000):
+        html = build_page(paragraphs)
+        print(f"\n--- page size: {len(html.encode()) / 1024:.0f} KiB ---")
+        expected = bench("get_metadata (bs4)", soup_metadata, html)
+        full = bench("MetadataScanner (full)", scanner_metadata, html)
+        bench(
+            f"MetadataScanner (cap {settings.VALIDATION_MAX_FETCH_BYTES // 1024} KiB)",
+            lambda page: scanner_metadata(page, settings.VALIDATION_MAX_FETCH_BYTES),
+            html,
+        )
+        assert full == expected, "The scanner must return the same metadata as get_metadata"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measures the startup of the API and of the MCP server: the slowest imports of each module, as
+reported by `python -X importtime`, the wall clock for importing it in a fresh interpreter, and
+the wall clock for a spawned server to answer `initialize()` and `list_tools()`.
+
+The heavy dependencies of the tools (matplotlib, python-pptx, tavily, bs4, requests) and the
+workflow stack of the API are imported on first use, tests/test_workflow.py::TestStartupImports
+guards that they stay out of these imports.
+
+Run from src-backend: python -m benchmarks.startup
+"""
+
+import asyncio
+import subprocess
+import sys
+import time
+
+from mcp_server.session_pool import open_session
+
+MODULES = ("main", "mcp_server.mcp_server")
+TOP_IMPORTS = 12
+ROUNDS = 3
+
+
+def import_times(module: str) -> list[tuple[int, str]]:
+    """Imports the module with `-X importtime` and returns its imports by cumulative microseconds,
+    slowest first."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        entries.append((int(cumulative), name.strip()))
+    return sorted(entries, reverse=True)
+
+
+def import_wall_clock(module: str) -> float:
+    """Returns the mean seconds to start an interpreter and import the module."""
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+    return (time.perf_counter() - start) / ROUNDS
+
+
+async def server_startup() -> tuple[float, float]:
+    """Returns the mean seconds for a spawned server to be initialized, and to list its tools."""
+    initialize = list_tools = 0.0
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        async with open_session() as session:
+            initialized = time.perf_counter()
+            await session.list_tools()
+            initialize += initialized - start
+            list_tools += time.perf_counter() - initialized
+    return initialize / ROUNDS, list_tools / ROUNDS
+
+
+def main():
+    baseline = import_wall_clock("sys")
+    for module in MODULES:
+        print(f"import {module}: {import_wall_clock(module) - baseline:.2f}s")
+        for cumulative, name in import_times(module)[:TOP_IMPORTS]:
+            print(f"  {cumulative / 1_000_000:>6.3f}s  {name}")
+        print()
+
+    initialize, list_tools = asyncio.run(server_startup())
+    print(f"stdio server initialize(): {initialize:.2f}s")
+    print(f"stdio server list_tools(): {list_tools * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compares the per-call overhead of the MCP tool transports: stdio JSON-RPC to a child server
+process, and in-process calls through `LocalSession`.
+
+The tools are called with arguments they reject right after parsing them, so the timings are
+the transport (serialization, pipe, dispatch) plus a `json.loads` of the payload.
+
+Run from src-backend: python -m benchmarks.tool_transport
+"""
+
+import asyncio
+import json
+import time
+
+from mcp_server.local_session import LocalSession
+from mcp_server.session_pool import open_session
+
+ROUNDS = 200
+PAYLOAD_SIZES = (0, 4 * 1024, 64 * 1024)
+
+
+def chart_arguments(size: int) -> dict:
+    """Builds generate_chart arguments of about `size` bytes, without values."""
+    labels = [f"label-{i:06d}" for i in range(max(1, size // 16))]
+    return {
+        "data_json": json.dumps({"labels": labels, "values": []}),
+        "chart_type": "bar",
+        "title": "x",
+    }
+
+
+async def bench(label: str, session, name: str, arguments: dict) -> float:
+    """Calls the tool ROUNDS times, one call at a time, and returns the mean seconds per call."""
+    await session.call_tool(name, arguments=arguments)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        await session.call_tool(name, arguments=arguments)
+    mean = (time.perf_counter() - start) / ROUNDS
+    print(f"{label:<40} {mean * 1_000_000:>9.0f} us/call")
+    return mean
+
+
+async def run(mode: str, session) -> list[float]:
+    timings = [
+        await bench(
+            f"{mode}: get_search_metrics", session, "get_search_metrics", {"run_id": "bench"}
+        )
+    ]
+    for size in PAYLOAD_SIZES:
+        timings.append(
+            await bench(
+                f"{mode}: generate_chart ({size // 1024} KiB)",
+                session,
+                "generate_chart",
+                chart_arguments(size),
+            )
+        )
+    return timings
+
+
+async def main():
+    start = time.perf_counter()
+    async with open_session() as session:
+        print(f"stdio server started in {time.perf_counter() - start:.2f}s")
+        stdio = await run("stdio", session)
+
+    start = time.perf_counter()
+    local_session = LocalSession()
+    print(f"\nlocal tools loaded in {time.perf_counter() - start:.2f}s")
+    local = await run("local", local_session)
+
+    speedups = [f"{s / in_process:.0f}x" for s, in_process in zip(stdio, local, strict=True)]
+    print(f"\nspeedup (stdio / local): {', '.join(speedups)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,19 @@
 from pathlib import Path
 
-from pptx.dml.color import RGBColor
-from pptx.util import Inches, Pt
-
 FILE_PATH = Path(__file__).resolve().parent.parent.parent / "concluded_presentations"
+CACHE_PATH = FILE_PATH / ".cache"
+
+
+HIGH_QUALITY_TIERS = ("S", "A")
 
+SEARCH_MAX_RESULTS = 10
+SEARCH_CHUNKS_PER_SOURCE = 3
+
+# USD per 1M tokens, used to estimate the cost of a job
+MODEL_PRICING = {
+    "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+    "gpt-4o-mini": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+}
 
 DOMAIN_BLACKLIST = [
     "reddit.com",
@@ -17,20 +26,25 @@ DOMAIN_BLACKLIST = [
     "linkedin.com",
 ]
 
+# Lengths in EMU, the unit python-pptx takes (kept as ints so pptx is only imported when a
+# presentation is created), and colors as RGB hex strings
+EMU_PER_INCH = 914400
+EMU_PER_PT = 12700
+
 TITLE_FONT_NAME = "Calibri"
-TITLE_FONT_SIZE = Pt(36)
-TITLE_FONT_COLOR = RGBColor(0, 51, 102)
+TITLE_FONT_SIZE = 36 * EMU_PER_PT
+TITLE_FONT_COLOR = "003366"
 TITLE_BOLD = True
 
 BODY_FONT_NAME = "Calibri"
-BODY_FONT_SIZE = Pt(18)
-BODY_FONT_SIZE_WITH_IMAGE = Pt(14)
-BODY_FONT_COLOR = RGBColor(51, 51, 51)
-BODY_LINE_SPACING = Pt(8)
+BODY_FONT_SIZE = 18 * EMU_PER_PT
+BODY_FONT_SIZE_WITH_IMAGE = 14 * EMU_PER_PT
+BODY_FONT_COLOR = "333333"
+BODY_LINE_SPACING = 8 * EMU_PER_PT
 
-SLIDE_WIDTH = Inches(10)
-SLIDE_HEIGHT = Inches(7.5)
+SLIDE_WIDTH = 10 * EMU_PER_INCH
+SLIDE_HEIGHT = int(7.5 * EMU_PER_INCH)
 
-IMAGE_HEIGHT = Inches(4.0)
+IMAGE_HEIGHT = 4 * EMU_PER_INCH
 
-BODY_WIDTH_WITH_IMAGE = Inches(4.5)
+BODY_WIDTH_WITH_IMAGE = int(4.5 * EMU_PER_INCH)
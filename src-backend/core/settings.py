@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 from core.logger_config import logger
 from pathlib import Path
@@ -10,6 +10,82 @@ class Settings(BaseSettings):
     TAVILY_API_KEY: Optional[str] = None
     OPENAI_API_KEY: Optional[str] = None
 
+    # Source validation
+    VALIDATION_TIMEOUT: float = 5.0
+    VALIDATION_MAX_CONCURRENCY: int = 20
+    VALIDATION_PER_HOST_CONCURRENCY: int = 4
+    VALIDATION_STREAMING_FETCH: bool = True
+    VALIDATION_MAX_FETCH_BYTES: int = 256 * 1024
+    VALIDATION_CACHE_ENABLED: bool = True
+    VALIDATION_CACHE_PATH: Path | None = None  # Defaults to concluded_presentations/.cache
+    VALIDATION_CACHE_LIVE_TTL: int = 7 * 24 * 3600
+    VALIDATION_CACHE_DEAD_TTL: int = 3600
+    VALIDATION_CACHE_MAX_ENTRIES: int = 50_000
+    URL_REGISTRY_MAX_RUNS: int = 16  # Workflow runs whose URL checks are kept in memory
+    COALESCER_MAX_IN_FLIGHT: int = 1000  # Distinct in-flight requests shared between callers
+
+    # Web search
+    SEARCH_TOP_K: int | None = 5  # Stop validating once this many Tier S/A sources are found
+    SEARCH_TIME_BUDGET: float | None = 8.0  # Seconds allowed for validating a query's results
+    SEARCH_BATCH_CONCURRENCY: int = 4  # Queries of a search_web_batch call run at the same time
+    SEARCH_ESCALATION_MIN_HIGH_TIER: int = 3  # Adaptive searches below this many S/A go advanced
+    SEARCH_RESULT_TOKEN_BUDGET: int = 1500  # Estimated tokens returned per query
+    SEARCH_CACHE_ENABLED: bool = True
+    SEARCH_CACHE_PATH: Path | None = None  # Defaults to concluded_presentations/.cache
+    SEARCH_CACHE_TTL: int = 24 * 3600
+    SEARCH_CACHE_MEMORY_MAX_ENTRIES: int = 256
+    SEARCH_CACHE_MAX_ENTRIES: int = 5_000
+
+    # OpenAI client pool
+    OPENAI_MAX_CONNECTIONS: int = 20  # Keep-alive connections shared by every agent
+    OPENAI_MAX_RETRIES: int = 5  # Retries of rate-limited or transient failures
+    OPENAI_BACKOFF_BASE: float = 1.0  # Seconds, doubled on every retry
+    OPENAI_BACKOFF_MAX: float = 60.0
+    # Requests and tokens per minute of each model, models not listed are not throttled
+    OPENAI_RATE_LIMITS: dict[str, tuple[int, int]] = {
+        "gpt-4o": (500, 30_000),
+        "gpt-4o-mini": (500, 200_000),
+    }
+    OPENAI_ESTIMATED_OUTPUT_TOKENS: int = 1000  # Completion tokens reserved per request
+
+    # LLM response cache
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_PATH: Path | None = None  # Defaults to concluded_presentations/.cache
+    LLM_CACHE_TTL: int = 24 * 3600
+    LLM_CACHE_MEMORY_MAX_ENTRIES: int = 256
+    LLM_CACHE_MAX_ENTRIES: int = 5_000
+
+    # Workflow
+    RESEARCH_CONCURRENCY: int = 4  # Slides researched at the same time
+    WORKFLOW_PIPELINE: bool = False  # Research, write and illustrate each slide as it is ready
+    PLANNER_STREAMING: bool = True  # Pipeline: stream the plan, researching slides as they arrive
+    WRITER_PER_SLIDE: bool = False  # Write each slide in its own call instead of one deck call
+    WRITER_CONCURRENCY: int = 4  # Slides written at the same time (per-slide writer, pipeline)
+    WRITER_SLIDE_ATTEMPTS: int = 4  # Calls per slide, retries included (per-slide writer, pipeline)
+    ILLUSTRATOR_CONCURRENCY: int = 2  # Slides illustrated at the same time by the pipeline
+
+    # MCP server pool
+    # "stdio" spawns servers, "local" calls the tools in-process, "http" uses MCP_SERVER_URL
+    MCP_TRANSPORT: Literal["stdio", "local", "http"] = "stdio"
+    MCP_SERVER_URL: str | None = None  # Shared server, e.g. http://localhost:8001/mcp
+    MCP_HTTP_HOST: str = "127.0.0.1"  # Address the shared server listens on
+    MCP_HTTP_PORT: int = 8001
+    MCP_TOOL_PROCESSES: int = 0  # Processes rendering charts and PPTX, 0 for a single thread
+    MCP_POOL_SIZE: int = 2  # MCP servers started by each job worker, 0 spawns a server per job
+    MCP_POOL_MAX_JOBS: int = 50  # Jobs served before a server is replaced by a fresh one
+    MCP_POOL_HEALTH_CHECK_TIMEOUT: float = 5.0  # Seconds for a server to answer the checkout ping
+    MCP_POOL_START_TIMEOUT: float = 60.0  # Seconds for a server to start
+
+    # Job queue and workers
+    JOB_QUEUE_PATH: Path | None = None  # Defaults to concluded_presentations/jobs.sqlite3
+    JOB_WORKERS: int = 2  # Worker processes started with the API, 0 when they run separately
+    JOB_WORKER_CONCURRENCY: int = 2  # Jobs run at the same time by each worker process
+    JOB_POLL_INTERVAL: float = 1.0  # Seconds between the queue polls of an idle worker
+    JOB_HEARTBEAT_INTERVAL: float = 10.0  # Seconds between the heartbeats of running jobs
+    JOB_STALE_AFTER: float = 60.0  # Seconds without heartbeat before a running job is requeued
+    JOB_MAX_ATTEMPTS: int = 3  # Runs of a job lost by its worker before it is failed
+    JOB_SHUTDOWN_TIMEOUT: float = 30.0  # Seconds a stopping worker lets its jobs finish
+
     class Config:
         env_file = _env_path
         env_file_encoding = "utf-8"
@@ -1,3 +1,5 @@
+import asyncio
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI, Request
@@ -5,13 +7,36 @@ from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 
 from app.routes.presentation.router import presentation_router
+from core.settings import settings
+from mcp_server.job_queue import job_queue
+from mcp_server.job_worker import JobWorkers
 
 BASE_DIR = Path(__file__).resolve().parent
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Starts the job workers running the queued presentations, and stops them on shutdown,
+    letting them finish their running jobs or queue them again. With JOB_WORKERS=0 the API only
+    enqueues, and the workers run separately (python -m mcp_server.job_worker)."""
+    app.state.job_workers = None
+    if settings.JOB_WORKERS > 0:
+        app.state.job_workers = JobWorkers(
+            settings.JOB_WORKERS, job_queue, settings.JOB_SHUTDOWN_TIMEOUT
+        )
+        app.state.job_workers.start()
+        watch = asyncio.create_task(app.state.job_workers.watch(settings.JOB_POLL_INTERVAL))
+    yield
+    if app.state.job_workers is not None:
+        watch.cancel()
+        await asyncio.to_thread(app.state.job_workers.stop)
+
+
 api = FastAPI(
     title="Presentation Generator API",
     description="API for generating PowerPoint presentations with a MCP server.",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 templates = Jinja2Templates(directory=BASE_DIR / "app" / "templates")
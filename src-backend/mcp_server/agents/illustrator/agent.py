@@ -1,11 +1,10 @@
 import json
 
 from mcp import ClientSession
-from openai import AsyncOpenAI
 
 from core.logger_config import logger
-from core.settings import settings
 from mcp_server.agents.illustrator.schemas import IllustrationResult, VisualAsset
+from mcp_server.helper.openai_pool import openai_pool
 
 
 class IllustratorAgent:
@@ -15,8 +14,7 @@ class IllustratorAgent:
 
     def __init__(self):
         self.model = "gpt-4o-mini"
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.retry_count = 0
+        self.client = openai_pool.client()
 
     async def create_visuals(
         self, visual_requests: list[dict], session: ClientSession
@@ -1,9 +1,14 @@
-from openai import AsyncOpenAI
+import asyncio
+from collections.abc import AsyncIterator
+
+from pydantic import ValidationError
 
 from core.logger_config import logger
-from core.settings import settings
 from mcp_server.agents.planner.prompts import SYSTEM_PROMPT, USER_PROMPT
-from mcp_server.agents.planner.schemas import PresentationPayload, PresentationPlan
+from mcp_server.agents.planner.schemas import PresentationPayload, PresentationPlan, SlidePlan
+from mcp_server.helper.job_metrics import stage
+from mcp_server.helper.llm_client import parse_completion, stream_completion
+from mcp_server.helper.openai_pool import openai_pool
 
 
 class PlannerAgent:
@@ -11,16 +16,19 @@ class PlannerAgent:
     A planner agent that creates a presentation plan based on the topic and number of slides.
     """
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.model = "gpt-4o-mini"
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.retry_count = 0
+        self.client = openai_pool.client()
+        self.use_cache = use_cache
 
-    async def create_presentation_plan(self, payload: PresentationPayload) -> PresentationPlan:
+    async def create_presentation_plan(
+        self, payload: PresentationPayload, attempt: int = 0
+    ) -> PresentationPlan:
         """Creates a presentation plan based on the topic and number of slides.
 
         Args:
             payload (PresentationPayload): The payload containing the topic and number of slides.
+            attempt (int): The number of retries already made for this request.
 
         Raises:
             e: The error that occurred.
@@ -29,20 +37,16 @@ class PlannerAgent:
             PresentationPlan: The presentation plan.
         """
         try:
-            response = await self.client.beta.chat.completions.parse(
+            response = await parse_completion(
+                self.client,
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {
-                        "role": "user",
-                        "content": USER_PROMPT.format(
-                            topic=payload.topic, num_slides=payload.num_slides
-                        ),
-                    },
-                ],
+                messages=self._messages(payload),
                 response_format=PresentationPlan,
+                use_cache=self.use_cache,
+                agent="planner",
+                accept=lambda plan: len(plan.slides) == payload.num_slides,
             )
-            plan = await self._validate_response(response.choices[0].message.parsed, payload)
+            plan = await self._validate_response(response.parsed, payload, attempt)
             return plan
         except Exception as e:
             logger.error(
@@ -50,14 +54,104 @@ class PlannerAgent:
             )
             raise e
 
+    async def stream_presentation_plan(
+        self, payload: PresentationPayload, attempt: int = 0
+    ) -> AsyncIterator[SlidePlan]:
+        """Streams the presentation plan, yielding every slide as soon as the model has finished
+        writing it (i.e. once it starts the next one), so the research of the first slides can
+        start while the rest of the plan is still being generated. The plan is validated when
+        the stream ends, as in `create_presentation_plan`.
+
+        Args:
+            payload (PresentationPayload): The payload containing the topic and number of slides.
+            attempt (int): The number of retries already made for this request.
+
+        Raises:
+            StreamInterruptedError: If the stream failed after slides were yielded.
+            ValueError: If the response from the agent is None even after 3 retries.
+            ValueError: If the number of slides in the presentation plan does not match the number of slides requested.
+
+        Yields:
+            SlidePlan: The slides of the plan, in order.
+        """
+        ready: asyncio.Queue[SlidePlan | None] = asyncio.Queue()
+        emitted = 0
+
+        async def on_partial(partial: dict) -> bool:
+            nonlocal emitted
+            slides = partial.get("slides") or []
+            # The last slide of a partial plan may still be incomplete
+            for slide in slides[emitted:-1]:
+                try:
+                    plan = SlidePlan.model_validate(slide)
+                except ValidationError:
+                    break
+                emitted += 1
+                await ready.put(plan)
+            # Once a slide went downstream the stream is not retried, see stream_completion
+            return emitted > 0
+
+        async def generate():
+            # The stream runs in its own task, alongside the stages consuming the slides
+            try:
+                with stage("planning"):
+                    return await stream_completion(
+                        self.client,
+                        model=self.model,
+                        messages=self._messages(payload),
+                        response_format=PresentationPlan,
+                        on_partial=on_partial,
+                        use_cache=self.use_cache,
+                        agent="planner",
+                        accept=lambda plan: len(plan.slides) == payload.num_slides,
+                    )
+            finally:
+                await ready.put(None)
+
+        task = asyncio.create_task(generate())
+        try:
+            while (slide := await ready.get()) is not None:
+                yield slide
+            response = await task
+        except Exception as e:
+            logger.error(
+                f"ERROR_PLANNER_AGENT: Error streaming presentation plan - for topic: {payload.topic} and number of slides: {payload.num_slides} - error: {e}"
+            )
+            raise e
+        finally:
+            task.cancel()
+
+        plan = response.parsed
+        if plan is None and emitted == 0 and attempt < 3:
+            async for slide in self.stream_presentation_plan(payload, attempt + 1):
+                yield slide
+            return
+        if plan is None:
+            raise ValueError(f"No response from the agent even after {attempt} retries")
+        plan = await self._validate_response(plan, payload, attempt)
+        for slide in plan.slides[emitted:]:
+            yield slide
+
+    @staticmethod
+    def _messages(payload: PresentationPayload) -> list[dict]:
+        """Builds the chat messages of a plan request."""
+        return [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {
+                "role": "user",
+                "content": USER_PROMPT.format(topic=payload.topic, num_slides=payload.num_slides),
+            },
+        ]
+
     async def _validate_response(
-        self, plan: PresentationPlan | None, payload: PresentationPayload
+        self, plan: PresentationPlan | None, payload: PresentationPayload, attempt: int = 0
     ) -> PresentationPlan:
         """Validates the response from the agent with a retry mechanism which calls the create_presentation_plan method if the response is None.
 
         Args:
             plan (PresentationPlan | None): The presentation plan from the agent.
             payload (PresentationPayload): The payload containing the topic and number of slides.
+            attempt (int): The number of retries already made for this request.
 
         Raises:
             ValueError: If the response from the agent is None and the retry count is less than 3.
@@ -67,10 +161,9 @@ class PlannerAgent:
             PresentationPlan: The presentation plan.
         """
         if plan is None:
-            if self.retry_count < 3:
-                self.retry_count += 1
-                return await self.create_presentation_plan(payload)
-            raise ValueError(f"No response from the agent even after {self.retry_count} retries")
+            if attempt < 3:
+                return await self.create_presentation_plan(payload, attempt + 1)
+            raise ValueError(f"No response from the agent even after {attempt} retries")
         if len(plan.slides) != payload.num_slides:
             logger.warning(
                 f"Number of slides in the presentation plan does not match the number of slides requested. Expected {payload.num_slides}, got {len(plan.slides)}"
@@ -0,0 +1,18 @@
+from mcp_server.agents.illustrator.agent import IllustratorAgent
+from mcp_server.agents.planner.agent import PlannerAgent
+from mcp_server.agents.researcher.agent import ResearcherAgent
+from mcp_server.agents.writer.agent import WriterAgent
+
+
+class AgentRegistry:
+    """
+    The long-lived agent instances shared by every workflow run, created once at app startup.
+    The agents keep no per-request state (retries are passed per call), so concurrent slides
+    and jobs can use the same instances.
+    """
+
+    def __init__(self):
+        self.planner = PlannerAgent()
+        self.researcher = ResearcherAgent()
+        self.writer = WriterAgent()
+        self.illustrator = IllustratorAgent()
@@ -1,11 +1,14 @@
+import json
+
 from mcp import ClientSession
 from mcp.types import TextContent
-from openai import AsyncOpenAI
 
 from core.logger_config import logger
-from core.settings import settings
 from mcp_server.agents.researcher.prompts import SYSTEM_PROMPT, USER_PROMPT
 from mcp_server.agents.researcher.schemas import ResearcherPayload, ResearchSummary
+from mcp_server.helper.llm_client import parse_completion
+from mcp_server.helper.openai_pool import openai_pool
+from mcp_server.helper.search_payload import dumps_compact
 
 
 class ResearcherAgent:
@@ -13,10 +16,10 @@ class ResearcherAgent:
     A researcher agent that researches the web for information based on the presentation plan.
     """
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.model = "gpt-4o-mini"
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.retry_count = 0
+        self.client = openai_pool.client()
+        self.use_cache = use_cache
 
     async def research_web(
         self, payload: ResearcherPayload, session: ClientSession
@@ -29,31 +32,49 @@ class ResearcherAgent:
         Returns:
             str: The research results.
         """
+        arguments = {"queries": payload.search_queries}
+        if payload.run_id:
+            arguments["run_id"] = payload.run_id
+        results = await session.call_tool("search_web_batch", arguments=arguments)
+        texts = [c.text for c in results.content if isinstance(c, TextContent)]
+        logger.info(f"texts: {texts} results: {results}")
+
         raw_context = []
-        for query in payload.search_queries:
-            results = await session.call_tool("search_web", arguments={"query": query})
-            texts = [c.text for c in results.content if isinstance(c, TextContent)]
-            logger.info(f"texts: {texts} results: {results}")
-            if texts:
-                raw_context.append("\n".join(texts))
+        for text in texts:
+            try:
+                entries = json.loads(text)
+            except json.JSONDecodeError:
+                logger.warning(f"RESEARCHER_AGENT: Unexpected search_web_batch response: {text}")
+                continue
+            for entry in entries:
+                if "error" in entry:
+                    logger.warning(
+                        f"RESEARCHER_AGENT: Search failed for query '{entry['query']}' - error: {entry['error']}"
+                    )
+                elif entry["results"]:
+                    raw_context.append(dumps_compact(entry["results"]))
         if not raw_context:
             return ResearchSummary(slide_topic=payload.slide_title, facts=[])
 
         return await self.summarize_facts(raw_context, payload.slide_title)
 
-    async def summarize_facts(self, raw_context: list[str], slide_title: str) -> ResearchSummary:
+    async def summarize_facts(
+        self, raw_context: list[str], slide_title: str, attempt: int = 0
+    ) -> ResearchSummary:
         """Summarizes the facts from the raw context.
 
         Args:
             raw_context (List[str]): The raw context from the web search.
             slide_title (str): The title of the slide being researched.
+            attempt (int): The number of retries already made for this request.
 
         Returns:
             ResearchSummary: The summarized facts.
         """
         try:
             joined_context = "\n\n".join(raw_context)
-            completion = await self.client.beta.chat.completions.parse(
+            completion = await parse_completion(
+                self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": SYSTEM_PROMPT},
@@ -65,10 +86,12 @@ class ResearcherAgent:
                     },
                 ],
                 response_format=ResearchSummary,
+                use_cache=self.use_cache,
+                agent="researcher",
             )
 
-            summary = completion.choices[0].message.parsed
-            return await self._validate_response(summary, slide_title, raw_context)
+            summary = completion.parsed
+            return await self._validate_response(summary, slide_title, raw_context, attempt)
 
         except Exception as e:
             logger.error(
@@ -77,7 +100,11 @@ class ResearcherAgent:
             raise e
 
     async def _validate_response(
-        self, summary: ResearchSummary | None, slide_title: str, raw_context: list[str]
+        self,
+        summary: ResearchSummary | None,
+        slide_title: str,
+        raw_context: list[str],
+        attempt: int = 0,
     ) -> ResearchSummary:
         """Validates the response from the agent with a retry mechanism which calls the summarize_facts method if the response is None.
 
@@ -85,6 +112,7 @@ class ResearcherAgent:
             summary (ResearchSummary | None): The research summary from the agent.
             slide_title (str): The title of the slide being researched.
             raw_context (List[str]): The raw context from the web search.
+            attempt (int): The number of retries already made for this request.
 
         Raises:
             ValueError: If the response from the agent is None even after 3 retries.
@@ -93,8 +121,7 @@ class ResearcherAgent:
             ResearchSummary: The validated research summary.
         """
         if summary is None:
-            if self.retry_count < 3:
-                self.retry_count += 1
-                return await self.summarize_facts(raw_context, slide_title)
-            raise ValueError(f"No response from the agent even after {self.retry_count} retries")
+            if attempt < 3:
+                return await self.summarize_facts(raw_context, slide_title, attempt + 1)
+            raise ValueError(f"No response from the agent even after {attempt} retries")
         return summary
@@ -3,7 +3,8 @@ SYSTEM_PROMPT = (
     "You have received raw search results from the web. "
     "Your job is to extract 5-10 high-quality, relevant facts for a presentation slide. "
     "Ignore ads, navigation text, or irrelevant content. "
-    "Always preserve the source URL if available."
+    "Always preserve the source URL if available. "
+    "Extract the key facts."
 )
 
-USER_PROMPT = "Slide Topic: {slide_title}\n\n--- RAW SEARCH DATA ---\n{joined_context}\n\nExtract the key facts."
+USER_PROMPT = "Slide Topic: {slide_title}\n\n--- RAW SEARCH DATA ---\n{joined_context}"
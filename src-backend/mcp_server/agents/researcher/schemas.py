@@ -17,3 +17,6 @@ class ResearchSummary(BaseModel):
 class ResearcherPayload(BaseModel):
     slide_title: str
     search_queries: List[str]
+    run_id: str | None = Field(
+        default=None, description="The workflow run, used to validate each URL once per run"
+    )
@@ -1,12 +1,27 @@
+import asyncio
 import json
+import re
+import time
 
 from mcp import ClientSession
-from openai import AsyncOpenAI
 
 from core.logger_config import logger
 from core.settings import settings
-from mcp_server.agents.writer.prompts import SYSTEM_PROMPT, USER_PROMPT
-from mcp_server.agents.writer.schemas import PresentationContent
+from mcp_server.agents.writer.prompts import (
+    CHART_REPAIR_SYSTEM_PROMPT,
+    CHART_REPAIR_USER_PROMPT,
+    SLIDE_CONTEXT_PROMPT,
+    SLIDE_DECK_RESEARCH_SECTION,
+    SLIDE_RESEARCH_SECTION,
+    SLIDE_USER_PROMPT,
+    SYSTEM_PROMPT,
+    USER_PROMPT,
+)
+from mcp_server.agents.writer.schemas import PresentationContent, SlideContent, VisualRequest
+from mcp_server.helper.llm_client import parse_completion, total_tokens
+from mcp_server.helper.openai_pool import openai_pool
+
+_NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)?")
 
 
 class WriterAgent:
@@ -14,16 +29,24 @@ class WriterAgent:
     A writer agent that synthesizes the plan and research into a final slide deck structure.
     """
 
-    def __init__(self):
+    def __init__(self, use_cache: bool = True):
         self.model = "gpt-4o"
-        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.retry_count = 0
+        self.client = openai_pool.client()
+        self.use_cache = use_cache
+        # Process-wide counters, the agent keeps no per-request state
+        self.repair_stats = {
+            "repairs": 0,
+            "failed_repairs": 0,
+            "tokens_saved": 0,
+            "seconds_saved": 0.0,
+        }
 
     async def prepare_presentation(
-        self, topic: str, plan_json: dict, research_data: list[dict]
+        self, topic: str, plan_json: dict, research_data: list[dict], attempt: int = 0
     ) -> PresentationContent:
         """
         Synthesizes the plan and research into a final slide deck structure.
+        `attempt` is the number of retries already made for this request.
         """
         logger.info(f"WRITER_AGENT: Drafting content for topic='{topic}'")
 
@@ -31,7 +54,9 @@ class WriterAgent:
         research_str = json.dumps(research_data, indent=2)
 
         try:
-            completion = await self.client.beta.chat.completions.parse(
+            start = time.perf_counter()
+            completion = await parse_completion(
+                self.client,
                 model=self.model,
                 messages=[
                     {"role": "system", "content": SYSTEM_PROMPT},
@@ -43,10 +68,19 @@ class WriterAgent:
                     },
                 ],
                 response_format=PresentationContent,
+                use_cache=self.use_cache,
+                agent="writer",
+                accept=self.has_chart,
             )
 
-            content = completion.choices[0].message.parsed
-            return await self._validate_response(content, topic, plan_json, research_data)
+            generation = {
+                "tokens": total_tokens(completion.usage),
+                "seconds": time.perf_counter() - start,
+            }
+            content = completion.parsed
+            return await self._validate_response(
+                content, topic, plan_json, research_data, attempt, generation
+            )
 
         except Exception as e:
             logger.error(
@@ -54,6 +88,233 @@ class WriterAgent:
             )
             raise e
 
+    async def draft_slide(
+        self,
+        topic: str,
+        slide_plans: list[dict],
+        index: int,
+        research: dict,
+        deck_research: list[dict] | None = None,
+    ) -> SlideContent:
+        """Writes a single slide of the plan, in one call. Every slide of a deck is sent the same
+        leading messages, the system prompt and the deck context (the whole plan and, when
+        `deck_research` is given, the research of every slide), which keeps the narrative
+        consistent and lets the provider cache them once per deck; only the last message is
+        specific to the slide. Retries are left to the caller, up to WRITER_SLIDE_ATTEMPTS calls
+        per slide.
+
+        Args:
+            topic (str): The topic of the presentation.
+            slide_plans (list[dict]): The plan entries of all the slides, in order.
+            index (int): The position of the slide in the plan.
+            research (dict): The research summary of the slide, sent with the slide when
+                `deck_research` is not given.
+            deck_research (list[dict] | None): The research summaries of every slide, in plan
+                order, when they are all known.
+
+        Raises:
+            ValueError: If the response from the agent is None.
+
+        Returns:
+            SlideContent: The content of the slide.
+        """
+        deck_research_section = (
+            SLIDE_DECK_RESEARCH_SECTION.format(research_str=json.dumps(deck_research, indent=2))
+            if deck_research is not None
+            else ""
+        )
+        slide_research_section = (
+            ""
+            if deck_research is not None
+            else SLIDE_RESEARCH_SECTION.format(research_str=json.dumps(research, indent=2))
+        )
+
+        completion = await parse_completion(
+            self.client,
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {
+                    "role": "user",
+                    "content": SLIDE_CONTEXT_PROMPT.format(
+                        topic=topic,
+                        plan_str=json.dumps(slide_plans, indent=2),
+                        research_section=deck_research_section,
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": SLIDE_USER_PROMPT.format(
+                        slide_position=index + 1,
+                        num_slides=len(slide_plans),
+                        title=slide_plans[index]["title"],
+                        research_section=slide_research_section,
+                    ),
+                },
+            ],
+            response_format=SlideContent,
+            use_cache=self.use_cache,
+            agent="writer",
+        )
+
+        slide = completion.parsed
+        if slide is None:
+            raise ValueError(f"No response for slide='{slide_plans[index]['title']}'")
+        return slide
+
+    async def prepare_presentation_by_slide(
+        self, topic: str, plan_json: dict, research_data: list[dict]
+    ) -> PresentationContent:
+        """Writes every slide in its own concurrent call (at most WRITER_CONCURRENCY at a time),
+        then merges them in plan order. The whole plan and research are the context shared by the
+        calls. Only the slides that failed are written again, for at most WRITER_SLIDE_ATTEMPTS
+        calls per slide.
+
+        Args:
+            topic (str): The topic of the presentation.
+            plan_json (dict): The presentation plan.
+            research_data (list[dict]): The research summaries, in plan order.
+
+        Raises:
+            ValueError: If some slides still fail after WRITER_SLIDE_ATTEMPTS calls.
+
+        Returns:
+            PresentationContent: The content of the presentation.
+        """
+        logger.info(f"WRITER_AGENT: Drafting content slide by slide for topic='{topic}'")
+
+        slide_plans = plan_json["slides"]
+        deck_research = [
+            research_data[index] if index < len(research_data) else {}
+            for index in range(len(slide_plans))
+        ]
+        limit = asyncio.Semaphore(settings.WRITER_CONCURRENCY)
+        slides: list[SlideContent | None] = [None] * len(slide_plans)
+
+        async def draft(index: int) -> SlideContent:
+            async with limit:
+                return await self.draft_slide(
+                    topic=topic,
+                    slide_plans=slide_plans,
+                    index=index,
+                    research=deck_research[index],
+                    deck_research=deck_research,
+                )
+
+        pending = list(range(len(slide_plans)))
+        retries = settings.WRITER_SLIDE_ATTEMPTS - 1
+        for attempt in range(settings.WRITER_SLIDE_ATTEMPTS):
+            if attempt:
+                logger.warning(
+                    f"WRITER_AGENT: Retrying slides {[i + 1 for i in pending]} {attempt}/{retries}..."
+                )
+            results = await asyncio.gather(*(draft(i) for i in pending), return_exceptions=True)
+            failed = []
+            for index, result in zip(pending, results, strict=True):
+                if isinstance(result, Exception):
+                    logger.error(f"WRITER_AGENT: Slide {index + 1} failed - error: {result}")
+                    failed.append(index)
+                else:
+                    slides[index] = result
+            pending = failed
+            if not pending:
+                break
+        else:
+            raise ValueError(
+                f"Slides {[i + 1 for i in pending]} failed after retries for topic='{topic}'"
+            )
+
+        content = PresentationContent(
+            filename_suggestion="_".join(topic.lower().split())[:50], slides=slides
+        )
+        if not self.has_chart(content):
+            repaired = await self.repair_chart(content, topic, research_data)
+            if repaired is None:
+                logger.warning(f"WRITER_AGENT: No chart found in presentation for topic='{topic}'")
+            else:
+                content = repaired
+        return content
+
+    async def repair_chart(
+        self,
+        content: PresentationContent,
+        topic: str,
+        research_data: list[dict],
+        generation: dict | None = None,
+    ) -> PresentationContent | None:
+        """Adds a chart to the deck with a small request for the most numeric slide only,
+        instead of regenerating every slide.
+
+        Args:
+            content (PresentationContent): The deck content without a chart.
+            topic (str): The topic of the presentation.
+            research_data (list[dict]): The research summaries, in plan order.
+            generation (dict | None): The tokens and seconds of the full generation the repair
+                replaces, to count what it saved.
+
+        Returns:
+            PresentationContent | None: The deck with the chart, or None if the repair failed.
+        """
+        if not content.slides:
+            return None
+
+        index = max(
+            range(len(content.slides)),
+            key=lambda i: _numeric_score(content.slides[i], _research_for(research_data, i)),
+        )
+        slide = content.slides[index]
+        logger.info(f"WRITER_AGENT: Repairing chart on slide {index + 1} '{slide.title}'")
+
+        start = time.perf_counter()
+        try:
+            completion = await parse_completion(
+                self.client,
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": CHART_REPAIR_SYSTEM_PROMPT},
+                    {
+                        "role": "user",
+                        "content": CHART_REPAIR_USER_PROMPT.format(
+                            topic=topic,
+                            slide_str=json.dumps(
+                                {"title": slide.title, "points": slide.points},
+                                separators=(",", ":"),
+                            ),
+                            research_str=json.dumps(
+                                _research_for(research_data, index), separators=(",", ":")
+                            ),
+                        ),
+                    },
+                ],
+                response_format=VisualRequest,
+                use_cache=self.use_cache,
+                agent="writer",
+                accept=lambda visual: visual.type == "chart" and bool(visual.data_json),
+            )
+        except Exception as e:
+            logger.error(f"WRITER_AGENT: Chart repair failed - error: {e}")
+            self.repair_stats["failed_repairs"] += 1
+            return None
+
+        visual = completion.parsed
+        if visual is None or visual.type != "chart" or not visual.data_json:
+            logger.warning("WRITER_AGENT: Chart repair returned no chart")
+            self.repair_stats["failed_repairs"] += 1
+            return None
+
+        seconds = time.perf_counter() - start
+        generation = generation or {"tokens": 0, "seconds": 0.0}
+        self.repair_stats["repairs"] += 1
+        self.repair_stats["tokens_saved"] += max(
+            0, generation["tokens"] - total_tokens(completion.usage)
+        )
+        self.repair_stats["seconds_saved"] += max(0.0, generation["seconds"] - seconds)
+        logger.info(f"WRITER_AGENT: Chart repaired in {seconds:.2f}s. Stats: {self.repair_stats}")
+
+        repaired = content.model_copy(deep=True)
+        repaired.slides[index].visual_request = visual
+        return repaired
+
     async def write_presentation(
         self,
         content: PresentationContent,
@@ -91,31 +352,46 @@ class WriterAgent:
 
         return content
 
-    async def _validate_response(self, content, topic, plan, research):
+    async def _validate_response(
+        self, content, topic, plan, research, attempt: int = 0, generation: dict | None = None
+    ):
         if content is None:
-            if self.retry_count < 3:
-                self.retry_count += 1
-                logger.warning(f"WRITER_AGENT: Retrying {self.retry_count}/3...")
-                return await self.prepare_presentation(topic, plan, research)
+            if attempt < 3:
+                logger.warning(f"WRITER_AGENT: Retrying {attempt + 1}/3...")
+                return await self.prepare_presentation(topic, plan, research, attempt + 1)
             raise ValueError(f"No response after retries for topic='{topic}'")
 
-        # Validate at least one chart exists
-        has_chart = any(
+        # Validate at least one chart exists, repairing a single slide before regenerating
+        if not self.has_chart(content):
+            repaired = await self.repair_chart(content, topic, research, generation)
+            if repaired is not None:
+                return repaired
+            if attempt < 3:
+                logger.warning(
+                    f"WRITER_AGENT: No chart found in presentation. Retrying {attempt + 1}/3..."
+                )
+                return await self.prepare_presentation(topic, plan, research, attempt + 1)
+            raise ValueError(f"No chart generated after {attempt} retries for topic='{topic}'")
+
+        return content
+
+    @staticmethod
+    def has_chart(content: PresentationContent) -> bool:
+        """Checks whether at least one slide requests a chart with data."""
+        return any(
             slide.visual_request
             and slide.visual_request.type == "chart"
             and slide.visual_request.data_json
             for slide in content.slides
         )
 
-        if not has_chart:
-            if self.retry_count < 3:
-                self.retry_count += 1
-                logger.warning(
-                    f"WRITER_AGENT: No chart found in presentation. Retrying {self.retry_count}/3..."
-                )
-                return await self.prepare_presentation(topic, plan, research)
-            raise ValueError(
-                f"No chart generated after {self.retry_count} retries for topic='{topic}'"
-            )
 
-        return content
+def _research_for(research_data: list[dict], index: int) -> dict:
+    """Returns the research summary of a slide, empty if there is none."""
+    return research_data[index] if index < len(research_data) else {}
+
+
+def _numeric_score(slide: SlideContent, research: dict) -> int:
+    """Counts the numbers in a slide and its research, to find the slide best suited for a chart."""
+    texts = [*slide.points, *(f.get("content", "") for f in research.get("facts", []))]
+    return sum(len(_NUMBER_RE.findall(text)) for text in texts)
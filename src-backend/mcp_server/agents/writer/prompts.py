@@ -35,3 +35,51 @@ Topic: {topic}
 
 Generate the final slide content with visual requests.
 """
+
+# Per-slide calls send the deck context first and the slide last, so the system prompt and the
+# deck context (the whole plan and, once every slide is researched, all the research) form a
+# prefix shared by every slide of the deck, long enough for provider-side prompt caching
+SLIDE_CONTEXT_PROMPT = """
+Topic: {topic}
+
+--- PRESENTATION PLAN ---
+{plan_str}
+{research_section}
+You are writing ONLY one slide of this plan; the other slides are written separately.
+Keep the narrative consistent with the plan and do not repeat the content of the other slides.
+Add a 'chart' visual_request only if the slide has numerical or comparative data.
+"""
+
+SLIDE_DECK_RESEARCH_SECTION = """
+--- RESEARCH DATA (one entry per slide, in plan order) ---
+{research_str}
+"""
+
+SLIDE_USER_PROMPT = """
+Write slide {slide_position} of {num_slides}: "{title}".
+{research_section}
+Generate the content of this slide with its visual request, from its plan entry and research data.
+"""
+
+SLIDE_RESEARCH_SECTION = """
+--- RESEARCH DATA ---
+{research_str}
+"""
+
+CHART_REPAIR_SYSTEM_PROMPT = """You are a data visualization designer.
+Create ONE 'visual_request' of type 'chart' for the given slide, with valid data_json
+(labels, values and unit) taken from the slide and its research notes.
+If no statistics are available, synthesize a meaningful comparison from the information given.
+"""
+
+CHART_REPAIR_USER_PROMPT = """
+Topic: {topic}
+
+--- SLIDE ---
+{slide_str}
+
+--- RESEARCH DATA ---
+{research_str}
+
+Generate the chart visual request for this slide.
+"""
@@ -0,0 +1,58 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+
+class RequestCoalescer:
+    """
+    Coalesces identical concurrent requests: while a call for a key is in flight, every other
+    caller with the same key awaits that call instead of starting its own. Nothing is kept once
+    the call finishes, this only absorbs bursts. At most `max_in_flight` keys are tracked, past
+    that requests run uncoalesced.
+    """
+
+    def __init__(self, max_in_flight: int):
+        self.max_in_flight = max_in_flight
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self._stats = {"calls": 0, "coalesced": 0, "bypassed": 0}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the result of `func`, sharing the in-flight call for the same key if any.
+
+        Args:
+            key (Hashable): The request identity.
+            func (Callable[[], Awaitable[Any]]): The upstream call.
+
+        Returns:
+            Any: The result of the upstream call.
+        """
+        self._stats["calls"] += 1
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._stats["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        if len(self._in_flight) >= self.max_in_flight:
+            self._stats["bypassed"] += 1
+            return await func()
+
+        task = asyncio.ensure_future(func())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._release(key, t))
+        return await asyncio.shield(task)
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        """Removes the finished call so the next request for the key goes upstream."""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved, the waiters re-raise it
+            task.exception()
+
+    def stats(self) -> dict[str, int]:
+        """Returns the counters of the coalescer.
+
+        Returns:
+            dict[str, int]: The calls, coalesced calls, bypassed calls and keys in flight.
+        """
+        return {**self._stats, "in_flight": len(self._in_flight)}
@@ -0,0 +1,316 @@
+import json
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from core.consts import MODEL_PRICING
+
+current_job: ContextVar["JobMetrics | None"] = ContextVar("current_job", default=None)
+_current_stage: ContextVar[str] = ContextVar("current_stage", default="other")
+
+
+def _tokens(value) -> int:
+    """Returns a token count from the usage, 0 if it is not reported."""
+    return value if isinstance(value, int) else 0
+
+
+def estimate_cost(
+    model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int
+) -> float:
+    """Estimates the cost of a completion from MODEL_PRICING, 0 for unknown models.
+
+    Args:
+        model (str): The model name.
+        prompt_tokens (int): The prompt tokens, cached ones included.
+        completion_tokens (int): The completion tokens.
+        cached_tokens (int): The prompt tokens served from the prompt cache.
+
+    Returns:
+        float: The estimated cost, in USD.
+    """
+    pricing = MODEL_PRICING.get(model)
+    if pricing is None:
+        return 0.0
+    return (
+        (prompt_tokens - cached_tokens) * pricing["input"]
+        + cached_tokens * pricing["cached_input"]
+        + completion_tokens * pricing["output"]
+    ) / 1_000_000
+
+
+class JobMetrics:
+    """
+    Accounts the LLM tokens, estimated cost and latencies of one workflow run (a `pprt_id`).
+    Set as the current job, it receives every LLM call and MCP tool call made from the run's
+    tasks, attributed to the stage they run in.
+    """
+
+    def __init__(self, pprt_id: str):
+        self.pprt_id = pprt_id
+        self.started_at = datetime.now(UTC)
+        self.status = "running"
+        self.error: str | None = None
+        self._start = time.perf_counter()
+        self._elapsed: float | None = None
+        self.stages: dict[str, dict[str, Any]] = {}
+        self.models: dict[str, dict[str, Any]] = {}
+        self.agents: dict[str, dict[str, Any]] = {}
+        self.tools: dict[str, dict[str, Any]] = {}
+        self.mcp_session: dict[str, Any] | None = None
+
+    def _stage(self, name: str) -> dict[str, Any]:
+        if name not in self.stages:
+            self.stages[name] = {
+                "seconds": 0.0,
+                "llm_calls": 0,
+                "llm_cache_hits": 0,
+                "llm_seconds": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_tokens": 0,
+                "cost_usd": 0.0,
+                "tool_calls": 0,
+                "tool_seconds": 0.0,
+            }
+        return self.stages[name]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Attributes the calls made inside the block to the stage and adds its duration.
+
+        Args:
+            name (str): The stage name.
+        """
+        token = _current_stage.set(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._stage(name)["seconds"] += time.perf_counter() - start
+            _current_stage.reset(token)
+
+    def record_llm(
+        self, model: str, usage, seconds: float, cache_hit: bool = False, agent: str | None = None
+    ):
+        """Records an LLM call in the current stage and in its model's and agent's totals.
+
+        Args:
+            model (str): The model name.
+            usage: The usage of the completion, None on cache hits.
+            seconds (float): The duration of the call.
+            cache_hit (bool): Whether the response came from the LLM cache.
+            agent (str | None): The calling agent.
+        """
+        prompt = _tokens(getattr(usage, "prompt_tokens", 0))
+        completion = _tokens(getattr(usage, "completion_tokens", 0))
+        cached = _tokens(getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", 0))
+        cost = estimate_cost(model, prompt, completion, cached)
+
+        stage = self._stage(_current_stage.get())
+        stage["llm_calls"] += 1
+        stage["llm_cache_hits"] += int(cache_hit)
+        stage["llm_seconds"] += seconds
+        model_totals = self.models.setdefault(
+            model,
+            {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_tokens": 0,
+                "cost_usd": 0.0,
+            },
+        )
+        model_totals["calls"] += 1
+        agent_totals = self.agents.setdefault(
+            agent or "other",
+            {
+                "calls": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "cached_tokens": 0,
+                "cost_usd": 0.0,
+            },
+        )
+        agent_totals["calls"] += 1
+        for totals in (stage, model_totals, agent_totals):
+            totals["prompt_tokens"] += prompt
+            totals["completion_tokens"] += completion
+            totals["cached_tokens"] += cached
+            totals["cost_usd"] += cost
+
+    def record_tool(self, name: str, seconds: float, error: bool = False):
+        """Records an MCP tool call in the current stage and in the tool's totals.
+
+        Args:
+            name (str): The tool name.
+            seconds (float): The duration of the call.
+            error (bool): Whether the call failed.
+        """
+        stage = self._stage(_current_stage.get())
+        stage["tool_calls"] += 1
+        stage["tool_seconds"] += seconds
+        tool = self.tools.setdefault(
+            name, {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0}
+        )
+        tool["calls"] += 1
+        tool["errors"] += int(error)
+        tool["seconds"] += seconds
+        tool["max_seconds"] = max(tool["max_seconds"], seconds)
+
+    def record_session(self, warm: bool, seconds: float):
+        """Records how the job got its MCP session.
+
+        Args:
+            warm (bool): Whether the session came from a running server (False if a server
+                had to be spawned for the job).
+            seconds (float): The seconds until the session was ready.
+        """
+        self.mcp_session = {"start": "warm" if warm else "cold", "seconds": seconds}
+
+    def finish(self, status: str, error: str | None = None):
+        """Marks the job as finished.
+
+        Args:
+            status (str): The final status, "completed" or "failed".
+            error (str | None): The error of a failed job.
+        """
+        self.status = status
+        self.error = error
+        self._elapsed = time.perf_counter() - self._start
+
+    def report(self) -> dict:
+        """Builds the report of the job.
+
+        Returns:
+            dict: The stage latencies, token totals, estimated cost, tool latencies and the
+            start of the MCP session.
+        """
+        elapsed = self._elapsed if self._elapsed is not None else time.perf_counter() - self._start
+        totals = {
+            key: sum(model[key] for model in self.models.values())
+            for key in ("calls", "prompt_tokens", "completion_tokens", "cached_tokens", "cost_usd")
+        }
+        return {
+            "pprt_id": self.pprt_id,
+            "status": self.status,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "total_seconds": round(elapsed, 3),
+            "stages": _rounded(self.stages),
+            "models": _rounded(self.models),
+            "agents": _rounded(
+                {
+                    name: {**totals, "cached_rate": _cached_rate(totals)}
+                    for name, totals in self.agents.items()
+                }
+            ),
+            "tools": _rounded(self.tools),
+            "mcp_session": _rounded(self.mcp_session),
+            "totals": _rounded({**totals, "cached_rate": _cached_rate(totals)}),
+        }
+
+    def save(self, directory: Path) -> Path:
+        """Writes the report next to the deck, as `<pprt_id>.report.json`.
+
+        Args:
+            directory (Path): The directory of the decks.
+
+        Returns:
+            Path: The path of the report.
+        """
+        path = report_path(directory, self.pprt_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+        return path
+
+
+def _cached_rate(totals: dict) -> float:
+    """Returns the share of prompt tokens served from the provider's prompt cache."""
+    return totals["cached_tokens"] / totals["prompt_tokens"] if totals["prompt_tokens"] else 0.0
+
+
+def _rounded(value):
+    """Rounds the seconds and costs of the report."""
+    if isinstance(value, dict):
+        return {key: _rounded(item) for key, item in value.items()}
+    if isinstance(value, float):
+        return round(value, 6)
+    return value
+
+
+def report_path(directory: Path, pprt_id: str) -> Path:
+    """Returns the path of a job's report.
+
+    Args:
+        directory (Path): The directory of the decks.
+        pprt_id (str): The presentation ID.
+
+    Returns:
+        Path: The path of the report.
+    """
+    return directory / f"{pprt_id}.report.json"
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Runs the block as a stage of the current job, if there is one.
+
+    Args:
+        name (str): The stage name.
+    """
+    job = current_job.get()
+    if job is None:
+        yield
+        return
+    with job.stage(name):
+        yield
+
+
+def record_llm(
+    model: str, usage, seconds: float, cache_hit: bool = False, agent: str | None = None
+):
+    """Records an LLM call in the current job, if there is one."""
+    job = current_job.get()
+    if job is not None:
+        job.record_llm(model, usage, seconds, cache_hit, agent)
+
+
+def record_tool(name: str, seconds: float, error: bool = False):
+    """Records an MCP tool call in the current job, if there is one."""
+    job = current_job.get()
+    if job is not None:
+        job.record_tool(name, seconds, error)
+
+
+def record_session(warm: bool, seconds: float):
+    """Records how the current job got its MCP session, if there is a job."""
+    job = current_job.get()
+    if job is not None:
+        job.record_session(warm, seconds)
+
+
+class MeteredSession:
+    """
+    Wraps an MCP ClientSession to time every tool call of the current job.
+    Everything else is delegated to the session.
+    """
+
+    def __init__(self, session):
+        self._session = session
+
+    async def call_tool(self, name: str, arguments: dict | None = None, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = await self._session.call_tool(name, arguments=arguments, **kwargs)
+            error = getattr(result, "isError", False) is True
+            return result
+        finally:
+            record_tool(name, time.perf_counter() - start, error)
+
+    def __getattr__(self, name: str):
+        return getattr(self._session, name)
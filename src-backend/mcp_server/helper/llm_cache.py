@@ -0,0 +1,87 @@
+import hashlib
+import json
+from functools import lru_cache
+
+from pydantic import BaseModel
+
+from core.consts import CACHE_PATH
+from core.settings import settings
+from mcp_server.helper.memory_cache import MemoryCache
+from mcp_server.helper.sqlite_cache import SQLiteCache
+from mcp_server.helper.tiered_cache import TieredCache
+
+
+@lru_cache(maxsize=64)
+def schema_hash(response_format: type[BaseModel]) -> str:
+    """Hashes the JSON schema of a response format, so a schema change invalidates its entries.
+
+    Args:
+        response_format (type[BaseModel]): The pydantic model of the structured output.
+
+    Returns:
+        str: The hash of the schema.
+    """
+    schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(schema.encode()).hexdigest()
+
+
+class LLMCache(TieredCache):
+    """
+    A content-addressed cache of structured LLM responses: an in-process LRU of parsed pydantic
+    objects in front of an on-disk store of their JSON. Memory hits skip both the network and the
+    parsing, disk hits only the network.
+    """
+
+    @staticmethod
+    def make_key(model: str, messages: list[dict], response_format: type[BaseModel]) -> str:
+        """Builds the cache key of a completion from its model, messages and response schema.
+
+        Args:
+            model (str): The model name.
+            messages (list[dict]): The chat messages.
+            response_format (type[BaseModel]): The pydantic model of the structured output.
+
+        Returns:
+            str: The cache key.
+        """
+        payload = json.dumps(
+            [model, messages, response_format.__name__, schema_hash(response_format)],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str, response_format: type[BaseModel]) -> BaseModel | None:
+        """Returns a copy of the cached response, promoting disk hits to memory.
+
+        Args:
+            key (str): The cache key.
+            response_format (type[BaseModel]): The pydantic model of the structured output.
+
+        Returns:
+            BaseModel | None: The cached response.
+        """
+        parsed = await self._lookup(key, response_format.model_validate)
+        return parsed.model_copy(deep=True) if parsed is not None else None
+
+    async def set(self, key: str, parsed: BaseModel):
+        """Stores the parsed response in both levels.
+
+        Args:
+            key (str): The cache key.
+            parsed (BaseModel): The parsed response.
+        """
+        await self._store(key, parsed.model_copy(deep=True), parsed.model_dump(mode="json"))
+
+
+llm_cache = LLMCache(
+    ttl=settings.LLM_CACHE_TTL,
+    memory=MemoryCache(max_entries=settings.LLM_CACHE_MEMORY_MAX_ENTRIES),
+    store=SQLiteCache(
+        settings.LLM_CACHE_PATH or CACHE_PATH / "llm.sqlite3",
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        table="llm",
+    )
+    if settings.LLM_CACHE_ENABLED
+    else None,
+)
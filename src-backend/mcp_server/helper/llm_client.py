@@ -0,0 +1,199 @@
+import hashlib
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+
+from core.logger_config import logger
+from core.settings import settings
+from mcp_server.helper.job_metrics import record_llm
+from mcp_server.helper.llm_cache import llm_cache
+from mcp_server.helper.openai_pool import openai_pool
+from mcp_server.helper.search_payload import dumps_compact, estimate_tokens
+
+
+class StreamInterruptedError(RuntimeError):
+    """A streamed completion failed after the caller had used part of it. It is not retried:
+    a new request would generate a different response than the part already used."""
+
+
+class CompletionResult(BaseModel):
+    parsed: Any = None
+    usage: Any = None  # None on cache hits
+    cache_hit: bool = False
+
+
+def total_tokens(usage) -> int:
+    """Returns the total tokens of a completion usage, 0 if it is not reported.
+
+    Args:
+        usage: The usage of the completion.
+
+    Returns:
+        int: The total number of tokens.
+    """
+    return getattr(usage, "total_tokens", 0) if usage else 0
+
+
+def prompt_prefix_key(messages: list[dict], namespace: str) -> str:
+    """Builds the prompt cache key of a call from its stable prefix (every message but the last).
+
+    Args:
+        messages (list[dict]): The chat messages.
+        namespace (str): Prefixes the key, e.g. the agent name.
+
+    Returns:
+        str: The prompt cache key.
+    """
+    prefix = dumps_compact(messages[:-1])
+    return f"{namespace}-{hashlib.sha256(prefix.encode()).hexdigest()[:16]}"
+
+
+async def parse_completion(
+    client: AsyncOpenAI,
+    model: str,
+    messages: list[dict],
+    response_format: type[BaseModel],
+    use_cache: bool = True,
+    accept: Callable[[Any], bool] | None = None,
+    agent: str | None = None,
+) -> CompletionResult:
+    """Runs a structured-output chat completion, going through the LLM cache first. Misses are
+    sent through the OpenAI pool, within the model's rate limits. Every call is recorded in the
+    metrics of the current job.
+
+    The messages must be laid out from the most stable to the most variable: every message but
+    the last forms the prefix the provider caches, and its hash is sent as `prompt_cache_key` so
+    calls sharing it are routed to the same cache.
+
+    Only parsed responses are cached, and only those `accept` approves, so a response the agent
+    would reject and retry is never served from the cache.
+
+    Args:
+        client (AsyncOpenAI): The OpenAI client.
+        model (str): The model name.
+        messages (list[dict]): The chat messages.
+        response_format (type[BaseModel]): The pydantic model of the structured output.
+        use_cache (bool): Whether the agent uses the cache.
+        accept (Callable[[Any], bool] | None): Validates the parsed response before caching it.
+        agent (str | None): The calling agent, for the metrics and the prompt cache key.
+
+    Returns:
+        CompletionResult: The parsed response and the usage of the completion.
+    """
+    return await _complete(
+        model,
+        messages,
+        response_format,
+        use_cache,
+        accept,
+        agent,
+        lambda prompt_cache_key: client.beta.chat.completions.parse(
+            model=model,
+            messages=messages,
+            response_format=response_format,
+            prompt_cache_key=prompt_cache_key,
+        ),
+    )
+
+
+async def stream_completion(
+    client: AsyncOpenAI,
+    model: str,
+    messages: list[dict],
+    response_format: type[BaseModel],
+    on_partial: Callable[[dict], Awaitable[bool]],
+    use_cache: bool = True,
+    accept: Callable[[Any], bool] | None = None,
+    agent: str | None = None,
+) -> CompletionResult:
+    """Runs a structured-output chat completion like `parse_completion`, streaming the response.
+    `on_partial` receives the partially parsed JSON every time the model adds to it, so the
+    caller can use the parts of the response that are already complete. A cached response is
+    passed to `on_partial` whole.
+
+    `on_partial` returns whether the caller used the partial response. Until it does, a failed
+    stream is retried by the pool and the partial JSON starts over. Once it has, a failure raises
+    `StreamInterruptedError` instead, so the caller never mixes two generations.
+
+    Args:
+        client (AsyncOpenAI): The OpenAI client.
+        model (str): The model name.
+        messages (list[dict]): The chat messages.
+        response_format (type[BaseModel]): The pydantic model of the structured output.
+        on_partial (Callable[[dict], Awaitable[bool]]): Receives the partial response, returns
+            whether it used it.
+        use_cache (bool): Whether the agent uses the cache.
+        accept (Callable[[Any], bool] | None): Validates the parsed response before caching it.
+        agent (str | None): The calling agent, for the metrics and the prompt cache key.
+
+    Raises:
+        StreamInterruptedError: If the stream failed after the caller used part of it.
+
+    Returns:
+        CompletionResult: The parsed response and the usage of the completion.
+    """
+    used = False
+
+    async def request(prompt_cache_key: str):
+        nonlocal used
+        try:
+            async with client.beta.chat.completions.stream(
+                model=model,
+                messages=messages,
+                response_format=response_format,
+                prompt_cache_key=prompt_cache_key,
+                stream_options={"include_usage": True},
+            ) as stream:
+                async for event in stream:
+                    if event.type == "content.delta" and isinstance(event.parsed, dict):
+                        used = await on_partial(event.parsed) or used
+                return await stream.get_final_completion()
+        except Exception as e:
+            if used:
+                raise StreamInterruptedError(
+                    f"{response_format.__name__} stream failed after it was partly used: {e}"
+                ) from e
+            raise
+
+    result = await _complete(model, messages, response_format, use_cache, accept, agent, request)
+    if result.cache_hit:
+        await on_partial(result.parsed.model_dump())
+    return result
+
+
+async def _complete(
+    model: str,
+    messages: list[dict],
+    response_format: type[BaseModel],
+    use_cache: bool,
+    accept: Callable[[Any], bool] | None,
+    agent: str | None,
+    request: Callable[[str], Awaitable[Any]],
+) -> CompletionResult:
+    """Serves a completion from the LLM cache, or sends `request` (called with the prompt cache
+    key) through the OpenAI pool, records it in the job metrics and caches the accepted result."""
+    cached = use_cache and settings.LLM_CACHE_ENABLED
+    if cached:
+        key = llm_cache.make_key(model, messages, response_format)
+        parsed = await llm_cache.get(key, response_format)
+        if parsed is not None:
+            logger.info(f"LLM cache hit for {response_format.__name__} ({model})")
+            record_llm(model, None, 0.0, cache_hit=True, agent=agent)
+            return CompletionResult(parsed=parsed, cache_hit=True)
+
+    estimated_tokens = (
+        estimate_tokens(dumps_compact(messages)) + settings.OPENAI_ESTIMATED_OUTPUT_TOKENS
+    )
+    prompt_cache_key = prompt_prefix_key(messages, agent or response_format.__name__)
+    start = time.perf_counter()
+    completion = await openai_pool.run(model, estimated_tokens, lambda: request(prompt_cache_key))
+    usage = getattr(completion, "usage", None)
+    record_llm(model, usage, time.perf_counter() - start, agent=agent)
+    parsed = completion.choices[0].message.parsed
+
+    if cached and isinstance(parsed, response_format) and (accept is None or accept(parsed)):
+        await llm_cache.set(key, parsed)
+    return CompletionResult(parsed=parsed, usage=usage)
@@ -0,0 +1,54 @@
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class MemoryCache:
+    """
+    An in-process key/value store with a TTL per entry and a least-recently-used eviction
+    once the store grows past `max_entries`. Same interface as `SQLiteCache`, values are
+    kept as they are (no serialization).
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        """Returns the value stored under the key, or None if it is missing or expired.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Any | None: The cached value.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Stores the value under the key for `ttl` seconds and evicts entries over the size bound.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value.
+            ttl (float): The time to live of the entry, in seconds.
+        """
+        self._entries[key] = (time.time() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,113 @@
+import contextlib
+
+from lxml import etree
+
+REF_KEYWORDS = ["references", "bibliography", "works cited", "sources"]
+HEADING_TAGS = {"h1", "h2", "h3", "h4"}
+
+_MISSING = object()
+
+
+class MetadataScanner:
+    """
+    An incremental metadata extractor built on lxml's event-driven HTML parser.
+    It never builds a tree: the page is fed chunk by chunk as it is downloaded and the
+    result is the same author/date/has_references dict as `SourceValidator.get_metadata`.
+    """
+
+    def __init__(self):
+        self._parser = etree.HTMLParser(target=self)
+        self._author_name = _MISSING
+        self._author_property = _MISSING
+        self._date_name = _MISSING
+        self._date_property = _MISSING
+        self._time = _MISSING
+        self._has_references = False
+        self._captures: list[tuple[str, list[str]]] = []
+        self._closed = False
+
+    @property
+    def done(self) -> bool:
+        """True once the highest-priority source of every signal has been found,
+        meaning the rest of the page cannot change the result."""
+        return (
+            self._author_name is not _MISSING
+            and self._date_name is not _MISSING
+            and self._has_references
+        )
+
+    def feed(self, chunk: str):
+        """Feeds the next chunk of the decoded page to the parser.
+
+        Args:
+            chunk (str): The chunk of HTML.
+        """
+        self._parser.feed(chunk)
+
+    def metadata(self) -> dict:
+        """Closes the parser and resolves the metadata from the signals found so far.
+
+        Returns:
+            dict: The metadata.
+        """
+        if not self._closed:
+            self._closed = True
+            # Raises when nothing was fed to the parser
+            with contextlib.suppress(etree.XMLSyntaxError):
+                self._parser.close()
+
+        meta = {"author": None, "date": None, "has_references": self._has_references}
+        for author in (self._author_name, self._author_property):
+            if author is not _MISSING:
+                meta["author"] = author
+                break
+        for date in (self._date_name, self._date_property, self._time):
+            if date is not _MISSING:
+                meta["date"] = date
+                break
+        return meta
+
+    # -- lxml parser target interface --
+
+    def start(self, tag: str, attrib: dict):
+        if tag == "meta":
+            name = attrib.get("name")
+            prop = attrib.get("property")
+            content = attrib.get("content")
+            if name == "author" and self._author_name is _MISSING:
+                self._author_name = content
+            if prop == "article:author" and self._author_property is _MISSING:
+                self._author_property = content
+            if name == "date" and self._date_name is _MISSING:
+                self._date_name = content or ""
+            if prop == "article:published_time" and self._date_property is _MISSING:
+                self._date_property = content or ""
+        elif tag == "time" and self._time is _MISSING:
+            if attrib.get("content"):
+                self._time = attrib["content"]
+            elif not any(captured == "time" for captured, _ in self._captures):
+                self._captures.append((tag, []))
+        elif tag in HEADING_TAGS and not self._has_references:
+            self._captures.append((tag, []))
+
+    def end(self, tag: str):
+        for i in range(len(self._captures) - 1, -1, -1):
+            if self._captures[i][0] == tag:
+                captured, parts = self._captures.pop(i)
+                self._on_text(captured, "".join(parts))
+                break
+
+    def data(self, data: str):
+        for _, parts in self._captures:
+            parts.append(data)
+
+    def close(self):
+        return None
+
+    def _on_text(self, tag: str, text: str):
+        """Handles the full text of a captured element."""
+        if tag == "time":
+            if self._time is _MISSING:
+                self._time = text
+        elif any(k in text.lower() for k in REF_KEYWORDS):
+            self._has_references = True
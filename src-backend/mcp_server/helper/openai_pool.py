@@ -0,0 +1,238 @@
+import asyncio
+import random
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from core.logger_config import logger
+from core.settings import settings
+
+
+class TokenBucket:
+    """
+    A bucket refilled continuously at `per_minute` units per minute, holding at most one
+    minute's worth. It can go negative when the actual usage turns out higher than estimated.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = per_minute
+        self.rate = per_minute / 60
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Returns the seconds to wait before `amount` units are available (0 if they are)."""
+        self._refill()
+        # A request larger than the bucket only waits for a full bucket
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def consume(self, amount: float):
+        """Takes `amount` units from the bucket (a negative amount gives units back)."""
+        self._refill()
+        self.level -= amount
+
+
+class RateLimiter:
+    """
+    Admits the requests of one model within its requests-per-minute and tokens-per-minute
+    budgets, in arrival order. Requests are admitted on their estimated tokens and the
+    estimate is corrected with the actual usage once the response arrives.
+    """
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, estimated_tokens: int) -> float:
+        """Waits until the request fits in both budgets and reserves it.
+
+        Args:
+            estimated_tokens (int): The estimated tokens of the request.
+
+        Returns:
+            float: The seconds waited.
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+                waited += wait
+            self.requests.consume(1)
+            self.tokens.consume(estimated_tokens)
+        return waited
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Corrects the reserved tokens with the actual usage of the request."""
+        self.tokens.consume(actual_tokens - estimated_tokens)
+
+
+class OpenAIPool:
+    """
+    A process-wide OpenAI client with HTTP keep-alive shared by every agent, and a scheduler
+    that keeps the requests of each model within its configured RPM/TPM budgets. The SDK's own
+    retries are disabled: rate-limited and transient failures are retried here with exponential
+    backoff, honouring the server's retry-after.
+    """
+
+    RETRYABLE_ERRORS = (
+        openai.RateLimitError,
+        openai.InternalServerError,
+        openai.APIConnectionError,
+    )
+
+    def __init__(
+        self,
+        api_key: str | None,
+        max_connections: int,
+        rate_limits: dict[str, tuple[int, int]],
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+    ):
+        self.api_key = api_key
+        self.max_connections = max_connections
+        self.rate_limits = rate_limits
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client: AsyncOpenAI | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._limiters: dict[str, RateLimiter] = {}
+        self._stats = {"requests": 0, "retries": 0, "rate_limited": 0, "queued_seconds": 0.0}
+
+    def client(self) -> AsyncOpenAI:
+        """Returns the shared client, creating it (and the rate limiters) for the running loop.
+
+        Returns:
+            AsyncOpenAI: The shared client.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if self._client is None or (loop is not None and self._loop is not loop):
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections,
+                        max_keepalive_connections=self.max_connections,
+                    ),
+                    timeout=httpx.Timeout(600.0, connect=5.0),
+                ),
+            )
+            self._loop = loop
+            self._limiters = {}
+        return self._client
+
+    def limiter(self, model: str) -> RateLimiter | None:
+        """Returns the rate limiter of a model, None if the model has no configured budget."""
+        if model not in self._limiters:
+            if model not in self.rate_limits:
+                return None
+            rpm, tpm = self.rate_limits[model]
+            self._limiters[model] = RateLimiter(rpm=rpm, tpm=tpm)
+        return self._limiters[model]
+
+    async def run(
+        self,
+        model: str,
+        estimated_tokens: int,
+        func: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Runs an OpenAI request within the model's budgets, retrying transient failures.
+
+        Args:
+            model (str): The model of the request.
+            estimated_tokens (int): The estimated tokens (prompt and completion) of the request.
+            func (Callable[[], Awaitable[Any]]): The request.
+
+        Returns:
+            Any: The response.
+        """
+        limiter = self.limiter(model)
+        for attempt in range(self.max_retries + 1):
+            if limiter is not None:
+                self._stats["queued_seconds"] += await limiter.acquire(estimated_tokens)
+            self._stats["requests"] += 1
+            try:
+                response = await func()
+            except self.RETRYABLE_ERRORS as e:
+                if limiter is not None:
+                    # A failed request did not use its tokens
+                    limiter.settle(estimated_tokens, 0)
+                if isinstance(e, openai.RateLimitError):
+                    self._stats["rate_limited"] += 1
+                if attempt == self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                self._stats["retries"] += 1
+                logger.warning(
+                    f"OpenAI request to {model} failed ({type(e).__name__}), "
+                    f"retrying in {delay:.1f}s ({attempt + 1}/{self.max_retries})"
+                )
+                await asyncio.sleep(delay)
+                continue
+
+            if limiter is not None:
+                usage = getattr(response, "usage", None)
+                actual = getattr(usage, "total_tokens", None)
+                if isinstance(actual, int):
+                    limiter.settle(estimated_tokens, actual)
+            return response
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """Returns the delay before the next attempt: the server's retry-after if it sent one,
+        an exponential backoff with jitter otherwise."""
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after_ms = response.headers.get("retry-after-ms")
+            retry_after = response.headers.get("retry-after")
+            try:
+                if retry_after_ms is not None:
+                    return min(float(retry_after_ms) / 1000, self.backoff_max)
+                if retry_after is not None:
+                    return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        delay = min(self.backoff_base * 2**attempt, self.backoff_max)
+        return delay * random.uniform(0.5, 1.0)
+
+    def stats(self) -> dict[str, float]:
+        """Returns the counters of the pool.
+
+        Returns:
+            dict[str, float]: The requests, retries, rate-limited responses and seconds queued.
+        """
+        return dict(self._stats)
+
+    async def aclose(self):
+        """Closes the shared client."""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+openai_pool = OpenAIPool(
+    api_key=settings.OPENAI_API_KEY,
+    max_connections=settings.OPENAI_MAX_CONNECTIONS,
+    rate_limits=settings.OPENAI_RATE_LIMITS,
+    max_retries=settings.OPENAI_MAX_RETRIES,
+    backoff_base=settings.OPENAI_BACKOFF_BASE,
+    backoff_max=settings.OPENAI_BACKOFF_MAX,
+)
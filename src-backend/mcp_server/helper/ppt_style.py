@@ -1,3 +1,4 @@
+from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN
 
 from core.consts import (
@@ -20,7 +21,7 @@ def apply_title_style(title_shape):
         paragraph.font.name = TITLE_FONT_NAME
         paragraph.font.size = TITLE_FONT_SIZE
         paragraph.font.bold = TITLE_BOLD
-        paragraph.font.color.rgb = TITLE_FONT_COLOR
+        paragraph.font.color.rgb = RGBColor.from_string(TITLE_FONT_COLOR)
         paragraph.alignment = PP_ALIGN.LEFT
 
 
@@ -28,4 +29,4 @@ def apply_body_style(paragraph, font_size=None):
     """Apply custom styling to body paragraphs."""
     paragraph.font.name = BODY_FONT_NAME
     paragraph.font.size = font_size or BODY_FONT_SIZE
-    paragraph.font.color.rgb = BODY_FONT_COLOR
+    paragraph.font.color.rgb = RGBColor.from_string(BODY_FONT_COLOR)
@@ -0,0 +1,86 @@
+import hashlib
+import json
+
+from core.consts import CACHE_PATH
+from core.settings import settings
+from mcp_server.helper.memory_cache import MemoryCache
+from mcp_server.helper.sqlite_cache import SQLiteCache
+from mcp_server.helper.tiered_cache import TieredCache
+
+
+def normalize_query(query: str) -> str:
+    """Lowercases the query and collapses its whitespace.
+
+    Args:
+        query (str): The search query.
+
+    Returns:
+        str: The normalized query.
+    """
+    return " ".join(query.lower().split())
+
+
+class SearchCache(TieredCache):
+    """
+    A two-level cache of Tavily search responses: an in-process LRU in front of an on-disk store
+    shared by every process using the same cache file.
+    """
+
+    @staticmethod
+    def make_key(
+        query: str,
+        search_depth: str,
+        max_results: int,
+        chunks_per_source: int,
+        exclude_domains: list[str],
+    ) -> str:
+        """Builds the cache key of a search from its normalized query and parameters.
+
+        Args:
+            query (str): The search query.
+            search_depth (str): The depth of the search.
+            max_results (int): The maximum number of results.
+            chunks_per_source (int): The number of content chunks per result.
+            exclude_domains (list[str]): The blacklisted domains.
+
+        Returns:
+            str: The cache key.
+        """
+        domains_hash = hashlib.sha256(json.dumps(sorted(exclude_domains)).encode()).hexdigest()
+        payload = json.dumps(
+            [normalize_query(query), search_depth, max_results, chunks_per_source, domains_hash]
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def get(self, key: str) -> dict | None:
+        """Returns the cached search response, promoting disk hits to memory.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            dict | None: The cached Tavily response.
+        """
+        return await self._lookup(key)
+
+    async def set(self, key: str, response: dict):
+        """Stores the search response in both levels.
+
+        Args:
+            key (str): The cache key.
+            response (dict): The Tavily response.
+        """
+        await self._store(key, response, response)
+
+
+search_cache = SearchCache(
+    ttl=settings.SEARCH_CACHE_TTL,
+    memory=MemoryCache(max_entries=settings.SEARCH_CACHE_MEMORY_MAX_ENTRIES),
+    store=SQLiteCache(
+        settings.SEARCH_CACHE_PATH or CACHE_PATH / "search.sqlite3",
+        max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+        table="search",
+    )
+    if settings.SEARCH_CACHE_ENABLED
+    else None,
+)
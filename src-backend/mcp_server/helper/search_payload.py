@@ -0,0 +1,93 @@
+import json
+import re
+
+CHUNK_SEPARATOR = " [...] "
+NEAR_DUPLICATE_THRESHOLD = 0.8
+MIN_TRUNCATED_TOKENS = 50
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimates the number of LLM tokens of a text (~4 characters per token).
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: The estimated number of tokens.
+    """
+    return (len(text) + 3) // 4
+
+
+def dumps_compact(payload) -> str:
+    """Serializes the payload to JSON without indentation or spaces."""
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False)
+
+
+def _shingles(text: str) -> set[tuple[str, ...]]:
+    """Returns the word 3-grams of a text, used to detect near-duplicate chunks."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i : i + 3]) for i in range(len(words) - 2)}
+
+
+def _is_near_duplicate(shingles: set, kept: list[set]) -> bool:
+    """Checks whether the chunk's shingles overlap any kept chunk above the threshold (Jaccard)."""
+    for other in kept:
+        union = len(shingles | other)
+        if union and len(shingles & other) / union >= NEAR_DUPLICATE_THRESHOLD:
+            return True
+    return False
+
+
+def compact_results(results: list[dict], token_budget: int) -> list[dict]:
+    """Reduces ranked search results to what the researcher uses: the content and the URL.
+    Content chunks that are exact or near duplicates of an earlier chunk are dropped and the
+    output stops growing once `token_budget` is reached, so the best-ranked results are kept.
+
+    Args:
+        results (list[dict]): The ranked search results, each including 'content' and 'url'.
+        token_budget (int): The maximum number of estimated tokens of the serialized output.
+
+    Returns:
+        list[dict]: The compact results, as [{'url': '...', 'content': '...'}].
+    """
+    compact = []
+    seen_chunks: set[str] = set()
+    kept_shingles: list[set] = []
+    remaining = token_budget
+
+    for result in results:
+        url = result.get("url", "")
+        available = remaining - estimate_tokens(dumps_compact({"url": url, "content": ""}))
+
+        chunks = []
+        for chunk in (c.strip() for c in (result.get("content") or "").split("[...]")):
+            normalized = " ".join(chunk.lower().split())
+            if not normalized or normalized in seen_chunks:
+                continue
+            shingles = _shingles(normalized)
+            if _is_near_duplicate(shingles, kept_shingles):
+                continue
+
+            tokens = estimate_tokens(chunk) + estimate_tokens(CHUNK_SEPARATOR)
+            if tokens > available:
+                if available >= MIN_TRUNCATED_TOKENS:
+                    chunks.append(chunk[: available * 4].rstrip() + "...")
+                available = 0
+                break
+
+            seen_chunks.add(normalized)
+            kept_shingles.append(shingles)
+            chunks.append(chunk)
+            available -= tokens
+
+        if chunks:
+            compact.append({"url": url, "content": CHUNK_SEPARATOR.join(chunks)})
+            remaining = available
+        if remaining <= 0 or available <= 0:
+            break
+
+    return compact
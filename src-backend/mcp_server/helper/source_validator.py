@@ -1,14 +1,45 @@
+import asyncio
 from urllib.parse import urlparse, urlunparse
 
-import requests
-from bs4 import BeautifulSoup
+import httpx
+
+from core.consts import CACHE_PATH, HIGH_QUALITY_TIERS
+from core.logger_config import logger
+from core.settings import settings
+from mcp_server.helper.coalescer import RequestCoalescer
+from mcp_server.helper.metadata_scanner import REF_KEYWORDS, MetadataScanner
+from mcp_server.helper.sqlite_cache import SQLiteCache
+from mcp_server.helper.url_registry import URLRegistry
 
 
 class SourceValidator:
-    def __init__(self):
+    def __init__(
+        self,
+        max_concurrency: int | None = None,
+        per_host_concurrency: int | None = None,
+        transport: httpx.AsyncBaseTransport | None = None,
+        cache: SQLiteCache | None = None,
+        streaming_fetch: bool | None = None,
+        max_fetch_bytes: int | None = None,
+    ):
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         }
+        self.timeout = settings.VALIDATION_TIMEOUT
+        self.max_concurrency = max_concurrency or settings.VALIDATION_MAX_CONCURRENCY
+        self.per_host_concurrency = per_host_concurrency or settings.VALIDATION_PER_HOST_CONCURRENCY
+        self._transport = transport
+        self.cache = cache
+        self.streaming_fetch = (
+            settings.VALIDATION_STREAMING_FETCH if streaming_fetch is None else streaming_fetch
+        )
+        self.max_fetch_bytes = max_fetch_bytes or settings.VALIDATION_MAX_FETCH_BYTES
+        self.registry = URLRegistry(max_runs=settings.URL_REGISTRY_MAX_RUNS)
+        self.coalescer = RequestCoalescer(max_in_flight=settings.COALESCER_MAX_IN_FLIGHT)
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._global_limit: asyncio.Semaphore | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
 
     def normalize_url(self, url: str) -> str:
         """Removes query parameters (UTM, etc.) and fragments from the URL.
@@ -49,68 +80,121 @@ class SourceValidator:
             meta["date"] = date_tag.get("content") or date_tag.get_text()
 
         headers = html_soup.find_all(["h1", "h2", "h3", "h4"])
-        ref_keywords = ["references", "bibliography", "works cited", "sources"]
         for h in headers:
-            if any(k in h.get_text().lower() for k in ref_keywords):
+            if any(k in h.get_text().lower() for k in REF_KEYWORDS):
                 meta["has_references"] = True
                 break
 
         return meta
 
-    def validate_url(self, url: str, tavily_confidence: float) -> dict:
-        """Performs the full health check and scoring.
-        Calculates a Hybrid Score with tavily confidence as the base points.
+    def _parse_metadata(self, content: bytes) -> dict:
+        """Parses the raw page content and extracts its metadata."""
+        from bs4 import BeautifulSoup
+
+        return self.get_metadata(BeautifulSoup(content, "html.parser"))
+
+    def _build_result(
+        self, clean_url: str, status: str, details: dict, tavily_confidence: float
+    ) -> dict:
+        """Calculates a Hybrid Score with tavily confidence as the base points and assigns the tier.
+
         Args:
-            url (str): The URL to validate.
+            clean_url (str): The normalized URL.
+            status (str): The health check status ("live" or "dead").
+            details (dict): The page metadata, or an "error" entry if the check failed.
+            tavily_confidence (float): The Tavily relevance score of the result.
 
         Returns:
             dict: The validation result.
         """
-        clean_url = self.normalize_url(url)
-        base_points = tavily_confidence * 100
-        result = {"url": clean_url, "status": "dead", "score": 0, "tier": "C", "details": {}}
+        result = {"url": clean_url, "status": status, "score": 0, "tier": "C", "details": details}
+        if status != "live" or "error" in details:
+            return result
 
-        result = {"url": clean_url, "status": "dead", "score": 0, "tier": "C", "details": {}}
+        # 2. Score Calculation
+        final_score = tavily_confidence * 100
 
-        try:
-            # 1. Health Check
-            response = requests.get(clean_url, headers=self.headers, timeout=5)
-            if response.status_code != 200:
-                result["details"]["error"] = f"Status {response.status_code}"
-                return result
+        if details["author"]:
+            final_score += 10
+        if details["date"]:
+            final_score += 5
 
-            result["status"] = "live"
-            soup = BeautifulSoup(response.content, "html.parser")
-            meta = self.get_metadata(soup)
-            result["details"] = meta
+        # Bonuses for Domain Authority
+        domain = urlparse(clean_url).netloc
+        if domain.endswith((".edu", ".gov")):
+            final_score += 15
 
-            # 2. Score Calculation
-            final_score = base_points
+        result["score"] = min(round(final_score, 2), 100)
 
-            if meta["author"]:
-                final_score += 10
-            if meta["date"]:
-                final_score += 5
+        # 3. Tier Assignment
+        if result["score"] >= 80:
+            result["tier"] = "S"
+        elif result["score"] >= 60:
+            result["tier"] = "A"
+        else:
+            result["tier"] = "B"
 
-            # Bonuses for Domain Authority
-            domain = urlparse(clean_url).netloc
-            if domain.endswith((".edu", ".gov")):
-                final_score += 15
+        return result
+
+    def _check_url(self, clean_url: str) -> tuple[str, dict]:
+        """Runs the blocking health check and metadata extraction for a normalized URL.
+
+        Args:
+            clean_url (str): The normalized URL.
 
-            result["score"] = min(round(final_score, 2), 100)
+        Returns:
+            tuple[str, dict]: The status and the details of the check.
+        """
+        import requests
 
-            # 3. Tier Assignment
-            if result["score"] >= 80:
-                result["tier"] = "S"
-            elif result["score"] >= 60:
-                result["tier"] = "A"
-            else:
-                result["tier"] = "B"
+        # 1. Health Check
+        try:
+            response = requests.get(clean_url, headers=self.headers, timeout=self.timeout)
+            if response.status_code != 200:
+                return "dead", {"error": f"Status {response.status_code}"}
+        except Exception as e:
+            return "dead", {"error": str(e)}
 
+        try:
+            return "live", self._parse_metadata(response.content)
         except Exception as e:
-            result["details"]["error"] = str(e)
+            return "live", {"error": str(e)}
 
-        return result
+    def _cache_get(self, clean_url: str) -> tuple[str, dict] | None:
+        """Returns the cached status and details of a normalized URL, if any."""
+        if self.cache is None:
+            return None
+        entry = self.cache.get(clean_url)
+        if entry is None:
+            return None
+        return entry["status"], entry["details"]
+
+    def _cache_set(self, clean_url: str, status: str, details: dict):
+        """Stores the status and details of a normalized URL, with a shorter TTL for failed checks."""
+        if self.cache is None:
+            return
+        is_live = status == "live" and "error" not in details
+        ttl = settings.VALIDATION_CACHE_LIVE_TTL if is_live else settings.VALIDATION_CACHE_DEAD_TTL
+        self.cache.set(clean_url, {"status": status, "details": details}, ttl=ttl)
+
+    def validate_url(self, url: str, tavily_confidence: float) -> dict:
+        """Performs the full health check and scoring.
+        Calculates a Hybrid Score with tavily confidence as the base points.
+        Cached checks skip the network, the score is always computed with the given confidence.
+        Args:
+            url (str): The URL to validate.
+
+        Returns:
+            dict: The validation result.
+        """
+        clean_url = self.normalize_url(url)
+        cached = self._cache_get(clean_url)
+        if cached is None:
+            status, details = self._check_url(clean_url)
+            self._cache_set(clean_url, status, details)
+        else:
+            status, details = cached
+        return self._build_result(clean_url, status, details, tavily_confidence)
 
     def rank_sources(self, raw_results: list[dict]) -> list[dict]:
         """
@@ -129,5 +213,243 @@ class SourceValidator:
         # Sort by Final Score (High to Low)
         return sorted(ranked_results, key=lambda x: x["validation"]["score"], reverse=True)
 
+    async def _get_client(self) -> httpx.AsyncClient:
+        """Returns the pooled async HTTP client, creating it (and the concurrency limits) for the running loop.
+        The client of a previous loop is closed, so its connections are not leaked.
+
+        Returns:
+            httpx.AsyncClient: The pooled client.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            stale = self._client
+            self._client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+                transport=self._transport,
+            )
+            self._loop = loop
+            self._global_limit = asyncio.Semaphore(self.max_concurrency)
+            self._host_limits = {}
+            if stale is not None:
+                try:
+                    await stale.aclose()
+                except Exception as e:
+                    logger.warning(f"Could not close the HTTP client of a previous loop: {e}")
+        return self._client
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        """Returns the per-host semaphore, creating it on first use."""
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    async def _acheck_url(self, clean_url: str) -> tuple[str, dict]:
+        """Async counterpart of `_check_url`, bounded by the global and per-host concurrency limits.
+
+        Args:
+            clean_url (str): The normalized URL.
+
+        Returns:
+            tuple[str, dict]: The status and the details of the check.
+        """
+        client = await self._get_client()
+        async with self._host_limit(urlparse(clean_url).netloc), self._global_limit:
+            if self.streaming_fetch:
+                return await self._astream_check(client, clean_url)
+            try:
+                response = await client.get(clean_url)
+                if response.status_code != 200:
+                    return "dead", {"error": f"Status {response.status_code}"}
+            except Exception as e:
+                return "dead", {"error": str(e)}
+
+        try:
+            # Parsing is CPU-bound, keep it off the event loop
+            return "live", await asyncio.to_thread(self._parse_metadata, response.content)
+        except Exception as e:
+            return "live", {"error": str(e)}
+
+    async def _astream_check(self, client: httpx.AsyncClient, clean_url: str) -> tuple[str, dict]:
+        """Streams the page through a `MetadataScanner`, stopping once every signal is found or
+        `max_fetch_bytes` have been downloaded, so large pages are never fully read.
+
+        Args:
+            client (httpx.AsyncClient): The pooled client.
+            clean_url (str): The normalized URL.
+
+        Returns:
+            tuple[str, dict]: The status and the details of the check.
+        """
+        scanner = MetadataScanner()
+        try:
+            async with client.stream("GET", clean_url) as response:
+                if response.status_code != 200:
+                    return "dead", {"error": f"Status {response.status_code}"}
+                async for chunk in response.aiter_text():
+                    scanner.feed(chunk)
+                    if scanner.done or response.num_bytes_downloaded >= self.max_fetch_bytes:
+                        break
+        except Exception as e:
+            return "dead", {"error": str(e)}
+
+        try:
+            return "live", scanner.metadata()
+        except Exception as e:
+            return "live", {"error": str(e)}
+
+    async def _acheck_cached(self, clean_url: str) -> tuple[str, dict]:
+        """Returns the cached check of a normalized URL, running and caching it on a miss."""
+        cached = await asyncio.to_thread(self._cache_get, clean_url)
+        if cached is not None:
+            return cached
+        status, details = await self._acheck_url(clean_url)
+        await asyncio.to_thread(self._cache_set, clean_url, status, details)
+        return status, details
+
+    async def _acheck_shared(self, clean_url: str) -> tuple[str, dict]:
+        """Runs `_acheck_cached`, sharing the in-flight check with any concurrent caller of the process."""
+        return await self.coalescer.run(clean_url, lambda: self._acheck_cached(clean_url))
+
+    async def avalidate_url(
+        self, url: str, tavily_confidence: float, run_id: str | None = None
+    ) -> dict:
+        """Async version of `validate_url` using the pooled HTTP client.
+        With a `run_id`, each normalized URL is checked at most once per workflow run.
+
+        Args:
+            url (str): The URL to validate.
+            tavily_confidence (float): The Tavily relevance score of the result.
+            run_id (str | None): The workflow run identifier.
+
+        Returns:
+            dict: The validation result.
+        """
+        clean_url = self.normalize_url(url)
+        if run_id is None:
+            status, details = await self._acheck_shared(clean_url)
+        else:
+            status, details = await self.registry.check(
+                run_id, clean_url, lambda: self._acheck_shared(clean_url)
+            )
+        return self._build_result(clean_url, status, details, tavily_confidence)
+
+    async def arank_sources(
+        self,
+        raw_results: list[dict],
+        top_k: int | None = None,
+        time_budget: float | None = None,
+        run_id: str | None = None,
+    ) -> list[dict]:
+        """Validates all the results concurrently and ranks them exactly like `rank_sources`.
+        With a `top_k` or a `time_budget` the ranking is budgeted, see `_arank_budgeted`.
+
+        Args:
+            raw_results (list[dict]): The search results, each including {'url': '...', 'score': 0.81, ...}.
+            top_k (int | None): Stop once this many Tier S/A results are found.
+            time_budget (float | None): Stop once this many seconds have passed.
+            run_id (str | None): The workflow run identifier, used to deduplicate URLs across queries.
+
+        Returns:
+            list[dict]: The results with their validation, sorted by final score (high to low).
+        """
+        if top_k or time_budget:
+            return await self._arank_budgeted(raw_results, top_k, time_budget, run_id)
+
+        validations = await asyncio.gather(
+            *(
+                self.avalidate_url(
+                    item.get("url", ""), tavily_confidence=item.get("score", 0.5), run_id=run_id
+                )
+                for item in raw_results
+            )
+        )
+        ranked_results = [
+            {**item, "validation": validation}
+            for item, validation in zip(raw_results, validations, strict=True)
+        ]
+        return sorted(ranked_results, key=lambda x: x["validation"]["score"], reverse=True)
+
+    async def _arank_budgeted(
+        self,
+        raw_results: list[dict],
+        top_k: int | None,
+        time_budget: float | None,
+        run_id: str | None = None,
+    ) -> list[dict]:
+        """Validates the results in order of Tavily score and returns the best ones found so far
+        as soon as `top_k` Tier S/A results are validated or the `time_budget` expires.
+        Results still being validated at that point are cancelled and left out.
+
+        Args:
+            raw_results (list[dict]): The search results, each including {'url': '...', 'score': 0.81, ...}.
+            top_k (int | None): The number of Tier S/A results to stop at.
+            time_budget (float | None): The deadline, in seconds.
+            run_id (str | None): The workflow run identifier.
+
+        Returns:
+            list[dict]: The validated results, sorted by final score (high to low).
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + time_budget if time_budget else None
+
+        # Tasks are started by descending Tavily score, so the concurrency limits admit the
+        # most promising candidates first
+        candidates = sorted(
+            enumerate(raw_results), key=lambda x: x[1].get("score", 0.5), reverse=True
+        )
+        tasks = {
+            asyncio.create_task(
+                self.avalidate_url(
+                    item.get("url", ""), tavily_confidence=item.get("score", 0.5), run_id=run_id
+                )
+            ): (index, item)
+            for index, item in candidates
+        }
+
+        validated = []
+        high_quality = 0
+        pending = set(tasks)
+        try:
+            while pending and not (top_k and high_quality >= top_k):
+                timeout = None if deadline is None else max(deadline - loop.time(), 0)
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    break
+                for task in done:
+                    index, item = tasks[task]
+                    validation = task.result()
+                    validated.append((index, {**item, "validation": validation}))
+                    if validation["tier"] in HIGH_QUALITY_TIERS:
+                        high_quality += 1
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        ranked_results = [item for _, item in sorted(validated, key=lambda x: x[0])]
+        return sorted(ranked_results, key=lambda x: x["validation"]["score"], reverse=True)
+
+    async def aclose(self):
+        """Closes the pooled HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
 
-source_validator = SourceValidator()
+source_validator = SourceValidator(
+    cache=SQLiteCache(
+        settings.VALIDATION_CACHE_PATH or CACHE_PATH / "source_validation.sqlite3",
+        max_entries=settings.VALIDATION_CACHE_MAX_ENTRIES,
+        table="source_validation",
+    )
+    if settings.VALIDATION_CACHE_ENABLED
+    else None
+)
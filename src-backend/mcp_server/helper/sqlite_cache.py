@@ -0,0 +1,177 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from core.logger_config import logger
+
+
+class SQLiteCache:
+    """
+    A persistent key/value store backed by SQLite, with a TTL per entry and a least-recently-used
+    eviction once the store grows past `max_entries`. Values must be JSON serializable.
+    Expired and extra entries are evicted by the writes at most once every `evict_interval`
+    seconds, so the store can briefly grow past its bound. The `a`-prefixed methods run the
+    blocking calls in a worker thread, for callers on an event loop.
+
+    The file is shared by every process of the app, and reads also write (the access time), so
+    a store locked past `timeout` seconds or corrupt is possible: being only an optimisation, the
+    cache logs the error and treats it as a miss or a skipped write.
+    """
+
+    def __init__(
+        self,
+        path: Path | str,
+        max_entries: int,
+        table: str = "cache",
+        evict_interval: float = 60.0,
+        timeout: float = 5.0,
+    ):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.table = table
+        self.evict_interval = evict_interval
+        self._lock = threading.Lock()
+        self._evicted_at = float("-inf")
+
+        self.timeout = timeout
+        self._connection: sqlite3.Connection | None = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The connection, opened with the table on first use (always under the lock), so
+        creating a cache neither touches the disk nor slows down an import."""
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, check_same_thread=False)
+            try:
+                with conn:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute(
+                        f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                        "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                        "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+                    )
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{self.table}_accessed_at "
+                        f"ON {self.table} (accessed_at)"
+                    )
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{self.table}_expires_at "
+                        f"ON {self.table} (expires_at)"
+                    )
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._connection = conn
+        return self._connection
+
+    def get(self, key: str) -> Any | None:
+        """Returns the value stored under the key, or None if it is missing or expired.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            Any | None: The cached value.
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry is not None else None
+
+    def get_entry(self, key: str) -> tuple[Any, float] | None:
+        """Returns the value stored under the key with its expiry time, or None if it is missing
+        or expired.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            tuple[Any, float] | None: The cached value and its `expires_at` timestamp.
+        """
+        try:
+            return self._get_entry(key)
+        except sqlite3.Error as e:
+            logger.warning(
+                f"SQLite cache '{self.table}' read failed, treated as a miss - error: {e}"
+            )
+            return None
+
+    def _get_entry(self, key: str) -> tuple[Any, float] | None:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return None
+            self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0]), row[1]
+
+    def set(self, key: str, value: Any, ttl: float):
+        """Stores the value under the key for `ttl` seconds, evicting entries if it is time to.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The JSON serializable value.
+            ttl (float): The time to live of the entry, in seconds.
+        """
+        try:
+            self._set(key, value, ttl)
+        except sqlite3.Error as e:
+            logger.warning(f"SQLite cache '{self.table}' write failed, skipped - error: {e}")
+
+    def _set(self, key: str, value: Any, ttl: float):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            if now - self._evicted_at >= self.evict_interval:
+                self._evict(now)
+
+    def evict(self):
+        """Removes the expired entries and the least recently used ones over the size bound."""
+        with self._lock, self._conn:
+            self._evict(time.time())
+
+    def _evict(self, now: float):
+        """Runs the eviction inside the caller's transaction."""
+        self._evicted_at = now
+        self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+        (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                f"DELETE FROM {self.table} WHERE key IN ("
+                f"SELECT key FROM {self.table} ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    async def aget(self, key: str) -> Any | None:
+        """Runs `get` in a worker thread."""
+        return await asyncio.to_thread(self.get, key)
+
+    async def aget_entry(self, key: str) -> tuple[Any, float] | None:
+        """Runs `get_entry` in a worker thread."""
+        return await asyncio.to_thread(self.get_entry, key)
+
+    async def aset(self, key: str, value: Any, ttl: float):
+        """Runs `set` in a worker thread."""
+        await asyncio.to_thread(self.set, key, value, ttl)
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self.table}")
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return count
@@ -0,0 +1,78 @@
+import time
+from collections.abc import Callable
+from typing import Any
+
+from core.logger_config import logger
+from mcp_server.helper.memory_cache import MemoryCache
+from mcp_server.helper.sqlite_cache import SQLiteCache
+
+
+class TieredCache:
+    """
+    An in-process LRU in front of an optional on-disk store shared by every process using the
+    same cache file. Disk hits are promoted to memory for the rest of their TTL only, so an entry
+    never outlives `ttl` from its write. The store is read and written in a worker thread, off
+    the event loop, and only speeds things up: a failing read, or a stored payload `load`
+    rejects, is a miss and a failing write is skipped.
+    """
+
+    def __init__(self, ttl: float, memory: MemoryCache, store: SQLiteCache | None = None):
+        self.ttl = ttl
+        self.memory = memory
+        self.store = store
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    async def _lookup(self, key: str, load: Callable[[Any], Any] | None = None) -> Any | None:
+        """Returns the value cached under the key, promoting disk hits to memory.
+
+        Args:
+            key (str): The cache key.
+            load (Callable[[Any], Any] | None): Turns the stored JSON into the memory value.
+
+        Returns:
+            Any | None: The cached value, as kept in memory.
+        """
+        value = self.memory.get(key)
+        if value is not None:
+            self._stats["memory_hits"] += 1
+            return value
+
+        value = None
+        if self.store is not None:
+            try:
+                entry = await self.store.aget_entry(key)
+                if entry is not None:
+                    payload, expires_at = entry
+                    value = load(payload) if load is not None else payload
+            except Exception as e:
+                logger.warning(f"Cache store read failed, treated as a miss - error: {e}")
+        if value is None:
+            self._stats["misses"] += 1
+            return None
+
+        self._stats["disk_hits"] += 1
+        self.memory.set(key, value, ttl=expires_at - time.time())
+        return value
+
+    async def _store(self, key: str, value: Any, payload: Any):
+        """Stores the value in memory and its JSON serializable payload on disk.
+
+        Args:
+            key (str): The cache key.
+            value (Any): The value kept in memory.
+            payload (Any): The JSON serializable value kept on disk.
+        """
+        self.memory.set(key, value, ttl=self.ttl)
+        if self.store is not None:
+            try:
+                await self.store.aset(key, payload, ttl=self.ttl)
+            except Exception as e:
+                logger.warning(f"Cache store write failed, skipped - error: {e}")
+
+    def stats(self) -> dict[str, int]:
+        """Returns the hit and miss counters of the cache.
+
+        Returns:
+            dict[str, int]: The counters.
+        """
+        return dict(self._stats)
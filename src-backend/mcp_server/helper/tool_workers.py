@@ -0,0 +1,69 @@
+import asyncio
+import functools
+import multiprocessing
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from core.logger_config import logger
+from core.settings import settings
+
+
+class ToolWorkers:
+    """
+    Runs the CPU-bound tools (charts, PPTX) off the event loop, so a server keeps serving the
+    other sessions' searches while it renders. With `processes` > 0 they run in a pool of
+    worker processes, rendering in parallel; otherwise in a single thread, one at a time, as
+    pyplot keeps global state.
+    """
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor: Executor | None = None
+
+    def executor(self) -> Executor:
+        """Returns the executor, creating it on first use."""
+        if self._executor is None:
+            if self.processes > 0:
+                # Spawned, not forked: the server process runs an event loop and threads
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+                )
+                logger.info(f"Tool workers: {self.processes} processes")
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mcp-tool")
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs a function in the workers. With processes, the function and its arguments
+        must be picklable (a module-level function).
+
+        Args:
+            func (Callable[..., Any]): The function.
+            *args (Any): The arguments of the function.
+
+        Returns:
+            Any: The result of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor(), functools.partial(func, *args))
+
+    def warm_up(self, func: Callable[[], Any]):
+        """Starts the worker processes in the background, each running `func` once, so the
+        first tool calls do not wait for them to spawn and import the tools' dependencies.
+
+        Args:
+            func (Callable[[], Any]): A module-level function importing what the tools need.
+        """
+        if self.processes > 0:
+            for _ in range(self.processes):
+                self.executor().submit(func)
+
+    def shutdown(self):
+        """Stops the workers."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+
+tool_workers = ToolWorkers(processes=settings.MCP_TOOL_PROCESSES)
@@ -0,0 +1,88 @@
+import asyncio
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class URLRegistry:
+    """
+    Remembers the URL checks of each workflow run so every normalized URL is checked at most
+    once per run. Concurrent callers for the same URL share the single in-flight check
+    (singleflight) and later callers reuse its result. Only the most recent `max_runs` runs
+    are kept in memory.
+    """
+
+    def __init__(self, max_runs: int):
+        self.max_runs = max_runs
+        self._runs: OrderedDict[str, dict[str, asyncio.Task]] = OrderedDict()
+        self._stats: dict[str, dict[str, int]] = {}
+
+    def _run(self, run_id: str) -> dict[str, asyncio.Task]:
+        """Returns the checks of a run, registering it and dropping the oldest runs if needed."""
+        if run_id in self._runs:
+            self._runs.move_to_end(run_id)
+        else:
+            self._runs[run_id] = {}
+            self._stats[run_id] = {"fetched": 0, "reused": 0, "joined_in_flight": 0}
+            while len(self._runs) > self.max_runs:
+                oldest, _ = self._runs.popitem(last=False)
+                self._stats.pop(oldest, None)
+        return self._runs[run_id]
+
+    async def check(self, run_id: str, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Returns the result of `func` for the key, running it only once per run.
+
+        The check runs in its own task, so a caller being cancelled (e.g. by a ranking budget)
+        does not cancel it for the other callers waiting on it.
+
+        Args:
+            run_id (str): The workflow run identifier.
+            key (str): The normalized URL.
+            func (Callable[[], Awaitable[Any]]): The check to run.
+
+        Returns:
+            Any: The result of the check.
+        """
+        checks = self._run(run_id)
+        stats = self._stats[run_id]
+        task = checks.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            task.add_done_callback(lambda t: self._forget_failed(run_id, key, t))
+            checks[key] = task
+            stats["fetched"] += 1
+        elif task.done():
+            stats["reused"] += 1
+        else:
+            stats["joined_in_flight"] += 1
+
+        return await asyncio.shield(task)
+
+    def _forget_failed(self, run_id: str, key: str, task: asyncio.Task):
+        """Drops failed checks so a later call can retry them."""
+        if task.cancelled() or task.exception() is not None:
+            checks = self._runs.get(run_id)
+            if checks is not None and checks.get(key) is task:
+                del checks[key]
+
+    def stats(self, run_id: str) -> dict[str, int]:
+        """Returns the counters of a run, "saved" being the number of fetches avoided.
+
+        Args:
+            run_id (str): The workflow run identifier.
+
+        Returns:
+            dict[str, int]: The counters of the run.
+        """
+        stats = self._stats.get(run_id, {"fetched": 0, "reused": 0, "joined_in_flight": 0})
+        return {**stats, "saved": stats["reused"] + stats["joined_in_flight"]}
+
+    def release(self, run_id: str):
+        """Forgets the checks of a finished run.
+
+        Args:
+            run_id (str): The workflow run identifier.
+        """
+        self._runs.pop(run_id, None)
+        self._stats.pop(run_id, None)
@@ -0,0 +1,205 @@
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Literal
+
+from core.consts import FILE_PATH
+from core.settings import settings
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class JobQueue:
+    """
+    A persistent queue of presentation jobs backed by SQLite, shared by the API, which only
+    enqueues, and the worker processes, which claim the jobs one at a time. A job is "queued",
+    "running", "done" or "failed". Running jobs are heartbeated by their worker: a job whose
+    worker stopped heartbeating (crashed, killed, or the host restarted) is queued again, up to
+    `max_attempts` runs, then failed.
+    """
+
+    def __init__(self, path: Path | str, max_attempts: int, stale_after: float):
+        self.path = Path(path)
+        self.max_attempts = max_attempts
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "id TEXT PRIMARY KEY, payload TEXT NOT NULL, status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, worker TEXT, error TEXT, "
+                "created_at REAL NOT NULL, started_at REAL, finished_at REAL, heartbeat_at REAL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs (status, created_at)"
+            )
+
+    def enqueue(self, job_id: str, payload: dict[str, Any]):
+        """Adds a job at the end of the queue.
+
+        Args:
+            job_id (str): The job identifier, the presentation ID.
+            payload (dict[str, Any]): The JSON serializable arguments of the job.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, payload, status, created_at) VALUES (?, ?, 'queued', ?)",
+                (job_id, json.dumps(payload), time.time()),
+            )
+
+    def claim(self, worker: str) -> dict[str, Any] | None:
+        """Marks the oldest queued job as running for the worker, after queueing again the jobs
+        of workers that stopped heartbeating.
+
+        Args:
+            worker (str): The identifier of the claiming worker.
+
+        Returns:
+            dict[str, Any] | None: The claimed job, or None if the queue is empty.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._requeue(
+                "status = 'running' AND heartbeat_at < ?",
+                (now - self.stale_after,),
+                "The worker stopped responding",
+            )
+            row = self._conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, "
+                "error = NULL, started_at = ?, heartbeat_at = ? WHERE id = ("
+                "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                ") RETURNING *",
+                (worker, now, now),
+            ).fetchone()
+        return _job(row) if row is not None else None
+
+    def heartbeat(self, worker: str, job_ids: list[str]):
+        """Records that the running jobs are still alive.
+
+        Args:
+            worker (str): The identifier of the worker running the jobs.
+            job_ids (list[str]): The jobs running in the worker.
+        """
+        if not job_ids:
+            return
+        placeholders = ", ".join("?" * len(job_ids))
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"UPDATE jobs SET heartbeat_at = ? WHERE status = 'running' AND worker = ? "
+                f"AND id IN ({placeholders})",
+                (time.time(), worker, *job_ids),
+            )
+
+    def finish(
+        self,
+        job_id: str,
+        worker: str,
+        status: Literal["done", "failed"],
+        error: str | None = None,
+    ) -> bool:
+        """Records the end of a running job, if the worker still owns it: a job queued again
+        because its worker stopped heartbeating may be running in another worker by now.
+
+        Args:
+            job_id (str): The job identifier.
+            worker (str): The identifier of the worker that ran the job.
+            status (Literal["done", "failed"]): Whether the job succeeded.
+            error (str | None): The error of a failed job.
+
+        Returns:
+            bool: Whether the job was updated.
+        """
+        with self._lock, self._conn:
+            return (
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished_at = ? "
+                    "WHERE id = ? AND status = 'running' AND worker = ?",
+                    (status, error, time.time(), job_id, worker),
+                ).rowcount
+                > 0
+            )
+
+    def release(self, job_id: str, worker: str):
+        """Queues a running job again without counting its interrupted run, for a worker that
+        shuts down before the job is done.
+
+        Args:
+            job_id (str): The job identifier.
+            worker (str): The identifier of the worker that ran the job.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = 'queued', attempts = MAX(attempts - 1, 0), "
+                "worker = NULL, started_at = NULL, heartbeat_at = NULL "
+                "WHERE id = ? AND status = 'running' AND worker = ?",
+                (job_id, worker),
+            )
+
+    def requeue_worker(self, worker: str) -> int:
+        """Queues again the running jobs of a worker that died.
+
+        Args:
+            worker (str): The identifier of the worker.
+
+        Returns:
+            int: The number of jobs queued again or failed.
+        """
+        with self._lock, self._conn:
+            return self._requeue(
+                "status = 'running' AND worker = ?", (worker,), "The worker process died"
+            )
+
+    def _requeue(self, where: str, params: tuple, error: str) -> int:
+        """Queues again the running jobs matching `where`, failing the ones that used up their
+        attempts. Runs inside the caller's transaction."""
+        failed = self._conn.execute(
+            f"UPDATE jobs SET status = 'failed', error = ?, finished_at = ? "
+            f"WHERE {where} AND attempts >= ?",
+            (f"{error} {self.max_attempts} times", time.time(), *params, self.max_attempts),
+        ).rowcount
+        queued = self._conn.execute(
+            f"UPDATE jobs SET status = 'queued', error = ?, worker = NULL, started_at = NULL, "
+            f"heartbeat_at = NULL WHERE {where}",
+            (error, *params),
+        ).rowcount
+        return failed + queued
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        """Returns a job, or None if it does not exist.
+
+        Args:
+            job_id (str): The job identifier.
+
+        Returns:
+            dict[str, Any] | None: The job.
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _job(row) if row is not None else None
+
+    def counts(self) -> dict[JobStatus, int]:
+        """Returns the number of jobs in every status."""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status")
+            counts = dict(rows.fetchall())
+        return {status: counts.get(status, 0) for status in ("queued", "running", "done", "failed")}
+
+
+def _job(row: sqlite3.Row) -> dict[str, Any]:
+    job = dict(row)
+    job["payload"] = json.loads(job["payload"])
+    return job
+
+
+job_queue = JobQueue(
+    settings.JOB_QUEUE_PATH or FILE_PATH / "jobs.sqlite3",
+    max_attempts=settings.JOB_MAX_ATTEMPTS,
+    stale_after=settings.JOB_STALE_AFTER,
+)
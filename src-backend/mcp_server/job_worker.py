@@ -0,0 +1,294 @@
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from multiprocessing.process import BaseProcess
+from typing import Any, Literal
+
+from core.logger_config import logger
+from core.settings import settings
+from mcp_server.job_queue import JobQueue, job_queue
+
+
+class JobWorker:
+    """
+    Claims the jobs of the queue and runs them in this process, up to `concurrency` at a time.
+    After `stop()` it claims no new job and lets the running ones finish for `shutdown_timeout`
+    seconds, then cancels the others and queues them again for the next worker.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        worker_id: str,
+        run_job: Callable[[dict[str, Any]], Awaitable[Any]],
+        concurrency: int,
+        poll_interval: float,
+        heartbeat_interval: float,
+        shutdown_timeout: float,
+    ):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.run_job = run_job
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.heartbeat_interval = heartbeat_interval
+        self.shutdown_timeout = shutdown_timeout
+        self._running: dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+        self._wake = asyncio.Event()
+
+    def stop(self):
+        """Asks the worker to shut down."""
+        self._stopping.set()
+        self._wake.set()
+
+    async def run(self):
+        """Claims and runs jobs until `stop()` is called, then drains the running ones."""
+        logger.info(f"Job worker {self.worker_id} started ({self.concurrency} jobs at a time)")
+        heartbeat = asyncio.create_task(self._heartbeat())
+        try:
+            while not self._stopping.is_set():
+                if len(self._running) < self.concurrency:
+                    job = await asyncio.to_thread(self.queue.claim, self.worker_id)
+                    if job is not None:
+                        self._running[job["id"]] = asyncio.create_task(self._execute(job))
+                        continue
+                # Sleep until a job finishes, the worker is stopped, or it is time to poll
+                self._wake.clear()
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+        finally:
+            await self._drain()
+            heartbeat.cancel()
+            logger.info(f"Job worker {self.worker_id} stopped")
+
+    async def _execute(self, job: dict[str, Any]):
+        job_id = job["id"]
+        logger.info(f"Job {job_id} started by {self.worker_id} (attempt {job['attempts']})")
+        start = time.perf_counter()
+        try:
+            await self.run_job(job)
+        except asyncio.CancelledError:
+            # The job is cancelled whether or not it could be queued again
+            try:
+                await asyncio.to_thread(self.queue.release, job_id, self.worker_id)
+                logger.warning(f"Job {job_id} interrupted by the worker shutdown, queued again")
+            except Exception as e:
+                logger.error(f"Job {job_id} interrupted, could not be queued again - error: {e}")
+            raise
+        except Exception as e:
+            await self._finish(job_id, "failed", str(e))
+            logger.error(f"Job {job_id} failed - error: {e}")
+        else:
+            await self._finish(job_id, "done")
+            logger.info(f"Job {job_id} done in {time.perf_counter() - start:.2f}s")
+        finally:
+            self._running.pop(job_id, None)
+            self._wake.set()
+
+    async def _finish(
+        self, job_id: str, status: Literal["done", "failed"], error: str | None = None
+    ):
+        finished = await asyncio.to_thread(self.queue.finish, job_id, self.worker_id, status, error)
+        if not finished:
+            logger.warning(
+                f"Job {job_id} was queued again while {self.worker_id} ran it, "
+                f"its {status} result is dropped"
+            )
+
+    async def _heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.to_thread(self.queue.heartbeat, self.worker_id, list(self._running))
+            except Exception as e:
+                logger.warning(f"Job heartbeat failed - error: {e}")
+
+    async def _drain(self):
+        if not self._running:
+            return
+        tasks = list(self._running.values())
+        logger.info(
+            f"Job worker {self.worker_id} stopping: waiting up to {self.shutdown_timeout}s "
+            f"for {len(tasks)} running jobs"
+        )
+        _, pending = await asyncio.wait(tasks, timeout=self.shutdown_timeout)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def serve(worker_id: str):
+    """Runs a job worker until SIGTERM or SIGINT. Its jobs share the agents and the pool of MCP
+    servers of the process.
+
+    Args:
+        worker_id (str): The identifier of the worker, recorded on the jobs it claims.
+    """
+    # The workflow stack is only loaded by the workers, the API just enqueues
+    from mcp_server.agents.registry import AgentRegistry
+    from mcp_server.helper.openai_pool import openai_pool
+    from mcp_server.local_session import server_loaded
+    from mcp_server.session_pool import MCPSessionPool
+    from mcp_server.workflow import run_ppt_workflow
+
+    agents = AgentRegistry()
+    sessions = None
+
+    async def run_job(job: dict[str, Any]):
+        await run_ppt_workflow(
+            topic=job["payload"]["topic"],
+            num_slides=job["payload"]["num_slides"],
+            filename=job["id"],
+            agents=agents,
+            sessions=sessions,
+        )
+
+    worker = JobWorker(
+        job_queue,
+        worker_id,
+        run_job,
+        concurrency=settings.JOB_WORKER_CONCURRENCY,
+        poll_interval=settings.JOB_POLL_INTERVAL,
+        heartbeat_interval=settings.JOB_HEARTBEAT_INTERVAL,
+        shutdown_timeout=settings.JOB_SHUTDOWN_TIMEOUT,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        if settings.MCP_TRANSPORT == "stdio" and settings.MCP_POOL_SIZE > 0:
+            sessions = MCPSessionPool(
+                size=settings.MCP_POOL_SIZE,
+                max_jobs=settings.MCP_POOL_MAX_JOBS,
+                health_check_timeout=settings.MCP_POOL_HEALTH_CHECK_TIMEOUT,
+                start_timeout=settings.MCP_POOL_START_TIMEOUT,
+            )
+            await sessions.start()
+        await worker.run()
+    finally:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
+        if sessions is not None:
+            await sessions.close()
+        await openai_pool.aclose()
+        # The tools ran in this process with the "local" transport
+        if server_loaded():
+            from mcp_server.mcp_server import source_validator
+
+            await source_validator.aclose()
+
+
+def run_worker(worker_id: str):
+    """Entry point of a worker process."""
+    asyncio.run(serve(worker_id))
+
+
+class JobWorkers:
+    """
+    Starts `processes` job worker processes and keeps them running: a worker that died is
+    replaced, and its running jobs are queued again right away instead of once their heartbeat
+    is stale. `stop()` asks the workers to shut down and waits for them to drain.
+    """
+
+    def __init__(
+        self,
+        processes: int,
+        queue: JobQueue,
+        shutdown_timeout: float,
+        target: Callable[[str], Any] = run_worker,
+    ):
+        self.processes = processes
+        self.queue = queue
+        self.shutdown_timeout = shutdown_timeout
+        self.target = target
+        self._workers: dict[str, BaseProcess] = {}
+        # Spawned, not forked: the parent runs an event loop and threads
+        self._context = multiprocessing.get_context("spawn")
+
+    def start(self):
+        """Starts the worker processes."""
+        for _ in range(self.processes):
+            self._spawn()
+        logger.info(f"Started {self.processes} job workers")
+
+    def _spawn(self):
+        worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        process = self._context.Process(
+            target=self.target, args=(worker_id,), name=f"job-worker-{worker_id}"
+        )
+        process.start()
+        self._workers[worker_id] = process
+
+    def check(self) -> int:
+        """Replaces the workers that died and queues their running jobs again.
+
+        Returns:
+            int: The number of workers replaced.
+        """
+        replaced = 0
+        for worker_id, process in list(self._workers.items()):
+            if process.is_alive():
+                continue
+            del self._workers[worker_id]
+            jobs = self.queue.requeue_worker(worker_id)
+            logger.error(
+                f"Job worker {worker_id} died (exit code {process.exitcode}), "
+                f"{jobs} running jobs queued again"
+            )
+            self._spawn()
+            replaced += 1
+        return replaced
+
+    async def watch(self, interval: float):
+        """Checks the workers every `interval` seconds, until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            self.check()
+
+    def stop(self):
+        """Sends SIGTERM to every worker and waits for them to drain their jobs, killing the ones
+        still running after the shutdown timeout (and queueing their jobs again)."""
+        for process in self._workers.values():
+            if process.is_alive():
+                process.terminate()
+        # Leaves the workers time to close their MCP servers after draining
+        deadline = time.monotonic() + self.shutdown_timeout + 10
+        for worker_id, process in self._workers.items():
+            process.join(max(deadline - time.monotonic(), 0))
+            if process.is_alive():
+                logger.warning(f"Job worker {worker_id} did not stop in time, killing it")
+                process.kill()
+                process.join()
+                self.queue.requeue_worker(worker_id)
+        self._workers.clear()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Runs the job workers of the queue.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=max(settings.JOB_WORKERS, 1),
+        help="Number of worker processes (defaults to JOB_WORKERS)",
+    )
+    args = parser.parse_args()
+
+    workers = JobWorkers(args.processes, job_queue, settings.JOB_SHUTDOWN_TIMEOUT)
+    stopping = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopping.set())
+    signal.signal(signal.SIGINT, lambda *_: stopping.set())
+    workers.start()
+    try:
+        while not stopping.wait(settings.JOB_POLL_INTERVAL):
+            workers.check()
+    finally:
+        workers.stop()
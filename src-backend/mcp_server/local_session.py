@@ -0,0 +1,66 @@
+import asyncio
+import inspect
+import sys
+from collections.abc import Callable
+
+from mcp.types import CallToolResult, EmptyResult, ListToolsResult, TextContent
+
+from core.logger_config import logger
+
+
+def server_loaded() -> bool:
+    """Whether the MCP server module (and its heavy dependencies) is already imported."""
+    return "mcp_server.mcp_server" in sys.modules
+
+
+class LocalSession:
+    """
+    A session-like interface that calls the tool functions of the MCP server in this process,
+    skipping the stdio transport and the JSON-RPC serialization of every call. Async tools run
+    on the event loop (the chart and PPTX tools hand their rendering to the tool workers), sync
+    ones in a thread so they do not block it. As over MCP, a failing tool gives an error result
+    instead of raising.
+    """
+
+    def __init__(self, tools: dict[str, Callable] | None = None):
+        if tools is None:
+            from mcp_server.mcp_server import TOOLS as tools
+        self.tools = tools
+
+    async def initialize(self):
+        return None
+
+    async def send_ping(self) -> EmptyResult:
+        return EmptyResult()
+
+    async def list_tools(self) -> ListToolsResult:
+        from mcp_server.mcp_server import mcp_server
+
+        return ListToolsResult(tools=await mcp_server.list_tools())
+
+    async def call_tool(self, name: str, arguments: dict | None = None) -> CallToolResult:
+        """Calls a tool function with the arguments.
+
+        Args:
+            name (str): The tool name.
+            arguments (dict | None): The arguments of the tool.
+
+        Returns:
+            CallToolResult: The text returned by the tool, or the error.
+        """
+        tool = self.tools.get(name)
+        if tool is None:
+            return _error(f"Unknown tool: {name}")
+        try:
+            if inspect.iscoroutinefunction(tool):
+                result = await tool(**(arguments or {}))
+            else:
+                result = await asyncio.to_thread(tool, **(arguments or {}))
+        except Exception as e:
+            logger.error(f"Error executing tool {name}: {e}")
+            return _error(f"Error executing tool {name}: {e}")
+        return CallToolResult(content=[TextContent(type="text", text=str(result))])
+
+
+def _error(message: str) -> CallToolResult:
+    return CallToolResult(content=[TextContent(type="text", text=message)], isError=True)
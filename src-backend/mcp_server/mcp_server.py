@@ -1,76 +1,328 @@
+import argparse
+import asyncio
 import json
 import os
 from datetime import datetime
 from typing import Literal
 
-import numpy as np
-from matplotlib import pyplot as plt
 from mcp.server.fastmcp import FastMCP
-from pptx import Presentation
-from pptx.util import Inches
-from tavily import TavilyClient
 
 from core.consts import (
     BODY_FONT_SIZE,
     BODY_LINE_SPACING,
     DOMAIN_BLACKLIST,
     FILE_PATH,
+    HIGH_QUALITY_TIERS,
     IMAGE_HEIGHT,
+    SEARCH_CHUNKS_PER_SOURCE,
+    SEARCH_MAX_RESULTS,
     SLIDE_HEIGHT,
     SLIDE_WIDTH,
 )
 from core.logger_config import logger
 from core.settings import settings
-from mcp_server.helper.ppt_style import apply_body_style, apply_title_style
+from mcp_server.helper.coalescer import RequestCoalescer
+from mcp_server.helper.search_cache import search_cache
+from mcp_server.helper.search_payload import compact_results, dumps_compact, estimate_tokens
 from mcp_server.helper.source_validator import source_validator
+from mcp_server.helper.tool_workers import tool_workers
 
-mcp_server = FastMCP("PPT-Generator-Tools")
+mcp_server = FastMCP(
+    "PPT-Generator-Tools", host=settings.MCP_HTTP_HOST, port=settings.MCP_HTTP_PORT
+)
+
+# The heavy dependencies of the tools (tavily, python-pptx, matplotlib) are imported on the
+# first call of the tool that needs them, so the server answers initialize and list_tools
+# without loading them
+tavily_client = None
+search_coalescer = RequestCoalescer(max_in_flight=settings.COALESCER_MAX_IN_FLIGHT)
+adaptive_depth_stats = {"searches": 0, "escalated": 0}
+
+
+def _tavily():
+    """Returns the Tavily client, created on the first search."""
+    global tavily_client
+    if tavily_client is None:
+        from tavily import TavilyClient
+
+        tavily_client = TavilyClient(api_key=settings.TAVILY_API_KEY)
+    return tavily_client
+
+
+def _pyplot():
+    """Imports pyplot with the Agg backend: charts are only saved to files, also from worker
+    threads in the in-process transport."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    from matplotlib import pyplot
 
-tavily_client = TavilyClient(api_key=settings.TAVILY_API_KEY)
+    return pyplot
+
+
+async def _tavily_search(query: str, search_depth: str, use_cache: bool) -> dict:
+    """Runs the Tavily search through the search cache and the request coalescer.
+
+    Args:
+        query (str): The query to search the web for.
+        search_depth (str): The depth of the search.
+        use_cache (bool): Whether a cached search response can be used.
+
+    Returns:
+        dict: The Tavily response.
+    """
+    cache_key = search_cache.make_key(
+        query, search_depth, SEARCH_MAX_RESULTS, SEARCH_CHUNKS_PER_SOURCE, DOMAIN_BLACKLIST
+    )
+    if settings.SEARCH_CACHE_ENABLED and use_cache:
+        response = await search_cache.get(cache_key)
+        if response is not None:
+            logger.info(f"Using cached search response for '{query}'")
+            return response
+
+    response = await search_coalescer.run(
+        cache_key,
+        lambda: asyncio.to_thread(
+            _tavily().search,
+            query=query,
+            search_depth=search_depth,
+            max_results=SEARCH_MAX_RESULTS,
+            exclude_domains=DOMAIN_BLACKLIST,
+            chunks_per_source=SEARCH_CHUNKS_PER_SOURCE,
+        ),
+    )
+    if settings.SEARCH_CACHE_ENABLED:
+        await search_cache.set(cache_key, response)
+    return response
+
+
+async def _search(query: str, search_depth: str, run_id: str | None, use_cache: bool) -> list[dict]:
+    """Searches the web and returns the Tier S/A results, ranked by validation score.
+    The "adaptive" depth runs a basic search first and escalates to an advanced one only when
+    fewer than SEARCH_ESCALATION_MIN_HIGH_TIER Tier S/A results are found.
+
+    Args:
+        query (str): The query to search the web for.
+        search_depth (str): The depth of the search ("basic", "advanced" or "adaptive").
+        run_id (str | None): The workflow run identifier, URLs are validated once per run.
+        use_cache (bool): Whether a cached search response can be used.
+
+    Returns:
+        list[dict]: The high-quality results.
+    """
+    if search_depth != "adaptive":
+        return await _search_at_depth(query, search_depth, run_id, use_cache)
+
+    adaptive_depth_stats["searches"] += 1
+    basic_results = await _search_at_depth(query, "basic", run_id, use_cache)
+    if len(basic_results) >= settings.SEARCH_ESCALATION_MIN_HIGH_TIER:
+        return basic_results
+
+    adaptive_depth_stats["escalated"] += 1
+    logger.info(
+        f"Escalating '{query}' to an advanced search: {len(basic_results)} Tier S/A results "
+        f"(escalated {adaptive_depth_stats['escalated']}/{adaptive_depth_stats['searches']} adaptive searches)"
+    )
+    advanced_results = await _search_at_depth(query, "advanced", run_id, use_cache)
+
+    seen_urls = {res["url"] for res in advanced_results}
+    merged = advanced_results + [res for res in basic_results if res["url"] not in seen_urls]
+    return sorted(merged, key=lambda x: x["validation"]["score"], reverse=True)
+
+
+async def _search_at_depth(
+    query: str, search_depth: str, run_id: str | None, use_cache: bool
+) -> list[dict]:
+    """Searches the web at the given depth and returns the Tier S/A results, ranked by validation score.
+
+    Args:
+        query (str): The query to search the web for.
+        search_depth (str): The depth of the search.
+        run_id (str | None): The workflow run identifier, URLs are validated once per run.
+        use_cache (bool): Whether a cached search response can be used.
+
+    Returns:
+        list[dict]: The high-quality results.
+    """
+    response = await _tavily_search(query, search_depth, use_cache)
+
+    context = [
+        {"content": r["content"], "url": r["url"], "score": r.get("score", 0.5)}
+        for r in response.get("results", [])
+    ]
+    logger.info(f"Context: {context}")
+    ranked_results = await source_validator.arank_sources(
+        context,
+        top_k=settings.SEARCH_TOP_K,
+        time_budget=settings.SEARCH_TIME_BUDGET,
+        run_id=run_id,
+    )
+    if run_id:
+        logger.info(f"URL registry for run '{run_id}': {source_validator.registry.stats(run_id)}")
+    high_quality_results = [
+        res for res in ranked_results if res["validation"]["tier"] in HIGH_QUALITY_TIERS
+    ]
+    if not high_quality_results:
+        logger.warning(f"No Tier S/A results found for '{query}'. Returning empty list.")
+        return []
+    logger.info(f"Returning {len(high_quality_results)} high-quality results for '{query}'")
+    return high_quality_results
+
+
+def _compact_for_researcher(query: str, results: list[dict]) -> list[dict]:
+    """Reduces the ranked results to the compact, token-budgeted payload sent to the researcher
+    and logs the size saved compared to the full pretty-printed results.
+
+    Args:
+        query (str): The search query.
+        results (list[dict]): The ranked high-quality results.
+
+    Returns:
+        list[dict]: The compact results.
+    """
+    compact = compact_results(results, token_budget=settings.SEARCH_RESULT_TOKEN_BUDGET)
+    before = json.dumps(results, indent=2)
+    after = dumps_compact(compact)
+    logger.info(
+        f"Search payload for '{query}': {len(before.encode())} -> {len(after.encode())} bytes, "
+        f"~{estimate_tokens(before)} -> ~{estimate_tokens(after)} tokens"
+    )
+    return compact
 
 
 @mcp_server.tool(
     name="search_web",
     description="Search the web for information",
 )
-def search_web(query: str, search_depth: Literal["basic", "advanced"] = "advanced") -> str:
+async def search_web(
+    query: str,
+    search_depth: Literal["basic", "advanced", "adaptive"] = "adaptive",
+    run_id: str | None = None,
+    use_cache: bool = True,
+) -> str:
     """Search the web for information based on the given query.
 
     Args:
         query (str): The query to search the web for.
-        search_depth (Literal["basic", "advanced"]): The depth of the search.
+        search_depth (Literal["basic", "advanced", "adaptive"]): The depth of the search,
+            "adaptive" escalates from basic to advanced only when needed.
+        run_id (str | None): The workflow run identifier, URLs are validated once per run.
+        use_cache (bool): Whether a cached search response can be used. When False,
+            Tavily is always called and the cache is refreshed.
     Returns:
-        str: The information searched for.
+        str: The information searched for, as a compact JSON list of {"url", "content"}.
     """
     logger.info("Searching the web for information...")
     try:
-        response = tavily_client.search(
-            query=query,
-            search_depth=search_depth,
-            max_results=10,
-            exclude_domains=DOMAIN_BLACKLIST,
-            chunks_per_source=3,
-        )
-
-        context = [{"content": r["content"], "url": r["url"]} for r in response.get("results", [])]
-        logger.info(f"Context: {context}")
-        ranked_results = source_validator.rank_sources(context)
-        high_quality_results = [
-            res for res in ranked_results if res["validation"]["tier"] in ["S", "A"]
-        ]
-        if not high_quality_results:
-            logger.warning(f"No Tier S/A results found for '{query}'. Returning empty list.")
-            return json.dumps([])
-        logger.info(f"Returning {len(high_quality_results)} high-quality results for '{query}'")
-        return json.dumps(high_quality_results, indent=2)
+        high_quality_results = await _search(query, search_depth, run_id, use_cache)
+        return dumps_compact(_compact_for_researcher(query, high_quality_results))
     except Exception as e:
         return f"Error searching web: {str(e)}"
 
 
+@mcp_server.tool(
+    name="search_web_batch",
+    description="Search the web for several queries at once",
+)
+async def search_web_batch(
+    queries: list[str],
+    search_depth: Literal["basic", "advanced", "adaptive"] = "adaptive",
+    run_id: str | None = None,
+    use_cache: bool = True,
+) -> str:
+    """Search the web for several queries concurrently, at most SEARCH_BATCH_CONCURRENCY at a time.
+
+    Args:
+        queries (list[str]): The queries to search the web for.
+        search_depth (Literal["basic", "advanced", "adaptive"]): The depth of the searches.
+        run_id (str | None): The workflow run identifier, URLs are validated once per run.
+        use_cache (bool): Whether cached search responses can be used.
+
+    Returns:
+        str: A compact JSON list with, for each query in order, {"query", "results"} or {"query", "error"}.
+    """
+    logger.info(f"Searching the web for {len(queries)} queries...")
+    limit = asyncio.Semaphore(settings.SEARCH_BATCH_CONCURRENCY)
+
+    async def run_query(query: str) -> dict:
+        async with limit:
+            try:
+                results = await _search(query, search_depth, run_id, use_cache)
+                return {"query": query, "results": _compact_for_researcher(query, results)}
+            except Exception as e:
+                logger.error(f"Error searching web for '{query}': {e}")
+                return {"query": query, "error": str(e)}
+
+    return dumps_compact(await asyncio.gather(*(run_query(query) for query in queries)))
+
+
+@mcp_server.tool(
+    name="get_search_metrics",
+    description="Get the search and source validation counters of a workflow run.",
+)
+def get_search_metrics(run_id: str) -> str:
+    """Get the search and source validation counters of a workflow run,
+    along with the process-wide request coalescing counters.
+
+    Args:
+        run_id (str): The workflow run identifier.
+
+    Returns:
+        str: The counters as JSON.
+    """
+    return json.dumps(
+        {
+            "url_registry": source_validator.registry.stats(run_id),
+            "coalescing": {
+                "search": search_coalescer.stats(),
+                "validation": source_validator.coalescer.stats(),
+            },
+            "search_cache": search_cache.stats(),
+            "adaptive_depth": {
+                **adaptive_depth_stats,
+                "escalation_rate": round(
+                    adaptive_depth_stats["escalated"] / max(adaptive_depth_stats["searches"], 1), 3
+                ),
+            },
+        }
+    )
+
+
+@mcp_server.tool(
+    name="release_run",
+    description="Forget the URL checks of a finished workflow run.",
+)
+def release_run(run_id: str) -> str:
+    """Forget the URL checks of a finished workflow run, so a long-lived server does not keep
+    them until the run is pushed out of the registry.
+
+    Args:
+        run_id (str): The workflow run identifier.
+
+    Returns:
+        str: A confirmation message.
+    """
+    source_validator.registry.release(run_id)
+    return f"Released run {run_id}"
+
+
 @mcp_server.tool(
     name="create_presentation",
     description="Create a PowerPoint presentation based on the given slides content.",
 )
+async def create_presentation_tool(filename: str, slides_content: str) -> str:
+    """Create a PowerPoint presentation based on the given slides content, in the tool workers.
+
+    Args:
+        filename (str): The filename of the presentation.
+        slides_content (str): The slides content of the presentation.
+
+    Returns:
+        str: The message indicating the success or failure of the operation.
+    """
+    return await tool_workers.run(create_presentation, filename, slides_content)
+
+
 def create_presentation(filename: str, slides_content: str) -> str:
     """Create a PowerPoint presentation based on the given slides content.
 
@@ -84,6 +336,10 @@ def create_presentation(filename: str, slides_content: str) -> str:
     try:
         data = json.loads(slides_content)
 
+        from pptx import Presentation
+
+        from mcp_server.helper.ppt_style import apply_body_style, apply_title_style
+
         prs = Presentation()
 
         for slide_data in data:
@@ -166,8 +422,8 @@ def create_presentation(filename: str, slides_content: str) -> str:
                 try:
                     picture = slide.shapes.add_picture(
                         image_path,
-                        left=Inches(0),
-                        top=Inches(0),
+                        left=0,
+                        top=0,
                         height=IMAGE_HEIGHT,
                     )
                     picture.left = (SLIDE_WIDTH - picture.width) // 2
@@ -187,6 +443,22 @@ def create_presentation(filename: str, slides_content: str) -> str:
     name="generate_chart",
     description="Generate visual assets for the presentation.",
 )
+async def generate_chart_tool(data_json: str, chart_type: str, title: str) -> str:
+    """
+    Generates a statistical chart (bar, pie, or line) in the tool workers and saves it as a PNG image.
+
+    Args:
+        data_json: A JSON string containing 'labels' (list) and 'values' (list).
+                   Example: '{"labels": ["Q1", "Q2"], "values": [100, 150]}'
+        chart_type: The type of chart to generate. Options: "bar", "pie", "line".
+        title: The title of the chart.
+
+    Returns:
+        The file path of the generated image.
+    """
+    return await tool_workers.run(generate_chart, data_json, chart_type, title)
+
+
 def generate_chart(data_json: str, chart_type: str, title: str) -> str:
     """
     Generates a statistical chart (bar, pie, or line) and saves it as a PNG image.
@@ -215,6 +487,7 @@ def generate_chart(data_json: str, chart_type: str, title: str) -> str:
         if len(labels) != len(values):
             raise ValueError("Error: 'labels' and 'values' must have the same length.")
 
+        plt = _pyplot()
         plt.figure(figsize=(10, 6))
 
         if chart_type.lower() == "bar":
@@ -229,7 +502,7 @@ def generate_chart(data_json: str, chart_type: str, title: str) -> str:
 
         elif chart_type.lower() == "pie":
             cmap = plt.get_cmap("Paired")
-            rgba = cmap(np.linspace(0, 1, len(values)))
+            rgba = cmap([i / max(len(values) - 1, 1) for i in range(len(values))])
             colors = [tuple(rgba[i]) for i in range(len(values))]
             plt.pie(
                 values,
@@ -260,5 +533,53 @@ def generate_chart(data_json: str, chart_type: str, title: str) -> str:
         return f"Error generating chart: {str(e)}"
 
 
+def _warm_up_worker():
+    """Runs once in every tool worker process, importing this module (to unpickle it) and the
+    chart and PPTX dependencies."""
+    import pptx  # noqa: F401
+
+    _pyplot()
+
+
+async def serve(transport: Literal["stdio", "streamable-http"]):
+    """Runs the server until it stops, then closes the pooled HTTP client of the source validator
+    on the loop it was used on.
+
+    Args:
+        transport (Literal["stdio", "streamable-http"]): The transport of the server.
+    """
+    try:
+        if transport == "stdio":
+            await mcp_server.run_stdio_async()
+        else:
+            await mcp_server.run_streamable_http_async()
+    finally:
+        await source_validator.aclose()
+
+
+# The tool functions by name, called directly by the in-process transport (LocalSession)
+TOOLS = {
+    "search_web": search_web,
+    "search_web_batch": search_web_batch,
+    "get_search_metrics": get_search_metrics,
+    "release_run": release_run,
+    "create_presentation": create_presentation_tool,
+    "generate_chart": generate_chart_tool,
+}
+
+
 if __name__ == "__main__":
-    mcp_server.run()
+    parser = argparse.ArgumentParser(description="Runs the MCP server.")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "streamable-http"],
+        default="stdio",
+        help="stdio for a server spawned per client, streamable-http for a shared server "
+        "listening on MCP_HTTP_HOST:MCP_HTTP_PORT",
+    )
+    args = parser.parse_args()
+    tool_workers.warm_up(_warm_up_worker)
+    try:
+        asyncio.run(serve(args.transport))
+    finally:
+        tool_workers.shutdown()
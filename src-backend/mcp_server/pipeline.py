@@ -0,0 +1,265 @@
+import asyncio
+import time
+from collections.abc import AsyncIterable, Awaitable, Callable, Iterable
+
+from mcp import ClientSession
+from pydantic import BaseModel, Field
+
+from core.logger_config import logger
+from core.settings import settings
+from mcp_server.agents.illustrator.agent import IllustratorAgent
+from mcp_server.agents.illustrator.schemas import VisualAsset
+from mcp_server.agents.planner.schemas import SlidePlan
+from mcp_server.agents.researcher.agent import ResearcherAgent
+from mcp_server.agents.researcher.schemas import ResearcherPayload, ResearchSummary
+from mcp_server.agents.writer.agent import WriterAgent
+from mcp_server.agents.writer.schemas import PresentationContent, SlideContent
+from mcp_server.helper.job_metrics import stage
+
+
+async def research_slide(
+    researcher: ResearcherAgent, slide: SlidePlan, session: ClientSession, run_id: str
+) -> dict:
+    """Researches a single slide. A failed research is logged and gives an empty list of facts.
+
+    Args:
+        researcher (ResearcherAgent): The researcher agent.
+        slide (SlidePlan): The plan entry of the slide.
+        session (ClientSession): The MCP session.
+        run_id (str): The workflow run identifier.
+
+    Returns:
+        dict: The research summary of the slide.
+    """
+    try:
+        summary = await researcher.research_web(
+            payload=ResearcherPayload(
+                slide_title=slide.title,
+                search_queries=slide.search_queries,
+                run_id=run_id,
+            ),
+            session=session,
+        )
+    except Exception as e:
+        logger.error(f"Research failed for slide '{slide.title}' - error: {e}")
+        summary = ResearchSummary(slide_topic=slide.title, facts=[])
+    return summary.model_dump()
+
+
+class SlideJob(BaseModel):
+    index: int
+    plan: SlidePlan
+    research: dict | None = None
+    content: SlideContent | None = None
+    assets: list[VisualAsset] = Field(default_factory=list)
+    timings: dict[str, float] = Field(default_factory=dict)
+
+
+class SlidePipeline:
+    """
+    Streams slides through research -> writing -> illustration. The stages are connected by
+    asyncio queues and each has its own pool of workers, so a slide moves to the next stage as
+    soon as it is ready: research on slide N overlaps the writing and charts of earlier slides.
+    The slides can be streamed from the planner: research starts on the first slides while the
+    plan is still being generated, and writing starts once the plan is complete.
+    """
+
+    def __init__(
+        self,
+        topic: str,
+        session: ClientSession,
+        researcher: ResearcherAgent,
+        writer: WriterAgent,
+        illustrator: IllustratorAgent,
+        run_id: str,
+    ):
+        self.topic = topic
+        self.session = session
+        self.researcher = researcher
+        self.writer = writer
+        self.illustrator = illustrator
+        self.run_id = run_id
+        self.slide_plans: list[dict] = []
+        self._planned = asyncio.Event()
+
+    async def run(
+        self, slides: Iterable[SlidePlan] | AsyncIterable[SlidePlan]
+    ) -> tuple[PresentationContent, list[VisualAsset]]:
+        """Runs every slide through the pipeline as the slides arrive.
+
+        Args:
+            slides (Iterable[SlidePlan] | AsyncIterable[SlidePlan]): The slides of the plan, in order.
+
+        Raises:
+            Exception: The error of the slides' stream, e.g. a plan that failed validation.
+
+        Returns:
+            tuple[PresentationContent, list[VisualAsset]]: The deck content, in plan order, and the generated assets.
+        """
+        research_queue: asyncio.Queue[SlideJob | None] = asyncio.Queue()
+        write_queue: asyncio.Queue[SlideJob | None] = asyncio.Queue()
+        illustrate_queue: asyncio.Queue[SlideJob | None] = asyncio.Queue()
+        jobs: list[SlideJob] = []
+
+        async def feed():
+            async for slide in _aiter(slides):
+                job = SlideJob(index=len(jobs), plan=slide)
+                jobs.append(job)
+                self.slide_plans.append(slide.model_dump())
+                await research_queue.put(job)
+            self._planned.set()
+            await research_queue.put(None)
+
+        start = time.perf_counter()
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(feed())
+                group.create_task(self._stages(research_queue, write_queue, illustrate_queue))
+        except ExceptionGroup as e:
+            # A failed plan cancels the stages; surface the planner's error itself
+            raise e.exceptions[0] from None
+        elapsed = time.perf_counter() - start
+        slowest = max((sum(job.timings.values()) for job in jobs), default=0)
+        logger.info(
+            f"Pipeline finished {len(jobs)} slides in {elapsed:.2f}s (slowest slide: {slowest:.2f}s)"
+        )
+
+        content = PresentationContent(
+            filename_suggestion=self.run_id, slides=[job.content for job in jobs]
+        )
+        if not WriterAgent.has_chart(content):
+            content = await self._repair_chart(content, jobs)
+        return content, [asset for job in jobs for asset in job.assets]
+
+    async def _repair_chart(
+        self, content: PresentationContent, jobs: list[SlideJob]
+    ) -> PresentationContent:
+        """Enforces the writer's chart rule on the merged deck, as the deck-level writer does:
+        asks for a chart on the most numeric slide and illustrates that slide."""
+        repaired = await self.writer.repair_chart(
+            content, self.topic, [job.research or {} for job in jobs]
+        )
+        if repaired is None:
+            logger.warning(f"No chart found in presentation for topic='{self.topic}'")
+            return content
+        for job, slide in zip(jobs, repaired.slides, strict=True):
+            if slide.visual_request != job.content.visual_request:
+                job.content = slide
+                with stage("illustration"):
+                    await self._illustrate(job)
+        return repaired
+
+    async def _stages(
+        self,
+        research_queue: asyncio.Queue,
+        write_queue: asyncio.Queue,
+        illustrate_queue: asyncio.Queue,
+    ):
+        """Runs the research, writing and illustration stages until the end of the stream."""
+        await asyncio.gather(
+            self._stage(
+                "research",
+                research_queue,
+                write_queue,
+                self._research,
+                settings.RESEARCH_CONCURRENCY,
+            ),
+            self._stage(
+                "writing", write_queue, illustrate_queue, self._write, settings.WRITER_CONCURRENCY
+            ),
+            self._stage(
+                "illustration",
+                illustrate_queue,
+                None,
+                self._illustrate,
+                settings.ILLUSTRATOR_CONCURRENCY,
+            ),
+        )
+
+    async def _stage(
+        self,
+        name: str,
+        inbox: asyncio.Queue,
+        outbox: asyncio.Queue | None,
+        handler: Callable[[SlideJob], Awaitable[None]],
+        workers: int,
+    ):
+        """Runs `workers` workers that handle the jobs of the inbox and pass them to the outbox.
+        A None job marks the end of the stream and is forwarded once every worker is done.
+        The time spent in `handler` is added to the stage's metrics, summed over the slides.
+        """
+
+        async def worker():
+            while True:
+                job = await inbox.get()
+                if job is None:
+                    # Put the marker back so the other workers of this stage stop too
+                    await inbox.put(None)
+                    return
+                stage_start = time.perf_counter()
+                with stage(name):
+                    await handler(job)
+                job.timings[name] = time.perf_counter() - stage_start
+                if outbox is not None:
+                    await outbox.put(job)
+
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        if outbox is not None:
+            await outbox.put(None)
+
+    async def _research(self, job: SlideJob):
+        job.research = await research_slide(self.researcher, job.plan, self.session, self.run_id)
+
+    async def _write(self, job: SlideJob):
+        # A streamed plan may still be arriving: every slide is written against the full plan.
+        # The other slides may still be researched, so the research is sent with each slide
+        await self._planned.wait()
+        attempts = settings.WRITER_SLIDE_ATTEMPTS
+        for attempt in range(1, attempts + 1):
+            try:
+                job.content = await self.writer.draft_slide(
+                    topic=self.topic,
+                    slide_plans=self.slide_plans,
+                    index=job.index,
+                    research=job.research or {},
+                )
+                return
+            except Exception as e:
+                logger.error(
+                    f"Writing failed for slide '{job.plan.title}' ({attempt}/{attempts}) "
+                    f"- error: {e}"
+                )
+        job.content = _fallback_slide(job)
+
+    async def _illustrate(self, job: SlideJob):
+        if job.content and job.content.visual_request:
+            request = job.content.visual_request.model_dump()
+            request["slide_number"] = job.index
+            result = await self.illustrator.create_visuals([request], self.session)
+            job.assets = result.assets
+        logger.info(
+            f"Slide {job.index} '{job.plan.title}' ready: "
+            + ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in job.timings.items())
+        )
+
+
+def _fallback_slide(job: SlideJob) -> SlideContent:
+    """Builds a plain slide from the research facts when the writer fails."""
+    facts = (job.research or {}).get("facts", [])
+    sources = list(dict.fromkeys(f["source_url"] for f in facts if f.get("source_url")))
+    return SlideContent(
+        title=job.plan.title,
+        points=[f["content"] for f in facts[:5]] or [job.plan.content_goal],
+        speaker_notes=None,
+        sources=sources or None,
+    )
+
+
+async def _aiter(items: Iterable | AsyncIterable):
+    """Iterates over a sync or async iterable."""
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,263 @@
+import asyncio
+import os
+import time
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from core.logger_config import logger
+
+
+def server_params() -> StdioServerParameters:
+    """Returns the parameters that spawn the MCP server as a child process over stdio."""
+    return StdioServerParameters(
+        command="python",
+        args=["-m", "mcp_server.mcp_server"],
+        env=dict(os.environ),
+    )
+
+
+@asynccontextmanager
+async def open_session() -> AsyncIterator[ClientSession]:
+    """Spawns an MCP server process and yields its initialized client session."""
+    async with stdio_client(server_params()) as (read, write):  # noqa: SIM117
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+
+@asynccontextmanager
+async def open_http_session(url: str) -> AsyncIterator[ClientSession]:
+    """Connects to a shared MCP server over streamable HTTP and yields its initialized session.
+
+    Args:
+        url (str): The MCP endpoint of the server, e.g. http://localhost:8001/mcp.
+    """
+    async with streamablehttp_client(url) as (read, write, _):  # noqa: SIM117
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            yield session
+
+
+class PooledSession:
+    """
+    A long-lived MCP server process and its client session. The stdio transport and the session
+    are entered and exited by a dedicated task (anyio requires both in the same task), which
+    keeps them open until the session is closed, while the jobs use the session from their own
+    tasks.
+    """
+
+    def __init__(self):
+        self.session: ClientSession | None = None
+        self.jobs = 0
+        self.startup_seconds = 0.0
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._error: BaseException | None = None
+
+    async def start(self, timeout: float):
+        """Spawns the server and waits for its session to be initialized.
+
+        Args:
+            timeout (float): The seconds allowed for the server to start.
+
+        Raises:
+            Exception: The error of the server start.
+        """
+        start = time.perf_counter()
+        self._task = asyncio.create_task(self._run())
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except TimeoutError:
+            await self.close()
+            raise
+        if self._error is not None:
+            raise self._error
+        self.startup_seconds = time.perf_counter() - start
+
+    async def _run(self):
+        try:
+            async with self._open() as session:
+                self.session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            logger.error(f"MCP server session failed - error: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    def _open(self):
+        return open_session()
+
+    @property
+    def alive(self) -> bool:
+        """Whether the session is open."""
+        return self.session is not None and self._task is not None and not self._task.done()
+
+    async def ping(self, timeout: float) -> bool:
+        """Checks that the server answers within `timeout` seconds.
+
+        Args:
+            timeout (float): The seconds allowed for the answer.
+
+        Returns:
+            bool: Whether the server is healthy.
+        """
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"MCP server health check failed - error: {e}")
+            return False
+
+    async def close(self, timeout: float = 5.0):
+        """Closes the session and stops the server process, killing it after `timeout` seconds."""
+        self._closing.set()
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+
+class MCPSessionPool:
+    """
+    A fixed-size pool of long-lived MCP server processes, started with the app, so the jobs do
+    not pay for spawning a server and importing its dependencies. A job checks a session out for
+    its whole run and checks it back in when done. Sessions are health checked on checkout and
+    replaced when they crashed, and recycled after `max_jobs` jobs.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_jobs: int,
+        health_check_timeout: float,
+        start_timeout: float,
+        session_factory: Callable[[], PooledSession] = PooledSession,
+    ):
+        self.size = size
+        self.max_jobs = max_jobs
+        self.health_check_timeout = health_check_timeout
+        self.start_timeout = start_timeout
+        self.session_factory = session_factory
+        self._idle: asyncio.Queue[PooledSession] = asyncio.Queue()
+        self._sessions: set[PooledSession] = set()
+        self._recycling: set[asyncio.Task] = set()
+        self._stats = {
+            "checkouts": 0,
+            "warm_starts": 0,
+            "cold_starts": 0,
+            "warm_seconds": 0.0,
+            "cold_seconds": 0.0,
+            "recycled": 0,
+            "crashed": 0,
+        }
+
+    async def start(self):
+        """Starts the servers of the pool. A server that fails to start is retried on checkout."""
+        sessions = [self.session_factory() for _ in range(self.size)]
+        await asyncio.gather(*(self._start(pooled) for pooled in sessions))
+        for pooled in sessions:
+            self._sessions.add(pooled)
+            self._idle.put_nowait(pooled)
+        logger.info(
+            f"MCP session pool started: {sum(p.alive for p in sessions)}/{self.size} servers up"
+        )
+
+    async def _start(self, pooled: PooledSession) -> bool:
+        try:
+            await pooled.start(self.start_timeout)
+            return True
+        except Exception as e:
+            logger.error(f"MCP server failed to start - error: {e}")
+            return False
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[tuple[ClientSession, bool]]:
+        """Checks a healthy session out of the pool for the duration of the block, waiting for
+        one to be free. A crashed session is replaced by a new server first.
+
+        Raises:
+            RuntimeError: If no server could be started.
+
+        Yields:
+            tuple[ClientSession, bool]: The session, and whether it was warm (already running).
+        """
+        start = time.perf_counter()
+        pooled = await self._idle.get()
+        try:
+            warm = await pooled.ping(self.health_check_timeout)
+            if not warm:
+                if pooled.session is not None or pooled.jobs:
+                    self._stats["crashed"] += 1
+                pooled = await self._replace(pooled)
+                if not pooled.alive:
+                    raise RuntimeError("No MCP server could be started")
+        except BaseException:
+            self._idle.put_nowait(pooled)
+            raise
+
+        elapsed = time.perf_counter() - start
+        kind = "warm" if warm else "cold"
+        self._stats["checkouts"] += 1
+        self._stats[f"{kind}_starts"] += 1
+        self._stats[f"{kind}_seconds"] += elapsed
+        logger.info(f"MCP session checked out ({kind} start, {elapsed:.3f}s)")
+
+        try:
+            yield pooled.session, warm
+        finally:
+            pooled.jobs += 1
+            self._checkin(pooled)
+
+    def _checkin(self, pooled: PooledSession):
+        if pooled.jobs < self.max_jobs:
+            self._idle.put_nowait(pooled)
+            return
+        # Recycle in the background, the job does not wait for the new server
+        self._stats["recycled"] += 1
+        task = asyncio.create_task(self._recycle(pooled))
+        self._recycling.add(task)
+        task.add_done_callback(self._recycling.discard)
+
+    async def _recycle(self, pooled: PooledSession):
+        replacement = pooled
+        try:
+            replacement = await self._replace(pooled)
+        finally:
+            self._idle.put_nowait(replacement)
+
+    async def _replace(self, pooled: PooledSession) -> PooledSession:
+        """Closes a session and starts a new server in its place."""
+        await pooled.close()
+        self._sessions.discard(pooled)
+        replacement = self.session_factory()
+        self._sessions.add(replacement)
+        await self._start(replacement)
+        return replacement
+
+    def stats(self) -> dict[str, float]:
+        """Returns the counters of the pool.
+
+        Returns:
+            dict[str, float]: The checkouts, warm and cold starts with their total checkout
+            seconds, and the recycled and crashed sessions.
+        """
+        return dict(self._stats)
+
+    async def close(self):
+        """Stops every server of the pool."""
+        await asyncio.gather(*self._recycling, return_exceptions=True)
+        await asyncio.gather(*(pooled.close() for pooled in self._sessions))
+        self._sessions.clear()
@@ -1,24 +1,120 @@
+import asyncio
 import json
-import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
+from mcp import ClientSession
 
 from core.consts import FILE_PATH
 from core.logger_config import logger
-from mcp_server.agents.illustrator.agent import IllustratorAgent
-
-# Import your 4 Agents
-from mcp_server.agents.planner.agent import PlannerAgent
-from mcp_server.agents.planner.schemas import PresentationPayload
+from core.settings import settings
+from mcp_server.agents.planner.schemas import PresentationPayload, PresentationPlan, SlidePlan
+from mcp_server.agents.registry import AgentRegistry
 from mcp_server.agents.researcher.agent import ResearcherAgent
-from mcp_server.agents.researcher.schemas import ResearcherPayload
-from mcp_server.agents.writer.agent import WriterAgent
+from mcp_server.helper.job_metrics import (
+    JobMetrics,
+    MeteredSession,
+    current_job,
+    record_session,
+    stage,
+)
+from mcp_server.local_session import LocalSession, server_loaded
+from mcp_server.pipeline import SlidePipeline, research_slide
+from mcp_server.session_pool import MCPSessionPool, open_http_session, open_session
+
 
-MCP_SERVER_SCRIPT = "mcp_server/mcp_server.py"
+async def research_slides(
+    researcher: ResearcherAgent,
+    plan: PresentationPlan,
+    session: ClientSession,
+    run_id: str,
+) -> list[dict]:
+    """Researches every slide of the plan concurrently, at most RESEARCH_CONCURRENCY at a time.
+    A slide whose research fails gets an empty list of facts instead of failing the others.
 
+    Args:
+        researcher (ResearcherAgent): The researcher agent.
+        plan (PresentationPlan): The presentation plan.
+        session (ClientSession): The MCP session.
+        run_id (str): The workflow run identifier.
 
-async def run_ppt_workflow(topic: str, num_slides: int, filename: str):
+    Returns:
+        list[dict]: The research summaries, in plan order.
+    """
+    limit = asyncio.Semaphore(settings.RESEARCH_CONCURRENCY)
+    timings = []
+
+    async def research(slide) -> dict:
+        async with limit:
+            start = time.perf_counter()
+            summary = await research_slide(researcher, slide, session, run_id)
+            elapsed = time.perf_counter() - start
+            timings.append(elapsed)
+            logger.info(f"Researched slide '{slide.title}' in {elapsed:.2f}s")
+            return summary
+
+    start = time.perf_counter()
+    research_data = await asyncio.gather(*(research(slide) for slide in plan.slides))
+    logger.info(
+        f"Research stage took {time.perf_counter() - start:.2f}s for {len(plan.slides)} slides "
+        f"(sum of slide timings: {sum(timings):.2f}s)"
+    )
+    return list(research_data)
+
+
+@asynccontextmanager
+async def _mcp_session(
+    sessions: MCPSessionPool | None, transport: str, server_url: str | None = None
+) -> AsyncIterator[ClientSession | LocalSession]:
+    """Yields the MCP session of a run: connected to the shared server at `server_url`,
+    in-process with the "local" transport, otherwise checked out of the pool or from a server
+    spawned for the run. Records in the job metrics whether it was a warm or a cold start."""
+    start = time.perf_counter()
+    if server_url is not None:
+        async with open_http_session(server_url) as session:
+            record_session(True, time.perf_counter() - start)
+            yield session
+        return
+    if transport == "local":
+        warm = server_loaded()
+        session = LocalSession()
+        record_session(warm, time.perf_counter() - start)
+        yield session
+        return
+    if sessions is not None:
+        async with sessions.session() as (session, warm):
+            record_session(warm, time.perf_counter() - start)
+            yield session
+        return
+    async with open_session() as session:
+        record_session(False, time.perf_counter() - start)
+        yield session
+
+
+@asynccontextmanager
+async def _released_run(session: ClientSession | LocalSession, run_id: str) -> AsyncIterator[None]:
+    """Asks the MCP server to forget the URL checks of the run when it ends, however it ends:
+    the server may outlive the run (pooled, shared over HTTP or in-process)."""
+    try:
+        yield
+    finally:
+        try:
+            await session.call_tool("release_run", arguments={"run_id": run_id})
+        except Exception as e:
+            logger.warning(f"Could not release run {run_id} - error: {e}")
+
+
+async def run_ppt_workflow(
+    topic: str,
+    num_slides: int,
+    filename: str,
+    pipeline: bool | None = None,
+    agents: AgentRegistry | None = None,
+    sessions: MCPSessionPool | None = None,
+    transport: str | None = None,
+    server_url: str | None = None,
+):
     """
     Main Orchestration Function:
     1. Planner -> Creates Outline
@@ -26,48 +122,118 @@ async def run_ppt_workflow(topic: str, num_slides: int, filename: str):
     3. Writer -> Drafts Content + Requests Visuals
     4. Illustrator -> Generates Charts / Downloads Images
     5. Tool -> Assembles Final PPTX
+
+    With `pipeline` (defaults to WORKFLOW_PIPELINE), steps 2-4 run as a per-slide pipeline:
+    each slide is written and illustrated as soon as its own research is done.
+    `agents` are the shared agent instances, created for this run if not given.
+    `sessions` is the pool of running MCP servers to check a session out of; without it an
+    MCP server is spawned for this run. With `transport` (defaults to MCP_TRANSPORT) "local",
+    the tools are called in-process instead. With `server_url` (or the "http" transport and
+    MCP_SERVER_URL), the run connects to a shared MCP server over streamable HTTP.
+
+    The tokens, estimated cost and latencies of every stage are saved next to the deck
+    as `<filename>.report.json`, whether the run succeeds or fails.
     """
+    metrics = JobMetrics(pprt_id=filename)
+    token = current_job.set(metrics)
+    try:
+        result = await _run_ppt_workflow(
+            topic, num_slides, filename, pipeline, agents, sessions, transport, server_url
+        )
+        metrics.finish("completed")
+        return result
+    except Exception as e:
+        metrics.finish("failed", error=str(e))
+        raise
+    finally:
+        current_job.reset(token)
+        report = metrics.report()
+        metrics.save(FILE_PATH)
+        logger.info(
+            f"Job report for {filename}: {report['total_seconds']}s, "
+            f"{report['totals']['prompt_tokens']} prompt / {report['totals']['completion_tokens']} "
+            f"completion tokens ({report['totals']['cached_rate']:.0%} of prompt tokens cached), "
+            f"~${report['totals']['cost_usd']:.4f}"
+        )
+
+
+async def _run_ppt_workflow(
+    topic: str,
+    num_slides: int,
+    filename: str,
+    pipeline: bool | None,
+    agents: AgentRegistry | None,
+    sessions: MCPSessionPool | None,
+    transport: str | None,
+    server_url: str | None,
+):
+    if pipeline is None:
+        pipeline = settings.WORKFLOW_PIPELINE
+    if transport is None:
+        transport = settings.MCP_TRANSPORT
+    if server_url is None and transport == "http":
+        server_url = settings.MCP_SERVER_URL
+        if not server_url:
+            raise ValueError("MCP_TRANSPORT=http requires MCP_SERVER_URL")
     logger.info(f"STARTING WORKFLOW: '{topic}' ({num_slides} slides)")
 
     # 1. Start MCP Server Connection
-    server_params = StdioServerParameters(
-        command="python",
-        args=["-m", "mcp_server.mcp_server"],
-        env=dict(os.environ),
-    )
+    async with (
+        _mcp_session(sessions, transport, server_url) as client_session,
+        _released_run(client_session, filename),
+    ):
+        session = MeteredSession(client_session)
 
-    async with stdio_client(server_params) as (read, write):  # noqa: SIM117
-        async with ClientSession(read, write) as session:
-            await session.initialize()
+        tools = await session.list_tools()
+        logger.info(f"MCP Connected. Tools: {[t.name for t in tools.tools]}")
 
-            tools = await session.list_tools()
-            logger.info(f"MCP Connected. Tools: {[t.name for t in tools.tools]}")
+        agents = agents or AgentRegistry()
+        planner = agents.planner
+        researcher = agents.researcher
+        writer = agents.writer
+        illustrator = agents.illustrator
 
-            planner = PlannerAgent()
-            researcher = ResearcherAgent()
-            writer = WriterAgent()
-            illustrator = IllustratorAgent()
+        # --- STEP 1: PLANNER ---
 
-            # --- STEP 1: PLANNER ---
-
-            logger.info("Step 1: Planning the presentation structure...")
-            plan = await planner.create_presentation_plan(
-                payload=PresentationPayload(topic=topic, num_slides=num_slides)
-            )
+        logger.info("Step 1: Planning the presentation structure...")
+        payload = PresentationPayload(topic=topic, num_slides=num_slides)
+        streaming = pipeline and settings.PLANNER_STREAMING
+        if not streaming:
+            with stage("planning"):
+                plan = await planner.create_presentation_plan(payload=payload)
             logger.info(f"Presentation plan created with {len(plan.slides)} slides.")
             logger.info(f"Presentation plan: {plan.model_dump_json()}")
+
+        # --- STEPS 2-4: PIPELINED ---
+
+        if pipeline:
+            logger.info("Steps 2-4: Researching, writing and illustrating each slide...")
+            planned: list[SlidePlan] = []
+
+            async def stream_plan():
+                async for slide in planner.stream_presentation_plan(payload=payload):
+                    logger.info(f"Planned slide {len(planned) + 1}: '{slide.title}'")
+                    planned.append(slide)
+                    yield slide
+
+            with stage("pipeline"):
+                deck_content, assets = await SlidePipeline(
+                    topic=topic,
+                    session=session,
+                    researcher=researcher,
+                    writer=writer,
+                    illustrator=illustrator,
+                    run_id=filename,
+                ).run(stream_plan() if streaming else plan.slides)
+            if streaming:
+                plan = PresentationPlan(topic=topic, slides=planned)
+                logger.info(f"Presentation plan: {plan.model_dump_json()}")
+        else:
             # --- STEP 2: RESEARCHER ---
 
             logger.info("Step 2: Researching the web for information...")
-            research_data = []
-            for slide in plan.slides:
-                summary = await researcher.research_web(
-                    payload=ResearcherPayload(
-                        slide_title=slide.title, search_queries=slide.search_queries
-                    ),
-                    session=session,
-                )
-                research_data.append(summary.model_dump())
+            with stage("research"):
+                research_data = await research_slides(researcher, plan, session, run_id=filename)
             logger.info(
                 f"Research completed successfully. Research data: {json.dumps(research_data, indent=2, ensure_ascii=False)}"
             )
@@ -75,9 +241,15 @@ async def run_ppt_workflow(topic: str, num_slides: int, filename: str):
             # --- STEP 3: WRITER ---
 
             logger.info("Step 3: Writing & Designing the presentation...")
-            deck_content = await writer.prepare_presentation(
-                topic=topic, plan_json=plan.model_dump(), research_data=research_data
+            prepare = (
+                writer.prepare_presentation_by_slide
+                if settings.WRITER_PER_SLIDE
+                else writer.prepare_presentation
             )
+            with stage("writing"):
+                deck_content = await prepare(
+                    topic=topic, plan_json=plan.model_dump(), research_data=research_data
+                )
 
             # --- STEP 4: ILLUSTRATOR ---
 
@@ -90,28 +262,34 @@ async def run_ppt_workflow(topic: str, num_slides: int, filename: str):
                     req["slide_number"] = i
                     visual_requests.append(req)
 
-            illustration_result = await illustrator.create_visuals(visual_requests, session)
+            with stage("illustration"):
+                illustration_result = await illustrator.create_visuals(visual_requests, session)
+            assets = illustration_result.assets
 
-            generated_assets = [asset.model_dump() for asset in illustration_result.assets]
-            # --- STEP 5: ASSEMBLY ---
-            logger.info("Step 5: Assembling Final File...")
+        search_metrics = await session.call_tool(
+            "get_search_metrics", arguments={"run_id": filename}
+        )
+        logger.info(f"Search metrics: {search_metrics.content[0].text}")
 
-            final_slides_payload = []
-            for i, slide in enumerate(deck_content.slides):
-                slide_data = {
-                    "title": slide.title,
-                    "points": slide.points,
-                    "image": None,
-                }
-
-                matching_asset = next(
-                    (a for a in illustration_result.assets if a.slide_number == i), None
-                )
-                if matching_asset:
-                    slide_data["image"] = matching_asset.file_path
+        generated_assets = [asset.model_dump() for asset in assets]
+        # --- STEP 5: ASSEMBLY ---
+        logger.info("Step 5: Assembling Final File...")
 
-                final_slides_payload.append(slide_data)
+        final_slides_payload = []
+        for i, slide in enumerate(deck_content.slides):
+            slide_data = {
+                "title": slide.title,
+                "points": slide.points,
+                "image": None,
+            }
 
+            matching_asset = next((a for a in assets if a.slide_number == i), None)
+            if matching_asset:
+                slide_data["image"] = matching_asset.file_path
+
+            final_slides_payload.append(slide_data)
+
+        with stage("assembly"):
             await writer.write_presentation(
                 content=deck_content,
                 session=session,
@@ -119,8 +297,6 @@ async def run_ppt_workflow(topic: str, num_slides: int, filename: str):
                 filename=filename,
             )
 
-            final_filename = f"{filename}.pptx"
-            logger.info(
-                f"DONE! Presentation saved as: {FILE_PATH}/{filename}.pptx"
-            )
-            return final_filename
+        final_filename = f"{filename}.pptx"
+        logger.info(f"DONE! Presentation saved as: {FILE_PATH}/{filename}.pptx")
+        return final_filename
@@ -1,6 +1,7 @@
 import json
 import os
 import tempfile
+import time
 from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
@@ -9,6 +10,15 @@ from fastapi.testclient import TestClient
 from pptx import Presentation as PptxPresentation
 
 
+@pytest.fixture(autouse=True)
+def no_llm_cache():
+    """Keeps mocked completions out of the LLM cache."""
+    from core.settings import settings
+
+    with patch.object(settings, "LLM_CACHE_ENABLED", False):
+        yield
+
+
 class TestSourceValidator:
     """Tests for SourceValidator helper."""
 
@@ -46,7 +56,7 @@ class TestSourceValidator:
         assert meta["date"] == "2026-01-30"
         assert meta["has_references"] is True
 
-    @patch("mcp_server.helper.source_validator.requests.get")
+    @patch("requests.get")
     def test_validate_url_live_site(self, mock_get):
         """Test URL validation for a live site."""
         from mcp_server.helper.source_validator import SourceValidator
@@ -63,7 +73,7 @@ class TestSourceValidator:
         assert result["score"] > 0
         assert result["tier"] in ["S", "A", "B"]
 
-    @patch("mcp_server.helper.source_validator.requests.get")
+    @patch("requests.get")
     def test_validate_url_dead_site(self, mock_get):
         """Test URL validation for a dead site."""
         from mcp_server.helper.source_validator import SourceValidator
@@ -78,6 +88,1058 @@ class TestSourceValidator:
         assert result["status"] == "dead"
         assert result["tier"] == "C"
 
+    @patch("requests.get")
+    def test_validate_url_uses_cache(self, mock_get):
+        """Test cached checks skip the network and still apply the current confidence."""
+        from mcp_server.helper.source_validator import SourceValidator
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        mock_get.return_value = MagicMock(
+            status_code=200, content=b"<html><head><meta name='author' content='T'></head></html>"
+        )
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SQLiteCache(Path(tmpdir) / "cache.sqlite3", max_entries=10)
+            validator = SourceValidator(cache=cache)
+
+            first = validator.validate_url("https://example.com/a?utm=1", tavily_confidence=0.8)
+            second = validator.validate_url("https://example.com/a", tavily_confidence=0.4)
+
+            assert mock_get.call_count == 1
+            assert first["score"] == 90 and first["tier"] == "S"
+            assert second["score"] == 50 and second["tier"] == "B"
+            assert second["details"]["author"] == "T"
+
+    @pytest.mark.asyncio
+    async def test_arank_sources_matches_serial_ranking(self):
+        """Test the async ranking returns the same output as the serial path."""
+        import httpx
+
+        from mcp_server.helper.source_validator import SourceValidator
+
+        pages = {
+            "https://example.com/a": (
+                200,
+                b"<html><head><meta name='author' content='A'></head></html>",
+            ),
+            "https://example.com/b": (404, b""),
+            "https://school.edu/c": (
+                200,
+                b"<html><head><meta name='date' content='2026'></head></html>",
+            ),
+        }
+
+        def fake_get(url, **_kwargs):
+            status, content = pages[url]
+            return MagicMock(status_code=status, content=content)
+
+        def handler(request):
+            status, content = pages[str(request.url)]
+            return httpx.Response(status, content=content)
+
+        raw_results = [
+            {"url": "https://example.com/a?utm_source=x", "score": 0.65},
+            {"url": "https://example.com/b", "score": 0.9},
+            {"url": "https://school.edu/c", "score": 0.6},
+        ]
+
+        with patch("requests.get", side_effect=fake_get):
+            serial = SourceValidator().rank_sources(raw_results)
+
+        validator = SourceValidator(per_host_concurrency=1, transport=httpx.MockTransport(handler))
+        concurrent = await validator.arank_sources(raw_results)
+        await validator.aclose()
+
+        assert concurrent == serial
+        assert [r["validation"]["tier"] for r in concurrent] == ["S", "A", "C"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("budget", [{"top_k": 2}, {"time_budget": 0.5}])
+    async def test_arank_sources_budgeted_skips_slow_sources(self, budget):
+        """Test budgeted ranking returns early without waiting for the slow candidates."""
+        import asyncio
+
+        import httpx
+
+        from mcp_server.helper.source_validator import SourceValidator
+
+        async def handler(request):
+            if request.url.host == "slow.com":
+                await asyncio.sleep(5)
+            return httpx.Response(200, content=b"<html><meta name='author' content='A'></html>")
+
+        raw_results = [
+            {"url": "https://slow.com/a", "score": 0.95},
+            {"url": "https://fast.gov/b", "score": 0.7},
+            {"url": "https://fast.edu/c", "score": 0.6},
+        ]
+
+        validator = SourceValidator(transport=httpx.MockTransport(handler))
+        start = time.perf_counter()
+        ranked = await validator.arank_sources(raw_results, **budget)
+        await validator.aclose()
+
+        assert time.perf_counter() - start < 2
+        assert [r["url"] for r in ranked] == ["https://fast.gov/b", "https://fast.edu/c"]
+        assert all(r["validation"]["tier"] == "S" for r in ranked)
+
+    def test_closes_client_of_previous_loop(self):
+        """Test a validator used from a new event loop closes the HTTP client of the old one."""
+        import asyncio
+
+        import httpx
+
+        from mcp_server.helper.source_validator import SourceValidator
+
+        validator = SourceValidator(
+            transport=httpx.MockTransport(lambda _: httpx.Response(200, content=b"<html></html>"))
+        )
+        asyncio.run(validator.avalidate_url("https://a.com", tavily_confidence=0.8))
+        first = validator._client
+        asyncio.run(validator.avalidate_url("https://b.com", tavily_confidence=0.8))
+
+        assert first.is_closed
+        assert validator._client is not first and not validator._client.is_closed
+        asyncio.run(validator.aclose())
+        assert validator._client is None
+
+
+class TestURLRegistry:
+    """Tests for the workflow-scoped URLRegistry."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_checks_share_one_fetch(self):
+        """Test concurrent and later callers reuse the single check of a URL within a run."""
+        import asyncio
+
+        from mcp_server.helper.url_registry import URLRegistry
+
+        registry = URLRegistry(max_runs=2)
+        calls = []
+
+        async def check():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "live", {}
+
+        results = await asyncio.gather(*(registry.check("run", "url", check) for _ in range(3)))
+        await registry.check("run", "url", check)
+        await registry.check("other-run", "url", check)
+
+        assert results == [("live", {})] * 3
+        assert len(calls) == 2
+        assert registry.stats("run") == {
+            "fetched": 1,
+            "reused": 1,
+            "joined_in_flight": 2,
+            "saved": 3,
+        }
+
+    @pytest.mark.asyncio
+    async def test_validator_fetches_each_url_once_per_run(self):
+        """Test URLs repeated across queries of a run are fetched once."""
+        import httpx
+
+        from mcp_server.helper.source_validator import SourceValidator
+
+        requests_seen = []
+
+        def handler(request):
+            requests_seen.append(str(request.url))
+            return httpx.Response(200, content=b"<html></html>")
+
+        validator = SourceValidator(transport=httpx.MockTransport(handler))
+        query_results = [
+            [
+                {"url": "https://a.com/x?utm=1", "score": 0.9},
+                {"url": "https://b.com", "score": 0.8},
+            ],
+            [{"url": "https://a.com/x", "score": 0.5}],
+        ]
+        for results in query_results:
+            await validator.arank_sources(results, run_id="run-1")
+        await validator.aclose()
+
+        assert sorted(requests_seen) == ["https://a.com/x", "https://b.com"]
+        assert validator.registry.stats("run-1")["saved"] == 1
+
+
+class TestRequestCoalescer:
+    """Tests for the process-wide RequestCoalescer."""
+
+    @pytest.mark.asyncio
+    async def test_coalesces_only_in_flight_requests(self):
+        """Test identical concurrent requests share one call, later ones go upstream again."""
+        import asyncio
+
+        from mcp_server.helper.coalescer import RequestCoalescer
+
+        coalescer = RequestCoalescer(max_in_flight=10)
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return len(calls)
+
+        results = await asyncio.gather(*(coalescer.run("key", upstream) for _ in range(4)))
+        assert results == [1, 1, 1, 1]
+
+        assert await coalescer.run("key", upstream) == 2
+        assert coalescer.stats() == {"calls": 5, "coalesced": 3, "bypassed": 0, "in_flight": 0}
+
+    @pytest.mark.asyncio
+    async def test_errors_reach_every_waiter(self):
+        """Test a failing upstream call raises for all the coalesced callers."""
+        import asyncio
+
+        from mcp_server.helper.coalescer import RequestCoalescer
+
+        coalescer = RequestCoalescer(max_in_flight=10)
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        results = await asyncio.gather(
+            *(coalescer.run("key", upstream) for _ in range(2)), return_exceptions=True
+        )
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+class TestMetadataScanner:
+    """Tests for the streaming MetadataScanner."""
+
+    @pytest.mark.parametrize(
+        "html",
+        [
+            '<html><head><meta name="author" content="John Doe"></head></html>',
+            '<html><head><meta property="article:author" content="Jane">'
+            '<meta property="article:published_time" content="2026-01-01"></head></html>',
+            "<html><body><time>March <b>3</b>, 2025</time><h3>Works <i>Cited</i></h3></body></html>",
+            '<html><body><time datetime="x" content="2024-05-05">May</time><h2>Intro</h2></body></html>',
+            '<html><head><meta name="date"><meta name="author"></head><body><h5>Sources</h5></body></html>',
+            "",
+        ],
+    )
+    def test_matches_get_metadata(self, html):
+        """Test the scanner returns the same dict as the BeautifulSoup extraction."""
+        from bs4 import BeautifulSoup
+
+        from mcp_server.helper.metadata_scanner import MetadataScanner
+        from mcp_server.helper.source_validator import SourceValidator
+
+        scanner = MetadataScanner()
+        for i in range(0, len(html), 7):
+            scanner.feed(html[i : i + 7])
+
+        expected = SourceValidator().get_metadata(BeautifulSoup(html, "html.parser"))
+        assert scanner.metadata() == expected
+
+    @pytest.mark.asyncio
+    async def test_streaming_fetch_stops_at_byte_cap(self):
+        """Test the streaming fetch stops reading after the byte cap."""
+        import httpx
+
+        from mcp_server.helper.source_validator import SourceValidator
+
+        sent = []
+
+        async def body():
+            for chunk in [
+                b"<html><head><meta name='author' content='A'></head><body>",
+                b"<p>" + b"x" * 4096 + b"</p>",
+                b"<time>2026</time><h2>References</h2></body></html>",
+            ]:
+                sent.append(chunk)
+                yield chunk
+
+        transport = httpx.MockTransport(lambda _request: httpx.Response(200, content=body()))
+        validator = SourceValidator(transport=transport, max_fetch_bytes=1024)
+        result = await validator.avalidate_url("https://example.com", tavily_confidence=0.5)
+        await validator.aclose()
+
+        assert result["details"] == {"author": "A", "date": None, "has_references": False}
+        assert len(sent) == 2
+
+
+class TestSQLiteCache:
+    """Tests for the SQLiteCache helper."""
+
+    def test_expired_entries_are_missing(self):
+        """Test entries are not returned once their TTL is over."""
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SQLiteCache(Path(tmpdir) / "cache.sqlite3", max_entries=10)
+            cache.set("live", {"status": "live"}, ttl=60)
+            cache.set("dead", {"status": "dead"}, ttl=-1)
+
+            assert cache.get("live") == {"status": "live"}
+            assert cache.get("dead") is None
+
+    def test_evicts_least_recently_used(self):
+        """Test the cache stays within its size bound by evicting the least recently used keys."""
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SQLiteCache(Path(tmpdir) / "cache.sqlite3", max_entries=2, evict_interval=0)
+            now = time.time()
+            clock = [now, now + 1, now + 2, now + 3]
+            with patch("mcp_server.helper.sqlite_cache.time.time", side_effect=clock):
+                cache.set("a", 1, ttl=60)
+                cache.set("b", 2, ttl=60)
+                cache.get("a")
+                cache.set("c", 3, ttl=60)
+
+            assert len(cache) == 2
+            assert cache.get("b") is None
+            assert cache.get("a") == 1 and cache.get("c") == 3
+
+    def test_evicts_periodically(self):
+        """Test writes only evict once every `evict_interval` seconds."""
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SQLiteCache(Path(tmpdir) / "cache.sqlite3", max_entries=1, evict_interval=60)
+            now = time.time()
+            clock = [now, now + 1, now + 61]
+            with patch("mcp_server.helper.sqlite_cache.time.time", side_effect=clock):
+                cache.set("a", 1, ttl=600)
+                cache.set("b", 2, ttl=600)
+                assert len(cache) == 2
+
+                cache.set("c", 3, ttl=600)
+            assert len(cache) == 1
+            assert cache.get("c") == 3
+
+            cache.set("d", 4, ttl=600)
+            cache.evict()
+            assert len(cache) == 1
+
+    def test_locked_store_is_a_miss(self):
+        """Test a store locked by another process past the timeout gives misses, not errors."""
+        import sqlite3
+
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "cache.sqlite3"
+            cache = SQLiteCache(path, max_entries=10, timeout=0.05)
+            cache.set("a", 1, ttl=60)
+
+            other = sqlite3.connect(str(path), isolation_level=None)
+            other.execute("BEGIN EXCLUSIVE")
+            try:
+                assert cache.get("a") is None
+                cache.set("b", 2, ttl=60)
+            finally:
+                other.execute("ROLLBACK")
+                other.close()
+
+            assert cache.get("a") == 1
+            assert cache.get("b") is None
+
+    def test_store_is_opened_on_first_use(self):
+        """Test creating a cache does not touch the disk, and a corrupt file gives misses."""
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "caches" / "cache.sqlite3"
+            cache = SQLiteCache(path, max_entries=10)
+            assert not path.parent.exists()
+
+            path.parent.mkdir()
+            path.write_bytes(b"not a database" * 100)
+            cache.set("a", 1, ttl=60)
+            assert cache.get("a") is None
+
+            path.unlink()
+            cache.set("a", 1, ttl=60)
+            assert cache.get("a") == 1
+
+    @pytest.mark.asyncio
+    async def test_async_methods(self):
+        """Test the async methods read and write the same store."""
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = SQLiteCache(Path(tmpdir) / "cache.sqlite3", max_entries=10)
+            await cache.aset("a", {"status": "live"}, ttl=60)
+
+            assert await cache.aget("a") == {"status": "live"}
+            assert cache.get("a") == {"status": "live"}
+            assert await cache.aget("b") is None
+
+
+class TestLLMCache:
+    """Tests for the LLM response cache."""
+
+    def test_make_key_depends_on_model_messages_and_schema(self):
+        """Test the key changes with the model, the messages and the response schema."""
+        from mcp_server.agents.planner.schemas import PresentationPlan
+        from mcp_server.agents.researcher.schemas import ResearchSummary
+        from mcp_server.helper.llm_cache import LLMCache
+
+        messages = [{"role": "user", "content": "AI"}]
+        key = LLMCache.make_key("gpt-4o-mini", messages, PresentationPlan)
+
+        assert key == LLMCache.make_key("gpt-4o-mini", list(messages), PresentationPlan)
+        assert key != LLMCache.make_key("gpt-4o", messages, PresentationPlan)
+        assert key != LLMCache.make_key(
+            "gpt-4o-mini", [{"role": "user", "content": "ML"}], PresentationPlan
+        )
+        assert key != LLMCache.make_key("gpt-4o-mini", messages, ResearchSummary)
+
+    @pytest.mark.asyncio
+    async def test_parse_completion_caches_accepted_responses(self):
+        """Test hits skip the client, disk hits are parsed back and rejected responses are not stored."""
+        from core.settings import settings
+        from mcp_server.agents.researcher.schemas import Fact, ResearchSummary
+        from mcp_server.helper.llm_cache import LLMCache
+        from mcp_server.helper.llm_client import parse_completion
+        from mcp_server.helper.memory_cache import MemoryCache
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        summary = ResearchSummary(
+            slide_topic="AI", facts=[Fact(content="fact", source_url="https://a.com")]
+        )
+        client = MagicMock()
+        client.beta.chat.completions.parse = AsyncMock(
+            return_value=MagicMock(choices=[MagicMock(message=MagicMock(parsed=summary))])
+        )
+        messages = [{"role": "user", "content": "AI"}]
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache = LLMCache(
+                ttl=60,
+                memory=MemoryCache(max_entries=10),
+                store=SQLiteCache(Path(tmpdir) / "llm.sqlite3", max_entries=10),
+            )
+            with (
+                patch.object(settings, "LLM_CACHE_ENABLED", True),
+                patch("mcp_server.helper.llm_client.llm_cache", cache),
+            ):
+                rejected = await parse_completion(
+                    client, "gpt-4o-mini", messages, ResearchSummary, accept=lambda _: False
+                )
+                first = await parse_completion(client, "gpt-4o-mini", messages, ResearchSummary)
+                memory_hit = await parse_completion(
+                    client, "gpt-4o-mini", messages, ResearchSummary
+                )
+                cache.memory.clear()
+                disk_hit = await parse_completion(client, "gpt-4o-mini", messages, ResearchSummary)
+                skipped = await parse_completion(
+                    client, "gpt-4o-mini", messages, ResearchSummary, use_cache=False
+                )
+
+        assert not rejected.cache_hit and not first.cache_hit and not skipped.cache_hit
+        assert memory_hit.cache_hit and memory_hit.parsed == summary
+        assert disk_hit.cache_hit and disk_hit.parsed == summary
+        assert client.beta.chat.completions.parse.call_count == 3
+        assert cache.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 2}
+
+    @pytest.mark.asyncio
+    async def test_failing_store_falls_back_to_the_model(self):
+        """Test a failing cache store or an invalid stored payload is a miss, not a failed call."""
+        import sqlite3
+
+        from core.settings import settings
+        from mcp_server.agents.researcher.schemas import ResearchSummary
+        from mcp_server.helper.llm_cache import LLMCache
+        from mcp_server.helper.llm_client import parse_completion
+        from mcp_server.helper.memory_cache import MemoryCache
+
+        summary = ResearchSummary(slide_topic="AI", facts=[])
+        client = MagicMock()
+        client.beta.chat.completions.parse = AsyncMock(
+            return_value=MagicMock(choices=[MagicMock(message=MagicMock(parsed=summary))])
+        )
+        messages = [{"role": "user", "content": "AI"}]
+        locked = sqlite3.OperationalError("database is locked")
+        stores = [
+            MagicMock(aget_entry=AsyncMock(side_effect=locked), aset=AsyncMock(side_effect=locked)),
+            MagicMock(
+                aget_entry=AsyncMock(return_value=({"slide_topic": 1}, time.time() + 60)),
+                aset=AsyncMock(),
+            ),
+        ]
+
+        for store in stores:
+            cache = LLMCache(ttl=60, memory=MemoryCache(max_entries=10), store=store)
+            with (
+                patch.object(settings, "LLM_CACHE_ENABLED", True),
+                patch("mcp_server.helper.llm_client.llm_cache", cache),
+            ):
+                result = await parse_completion(client, "gpt-4o-mini", messages, ResearchSummary)
+
+            assert not result.cache_hit and result.parsed == summary
+            assert store.aset.await_count == 1
+            assert cache.stats()["misses"] == 1
+        assert client.beta.chat.completions.parse.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_disk_hits_are_promoted_for_their_remaining_ttl(self):
+        """Test a disk hit is parsed, and kept in memory only until its entry expires on disk."""
+        from mcp_server.agents.researcher.schemas import ResearchSummary
+        from mcp_server.helper.llm_cache import LLMCache
+        from mcp_server.helper.memory_cache import MemoryCache
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        summary = ResearchSummary(slide_topic="AI", facts=[])
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SQLiteCache(Path(tmpdir) / "llm.sqlite3", max_entries=10)
+            cache = LLMCache(ttl=60, memory=MemoryCache(max_entries=10), store=store)
+            now = time.time()
+            with patch("mcp_server.helper.sqlite_cache.time.time", return_value=now - 50):
+                store.set("key", summary.model_dump(mode="json"), ttl=60)
+
+            assert await cache.get("key", ResearchSummary) == summary
+            assert cache.memory.get("key") == summary
+            with patch("mcp_server.helper.memory_cache.time.time", return_value=now + 11):
+                assert cache.memory.get("key") is None
+
+
+class TestOpenAIPool:
+    """Tests for the shared OpenAI client pool and its rate limiting."""
+
+    @pytest.mark.asyncio
+    async def test_agents_share_one_client(self):
+        """Test every agent gets the same pooled client."""
+        from mcp_server.agents.planner.agent import PlannerAgent
+        from mcp_server.agents.writer.agent import WriterAgent
+
+        assert PlannerAgent().client is WriterAgent().client
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_waits_for_token_budget(self):
+        """Test a request waits until the tokens-per-minute budget has refilled enough."""
+        from mcp_server.helper.openai_pool import RateLimiter
+
+        clock = [1000.0]
+
+        async def sleep(seconds):
+            clock[0] += seconds
+
+        with (
+            patch("mcp_server.helper.openai_pool.time.monotonic", side_effect=lambda: clock[0]),
+            patch("mcp_server.helper.openai_pool.asyncio.sleep", side_effect=sleep),
+        ):
+            limiter = RateLimiter(rpm=60, tpm=1200)
+            assert await limiter.acquire(1000) == 0
+            limiter.settle(1000, 800)
+            # 400 tokens left, 600 missing at 20 tokens per second
+            assert await limiter.acquire(1000) == pytest.approx(30.0)
+
+    @pytest.mark.asyncio
+    async def test_run_retries_rate_limited_requests_after_retry_after(self):
+        """Test a 429 is retried after the server's retry-after, then succeeds."""
+        import httpx
+        import openai
+
+        from mcp_server.helper.openai_pool import OpenAIPool
+
+        pool = OpenAIPool(
+            api_key="x",
+            max_connections=2,
+            rate_limits={"gpt-4o": (10, 10_000)},
+            max_retries=2,
+            backoff_base=1.0,
+            backoff_max=60.0,
+        )
+        response = httpx.Response(
+            429,
+            headers={"retry-after": "2"},
+            request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"),
+        )
+        completion = MagicMock(usage=MagicMock(total_tokens=100))
+        func = AsyncMock(
+            side_effect=[
+                openai.RateLimitError("Rate limited", response=response, body=None),
+                completion,
+            ]
+        )
+
+        with patch(
+            "mcp_server.helper.openai_pool.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            result = await pool.run("gpt-4o", 500, func)
+
+        assert result is completion
+        mock_sleep.assert_awaited_once_with(2.0)
+        assert pool.stats()["retries"] == 1
+        assert pool.stats()["rate_limited"] == 1
+        assert pool.stats()["requests"] == 2
+
+
+class TestJobMetrics:
+    """Tests for the per-job token, cost and latency accounting."""
+
+    @pytest.mark.asyncio
+    async def test_records_llm_and_tool_calls_per_stage(self):
+        """Test LLM usage and tool calls are attributed to their stage and saved as a report."""
+        from openai.types import CompletionUsage
+        from openai.types.completion_usage import PromptTokensDetails
+
+        from mcp_server.agents.researcher.schemas import ResearchSummary
+        from mcp_server.helper.job_metrics import JobMetrics, MeteredSession, current_job, stage
+        from mcp_server.helper.llm_client import parse_completion
+
+        usage = CompletionUsage(
+            prompt_tokens=1000,
+            completion_tokens=200,
+            total_tokens=1200,
+            prompt_tokens_details=PromptTokensDetails(cached_tokens=400),
+        )
+        client = MagicMock()
+        client.beta.chat.completions.parse = AsyncMock(
+            return_value=MagicMock(choices=[MagicMock(message=MagicMock(parsed=None))], usage=usage)
+        )
+        session = MeteredSession(AsyncMock())
+
+        metrics = JobMetrics(pprt_id="deck-123")
+        token = current_job.set(metrics)
+        try:
+            with stage("writing"):
+                await parse_completion(client, "gpt-4o", [], ResearchSummary, agent="writer")
+            with stage("illustration"):
+                await session.call_tool("generate_chart", arguments={})
+        finally:
+            current_job.reset(token)
+        metrics.finish("completed")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = metrics.save(Path(tmpdir))
+            report = json.loads(path.read_text())
+
+        assert path.name == "deck-123.report.json"
+        assert report["status"] == "completed"
+        writing = report["stages"]["writing"]
+        assert writing["llm_calls"] == 1
+        assert writing["prompt_tokens"] == 1000
+        assert writing["cached_tokens"] == 400
+        # 600 input, 400 cached input and 200 output tokens at gpt-4o prices
+        assert writing["cost_usd"] == pytest.approx(0.004)
+        assert report["stages"]["illustration"]["tool_calls"] == 1
+        assert report["tools"]["generate_chart"]["calls"] == 1
+        assert report["totals"]["completion_tokens"] == 200
+        assert report["agents"]["writer"]["cached_rate"] == pytest.approx(0.4)
+
+
+class TestMCPSessionPool:
+    """Tests for the pool of long-lived MCP server sessions."""
+
+    @staticmethod
+    def _pool(max_jobs=2, sessions=None):
+        """Builds a pool of one server whose sessions are mocks, appended to `sessions`."""
+        from contextlib import asynccontextmanager
+
+        from mcp_server.session_pool import MCPSessionPool, PooledSession
+
+        sessions = sessions if sessions is not None else []
+
+        class FakePooledSession(PooledSession):
+            @asynccontextmanager
+            async def _open(self):
+                session = MagicMock(send_ping=AsyncMock())
+                sessions.append(session)
+                yield session
+
+        pool = MCPSessionPool(
+            size=1,
+            max_jobs=max_jobs,
+            health_check_timeout=1,
+            start_timeout=1,
+            session_factory=FakePooledSession,
+        )
+        return pool, sessions
+
+    @pytest.mark.asyncio
+    async def test_reuses_warm_sessions_and_recycles_after_max_jobs(self):
+        """Test jobs share a running server until it has served `max_jobs` jobs."""
+        pool, sessions = self._pool(max_jobs=2)
+        await pool.start()
+
+        used = []
+        for _ in range(3):
+            async with pool.session() as (session, warm):
+                used.append((session, warm))
+
+        assert used[0] == (sessions[0], True)
+        assert used[1] == (sessions[0], True)
+        # The server was replaced in the background after its second job
+        assert used[2] == (sessions[1], True)
+        assert pool.stats()["recycled"] == 1
+        assert pool.stats()["warm_starts"] == 3
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_replaces_crashed_session_on_checkout(self):
+        """Test a session failing its health check is replaced by a cold-started server."""
+        from mcp_server.helper.job_metrics import JobMetrics, current_job
+        from mcp_server.workflow import _mcp_session
+
+        pool, sessions = self._pool()
+        await pool.start()
+        sessions[0].send_ping.side_effect = ConnectionError("Server exited")
+
+        metrics = JobMetrics(pprt_id="deck-123")
+        token = current_job.set(metrics)
+        try:
+            async with _mcp_session(pool, "stdio") as session:
+                assert session is sessions[1]
+        finally:
+            current_job.reset(token)
+
+        assert metrics.report()["mcp_session"]["start"] == "cold"
+        assert pool.stats()["crashed"] == 1
+        assert pool.stats()["cold_starts"] == 1
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_connects_to_shared_server_by_url(self):
+        """Test a run given a server URL connects over HTTP instead of using the pool."""
+        from contextlib import asynccontextmanager
+
+        from mcp_server.helper.job_metrics import JobMetrics, current_job
+        from mcp_server.workflow import _mcp_session
+
+        shared = MagicMock()
+        urls = []
+
+        @asynccontextmanager
+        async def open_http_session(url):
+            urls.append(url)
+            yield shared
+
+        pool = MagicMock()
+        metrics = JobMetrics(pprt_id="deck-123")
+        token = current_job.set(metrics)
+        try:
+            with patch("mcp_server.workflow.open_http_session", open_http_session):
+                async with _mcp_session(pool, "stdio", "http://mcp:8001/mcp") as session:
+                    assert session is shared
+        finally:
+            current_job.reset(token)
+
+        assert urls == ["http://mcp:8001/mcp"]
+        pool.session.assert_not_called()
+        assert metrics.report()["mcp_session"]["start"] == "warm"
+
+
+class TestJobQueue:
+    """Tests for the persistent job queue."""
+
+    @pytest.fixture
+    def queue(self):
+        from mcp_server.job_queue import JobQueue
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield JobQueue(Path(tmpdir) / "jobs.sqlite3", max_attempts=2, stale_after=60)
+
+    def test_jobs_are_claimed_in_order(self, queue):
+        """Test jobs are claimed oldest first, once, and keep their final state."""
+        queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+        queue.enqueue("deck-2", {"topic": "ML", "num_slides": 4})
+
+        first = queue.claim("worker-a")
+        second = queue.claim("worker-b")
+        assert queue.claim("worker-a") is None
+        assert queue.finish("deck-1", "worker-a", "done")
+        assert queue.finish("deck-2", "worker-b", "failed", error="Planner failed")
+
+        assert (first["id"], first["payload"], first["status"]) == (
+            "deck-1",
+            {"topic": "AI", "num_slides": 3},
+            "running",
+        )
+        assert (second["id"], second["worker"], second["attempts"]) == ("deck-2", "worker-b", 1)
+        assert queue.get("deck-1")["status"] == "done"
+        assert queue.get("deck-2")["error"] == "Planner failed"
+        assert queue.counts() == {"queued": 0, "running": 0, "done": 1, "failed": 1}
+
+    def test_jobs_survive_a_restart(self, queue):
+        """Test a new queue on the same file sees the queued jobs."""
+        from mcp_server.job_queue import JobQueue
+
+        queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+        reopened = JobQueue(queue.path, max_attempts=2, stale_after=60)
+
+        assert reopened.claim("worker-a")["id"] == "deck-1"
+
+    def test_released_job_does_not_use_an_attempt(self, queue):
+        """Test a job released by a stopping worker is queued again with its attempts."""
+        queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+        queue.claim("worker-a")
+        queue.release("deck-1", "worker-a")
+
+        job = queue.get("deck-1")
+        assert (job["status"], job["attempts"], job["worker"]) == ("queued", 0, None)
+        assert queue.claim("worker-b")["attempts"] == 1
+
+    def test_lost_jobs_are_requeued_then_failed(self, queue):
+        """Test the jobs of a dead worker, or with a stale heartbeat, are queued again until
+        they used up their attempts."""
+        queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+        queue.claim("worker-a")
+        assert queue.requeue_worker("worker-a") == 1
+        assert queue.get("deck-1")["status"] == "queued"
+
+        queue.claim("worker-b")
+        with patch("mcp_server.job_queue.time.time", return_value=time.time() + 120):
+            assert queue.claim("worker-c") is None
+
+        job = queue.get("deck-1")
+        assert (job["status"], job["attempts"]) == ("failed", 2)
+        assert job["error"] == "The worker stopped responding 2 times"
+
+    def test_stale_worker_cannot_finish_a_requeued_job(self, queue):
+        """Test a worker whose job was queued again and claimed by another worker cannot
+        finish, release or heartbeat it."""
+        queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+        queue.claim("worker-a")
+        with patch("mcp_server.job_queue.time.time", return_value=time.time() + 120):
+            assert queue.claim("worker-b")["worker"] == "worker-b"
+
+        assert not queue.finish("deck-1", "worker-a", "failed", error="Stale")
+        queue.release("deck-1", "worker-a")
+        queue.heartbeat("worker-a", ["deck-1"])
+        job = queue.get("deck-1")
+        assert (job["status"], job["worker"], job["error"]) == ("running", "worker-b", None)
+        assert job["heartbeat_at"] > time.time() + 60
+
+        assert queue.finish("deck-1", "worker-b", "done")
+        assert queue.get("deck-1")["status"] == "done"
+
+    def test_heartbeat_keeps_running_jobs(self, queue):
+        """Test a heartbeated job is not taken for lost."""
+        queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+        queue.claim("worker-a")
+        with patch("mcp_server.job_queue.time.time", return_value=time.time() + 50):
+            queue.heartbeat("worker-a", ["deck-1"])
+        with patch("mcp_server.job_queue.time.time", return_value=time.time() + 100):
+            queue.claim("worker-b")
+
+        assert queue.get("deck-1")["worker"] == "worker-a"
+
+
+class TestJobWorker:
+    """Tests for the job workers."""
+
+    @pytest.fixture
+    def queue(self):
+        from mcp_server.job_queue import JobQueue
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            yield JobQueue(Path(tmpdir) / "jobs.sqlite3", max_attempts=3, stale_after=60)
+
+    def worker(self, queue, run_job, concurrency=2, shutdown_timeout=5.0):
+        from mcp_server.job_worker import JobWorker
+
+        return JobWorker(
+            queue,
+            "worker-a",
+            run_job,
+            concurrency=concurrency,
+            poll_interval=0.01,
+            heartbeat_interval=0.01,
+            shutdown_timeout=shutdown_timeout,
+        )
+
+    @pytest.mark.asyncio
+    async def test_runs_jobs_with_bounded_concurrency(self, queue):
+        """Test the worker runs the queued jobs, at most `concurrency` at a time, and records
+        their state."""
+        import asyncio
+
+        for i in range(5):
+            queue.enqueue(f"deck-{i}", {"topic": f"T{i}", "num_slides": 3})
+        running = []
+        peak = 0
+
+        async def run_job(job):
+            nonlocal peak
+            running.append(job["id"])
+            peak = max(peak, len(running))
+            await asyncio.sleep(0.05)
+            running.remove(job["id"])
+            if job["id"] == "deck-3":
+                raise RuntimeError("Writer failed")
+            if queue.counts()["queued"] == 0 and len(running) == 0:
+                worker.stop()
+
+        worker = self.worker(queue, run_job)
+        await asyncio.wait_for(worker.run(), 5)
+
+        assert peak == 2
+        assert queue.counts() == {"queued": 0, "running": 0, "done": 4, "failed": 1}
+        assert queue.get("deck-3")["error"] == "Writer failed"
+
+    @pytest.mark.asyncio
+    async def test_shutdown_drains_or_requeues_running_jobs(self, queue):
+        """Test a stopping worker lets the short jobs finish and queues the long ones again."""
+        import asyncio
+
+        queue.enqueue("short", {"topic": "A", "num_slides": 3})
+        queue.enqueue("long", {"topic": "B", "num_slides": 3})
+        started = []
+
+        async def run_job(job):
+            started.append(job["id"])
+            if len(started) == 2:
+                worker.stop()
+            await asyncio.sleep(0.05 if job["id"] == "short" else 10)
+
+        worker = self.worker(queue, run_job, shutdown_timeout=0.2)
+        await asyncio.wait_for(worker.run(), 5)
+
+        assert queue.get("short")["status"] == "done"
+        long = queue.get("long")
+        assert (long["status"], long["attempts"]) == ("queued", 0)
+
+    @pytest.mark.asyncio
+    async def test_serve_shares_agents_and_stops_on_sigterm(self, queue):
+        """Test a worker process runs the workflow with its shared agents and MCP servers, and
+        shuts down gracefully on SIGTERM."""
+        import asyncio
+        import os
+        import signal
+
+        from core.settings import settings
+        from mcp_server.job_worker import serve
+
+        queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+        queue.enqueue("deck-2", {"topic": "ML", "num_slides": 4})
+        pool = MagicMock(start=AsyncMock(), close=AsyncMock())
+
+        async def run_ppt_workflow(**_):
+            if mock_workflow.await_count == 2:
+                os.kill(os.getpid(), signal.SIGTERM)
+
+        with (
+            patch("mcp_server.job_worker.job_queue", queue),
+            patch(
+                "mcp_server.workflow.run_ppt_workflow", side_effect=run_ppt_workflow
+            ) as mock_workflow,
+            patch("mcp_server.session_pool.MCPSessionPool", return_value=pool),
+            patch("mcp_server.agents.registry.AgentRegistry") as mock_registry,
+            patch.object(settings, "MCP_TRANSPORT", "stdio"),
+            patch.object(settings, "MCP_POOL_SIZE", 1),
+            patch.object(settings, "JOB_WORKER_CONCURRENCY", 1),
+            patch.object(settings, "JOB_POLL_INTERVAL", 0.01),
+        ):
+            await asyncio.wait_for(serve("worker-a"), 5)
+
+        calls = mock_workflow.await_args_list
+        assert [call.kwargs["filename"] for call in calls] == ["deck-1", "deck-2"]
+        assert calls[1].kwargs["topic"] == "ML" and calls[1].kwargs["num_slides"] == 4
+        assert all(call.kwargs["agents"] is mock_registry.return_value for call in calls)
+        assert all(call.kwargs["sessions"] is pool for call in calls)
+        assert queue.counts()["done"] == 2
+        pool.start.assert_awaited_once()
+        pool.close.assert_awaited_once()
+
+    def test_dead_workers_are_replaced_and_their_jobs_requeued(self, queue):
+        """Test the supervisor replaces a worker process that died and queues its jobs again."""
+        from mcp_server.job_worker import JobWorkers
+
+        # print exits right away: a worker that dies
+        workers = JobWorkers(1, queue, shutdown_timeout=1.0, target=print)
+        workers.start()
+        try:
+            [(worker_id, process)] = workers._workers.items()
+            queue.enqueue("deck-1", {"topic": "AI", "num_slides": 3})
+            queue.claim(worker_id)
+            process.join(10)
+
+            assert workers.check() == 1
+            assert queue.get("deck-1")["status"] == "queued"
+            assert worker_id not in workers._workers and len(workers._workers) == 1
+        finally:
+            workers.stop()
+
+
+class TestLocalSession:
+    """Tests for the in-process tool transport."""
+
+    @pytest.mark.asyncio
+    async def test_calls_tools_in_process(self):
+        """Test async tools run on the loop, sync ones in the worker thread, errors as results."""
+        import threading
+
+        from mcp_server.local_session import LocalSession
+
+        threads = []
+
+        async def search_web(query: str) -> str:
+            threads.append(threading.current_thread())
+            return f"results for {query}"
+
+        def generate_chart(title: str) -> str:
+            threads.append(threading.current_thread())
+            if not title:
+                raise ValueError("No title")
+            return f"{title}.png"
+
+        session = LocalSession(tools={"search_web": search_web, "generate_chart": generate_chart})
+
+        search = await session.call_tool("search_web", arguments={"query": "AI"})
+        chart = await session.call_tool("generate_chart", arguments={"title": "Sales"})
+        failed = await session.call_tool("generate_chart", arguments={"title": ""})
+        unknown = await session.call_tool("missing", arguments={})
+
+        assert search.content[0].text == "results for AI" and not search.isError
+        assert chart.content[0].text == "Sales.png" and not chart.isError
+        assert threads[0] is threading.main_thread()
+        assert threads[1] is not threading.main_thread()
+        assert failed.isError and "No title" in failed.content[0].text
+        assert unknown.isError
+
+    @pytest.mark.asyncio
+    async def test_server_tools_are_exposed(self):
+        """Test the in-process transport exposes every tool of the MCP server."""
+        from mcp_server.local_session import LocalSession
+
+        session = LocalSession()
+        tools = await session.list_tools()
+
+        assert {tool.name for tool in tools.tools} == set(session.tools)
+        result = await session.call_tool(
+            "generate_chart", arguments={"data_json": "not json", "chart_type": "bar", "title": "T"}
+        )
+        assert result.content[0].text == "Error: Invalid JSON string provided."
+
+
+class TestStartupImports:
+    """Tests the API and the MCP server start without loading the heavy dependencies."""
+
+    @pytest.mark.parametrize(
+        ("module", "deferred"),
+        [
+            ("mcp_server.mcp_server", ["matplotlib", "numpy", "pptx", "tavily", "bs4", "requests"]),
+            ("main", ["mcp_server.workflow", "openai", "mcp", "matplotlib", "pptx", "tavily"]),
+        ],
+    )
+    def test_heavy_dependencies_are_imported_on_first_use(self, module, deferred):
+        """Test importing the module in a fresh interpreter leaves the dependencies unloaded."""
+        import subprocess
+        import sys
+
+        code = (
+            f"import json, sys; import {module}; "
+            f"print(json.dumps([m for m in {deferred!r} if m in sys.modules]))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent.parent,
+            env={**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "x")},
+        )
+
+        assert json.loads(result.stdout.splitlines()[-1]) == []
+
 
 class TestPlannerAgent:
     """Tests for PlannerAgent."""
@@ -162,6 +1224,183 @@ class TestPlannerAgent:
             assert result.topic == "Test"
             assert mock_parse.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_retries_are_scoped_to_each_call(self):
+        """Test a shared agent gets its full retry budget on every call."""
+        from mcp_server.agents.planner.agent import PlannerAgent
+        from mcp_server.agents.planner.schemas import (
+            PresentationPayload,
+            PresentationPlan,
+            SlidePlan,
+        )
+
+        agent = PlannerAgent()
+        payload = PresentationPayload(topic="Test", num_slides=2)
+        valid_plan = PresentationPlan(
+            topic="Test",
+            slides=[
+                SlidePlan(slide_number=i, title=f"Slide {i}", search_queries=["q"], content_goal="")
+                for i in range(2)
+            ],
+        )
+        empty = MagicMock(choices=[MagicMock(message=MagicMock(parsed=None))])
+        valid = MagicMock(choices=[MagicMock(message=MagicMock(parsed=valid_plan))])
+
+        with patch.object(
+            agent.client.beta.chat.completions, "parse", new_callable=AsyncMock
+        ) as mock_parse:
+            # Each call only succeeds on its last retry
+            mock_parse.side_effect = [empty, empty, empty, valid] * 2
+            first = await agent.create_presentation_plan(payload)
+            second = await agent.create_presentation_plan(payload)
+
+        assert first.topic == second.topic == "Test"
+        assert mock_parse.call_count == 8
+
+    @staticmethod
+    def _stream(partials, final_plan, between=None):
+        """Builds a fake streaming response: content deltas with the partial plans, then the
+        final completion. `between` is awaited after each delta."""
+
+        class FakeStream:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *args):
+                return False
+
+            async def __aiter__(self):
+                for partial in partials:
+                    yield MagicMock(type="content.delta", parsed=partial)
+                    if between is not None:
+                        await between()
+
+            async def get_final_completion(self):
+                return MagicMock(choices=[MagicMock(message=MagicMock(parsed=final_plan))])
+
+        return FakeStream()
+
+    @pytest.mark.asyncio
+    async def test_stream_presentation_plan_yields_slides_early(self):
+        """Test a slide is handed downstream as soon as the model starts the next one."""
+        import asyncio
+
+        from mcp_server.agents.planner.agent import PlannerAgent
+        from mcp_server.agents.planner.schemas import (
+            PresentationPayload,
+            PresentationPlan,
+            SlidePlan,
+        )
+
+        agent = PlannerAgent()
+        slides = [
+            SlidePlan(slide_number=i, title=f"Slide {i}", search_queries=["q"], content_goal="")
+            for i in range(3)
+        ]
+        dumped = [slide.model_dump() for slide in slides]
+        partials = [
+            {"topic": "Test", "slides": [{"slide_number": 0, "title": "Sli"}]},
+            {"topic": "Test", "slides": [dumped[0], {"slide_number": 1}]},
+            {"topic": "Test", "slides": [dumped[0], dumped[1], {"slide_number": 2}]},
+        ]
+        received = []
+        first_received = asyncio.Event()
+
+        deltas = []
+
+        async def wait_for_first():
+            # After the delta that starts slide 1, the stream only goes on once slide 0 has
+            # reached the consumer
+            deltas.append(None)
+            if len(deltas) == 2:
+                await asyncio.wait_for(first_received.wait(), timeout=1)
+
+        stream = self._stream(
+            partials, PresentationPlan(topic="Test", slides=slides), wait_for_first
+        )
+        with patch.object(agent.client.beta.chat.completions, "stream", return_value=stream):
+            payload = PresentationPayload(topic="Test", num_slides=3)
+            async for slide in agent.stream_presentation_plan(payload):
+                received.append(slide.title)
+                first_received.set()
+
+        assert received == ["Slide 0", "Slide 1", "Slide 2"]
+
+    @pytest.mark.asyncio
+    async def test_stream_presentation_plan_validates_slide_count(self):
+        """Test the slide-count check runs once the stream ends."""
+        from mcp_server.agents.planner.agent import PlannerAgent
+        from mcp_server.agents.planner.schemas import (
+            PresentationPayload,
+            PresentationPlan,
+            SlidePlan,
+        )
+
+        agent = PlannerAgent()
+        slides = [
+            SlidePlan(slide_number=i, title=f"Slide {i}", search_queries=["q"], content_goal="")
+            for i in range(2)
+        ]
+        partials = [{"topic": "Test", "slides": [slides[0].model_dump(), {"slide_number": 1}]}]
+        stream = self._stream(partials, PresentationPlan(topic="Test", slides=slides))
+        received = []
+
+        with patch.object(agent.client.beta.chat.completions, "stream", return_value=stream):
+            payload = PresentationPayload(topic="Test", num_slides=3)
+            with pytest.raises(ValueError, match="does not match"):
+                async for slide in agent.stream_presentation_plan(payload):
+                    received.append(slide.title)
+
+        assert received == ["Slide 0"]
+
+    @pytest.mark.asyncio
+    async def test_stream_presentation_plan_is_not_retried_once_used(self):
+        """Test a stream failing before any slide was yielded is retried, but one failing after
+        the first slide fails the plan instead of mixing two generations."""
+        import httpx
+        import openai
+
+        from mcp_server.agents.planner.agent import PlannerAgent
+        from mcp_server.agents.planner.schemas import (
+            PresentationPayload,
+            PresentationPlan,
+            SlidePlan,
+        )
+        from mcp_server.helper.llm_client import StreamInterruptedError
+        from mcp_server.helper.openai_pool import openai_pool
+
+        agent = PlannerAgent()
+        slides = [
+            SlidePlan(slide_number=i, title=f"Slide {i}", search_queries=["q"], content_goal="")
+            for i in range(2)
+        ]
+        plan = PresentationPlan(topic="Test", slides=slides)
+        started = {"topic": "Test", "slides": [{"slide_number": 0}]}
+        first_done = {"topic": "Test", "slides": [slides[0].model_dump(), {"slide_number": 1}]}
+
+        async def drop_connection():
+            raise openai.APIConnectionError(request=httpx.Request("POST", "https://api"))
+
+        payload = PresentationPayload(topic="Test", num_slides=2)
+        completions = agent.client.beta.chat.completions
+        with patch.object(openai_pool, "_backoff", return_value=0):
+            streams = [self._stream([started], plan, drop_connection), self._stream([], plan)]
+            with patch.object(completions, "stream", side_effect=streams) as mock_stream:
+                retried = [slide.title async for slide in agent.stream_presentation_plan(payload)]
+            assert retried == ["Slide 0", "Slide 1"]
+            assert mock_stream.call_count == 2
+
+            streams = [self._stream([first_done], plan, drop_connection), self._stream([], plan)]
+            received = []
+            with (
+                patch.object(completions, "stream", side_effect=streams) as mock_stream,
+                pytest.raises(StreamInterruptedError),
+            ):
+                async for slide in agent.stream_presentation_plan(payload):
+                    received.append(slide.title)
+            assert received == ["Slide 0"]
+            assert mock_stream.call_count == 1
+
 
 class TestResearcherAgent:
     """Tests for ResearcherAgent."""
@@ -186,6 +1425,40 @@ class TestResearcherAgent:
         assert result.slide_topic == "Test Slide"
         assert len(result.facts) == 0
 
+    @pytest.mark.asyncio
+    async def test_research_web_uses_batch_search(self):
+        """Test research_web runs all the queries in one batch call and skips failed ones."""
+        from mcp.types import TextContent
+
+        from mcp_server.agents.researcher.agent import ResearcherAgent
+        from mcp_server.agents.researcher.schemas import ResearcherPayload, ResearchSummary
+
+        agent = ResearcherAgent()
+        mock_session = AsyncMock()
+        batch = [
+            {"query": "q1", "results": [{"content": "Fact", "url": "https://a.com"}]},
+            {"query": "q2", "results": []},
+            {"query": "q3", "error": "API Error"},
+        ]
+        mock_session.call_tool.return_value = MagicMock(
+            content=[TextContent(type="text", text=json.dumps(batch))]
+        )
+        summary = ResearchSummary(slide_topic="Slide", facts=[])
+
+        with patch.object(
+            agent, "summarize_facts", new_callable=AsyncMock, return_value=summary
+        ) as mock_summarize:
+            payload = ResearcherPayload(
+                slide_title="Slide", search_queries=["q1", "q2", "q3"], run_id="run-1"
+            )
+            await agent.research_web(payload, mock_session)
+
+        mock_session.call_tool.assert_called_once_with(
+            "search_web_batch", arguments={"queries": ["q1", "q2", "q3"], "run_id": "run-1"}
+        )
+        raw_context = mock_summarize.call_args.args[0]
+        assert len(raw_context) == 1 and "https://a.com" in raw_context[0]
+
     @pytest.mark.asyncio
     async def test_summarize_facts_success(self):
         """Test successful fact summarization."""
@@ -250,26 +1523,251 @@ class TestWriterAgent:
             ],
         )
 
-        mock_response = MagicMock()
-        mock_response.choices = [MagicMock(message=MagicMock(parsed=mock_content))]
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock(message=MagicMock(parsed=mock_content))]
+
+        with patch.object(
+            agent.client.beta.chat.completions, "parse", new_callable=AsyncMock
+        ) as mock_parse:
+            mock_parse.return_value = mock_response
+
+            result = await agent.prepare_presentation(
+                topic="Test",
+                plan_json={"topic": "Test", "slides": []},
+                research_data=[],
+            )
+
+            assert result.filename_suggestion == "test_presentation"
+            assert len(result.slides) == 1
+
+    @pytest.mark.asyncio
+    async def test_write_presentation_calls_mcp_tool(self):
+        """Test write_presentation calls the MCP tool correctly."""
+        from mcp_server.agents.writer.agent import WriterAgent
+        from mcp_server.agents.writer.schemas import (
+            PresentationContent,
+            SlideContent,
+        )
+
+        agent = WriterAgent()
+        mock_session = AsyncMock()
+
+        content = PresentationContent(
+            filename_suggestion="test",
+            slides=[
+                SlideContent(
+                    title="Test Slide",
+                    points=["Point 1"],
+                    speaker_notes=None,
+                    sources=None,
+                ),
+            ],
+        )
+
+        await agent.write_presentation(content=content, session=mock_session, filename="test_file")
+
+        mock_session.call_tool.assert_called_once_with(
+            "create_presentation",
+            arguments={
+                "filename": "test_file",
+                "slides_content": json.dumps(
+                    [
+                        {
+                            "title": "Test Slide",
+                            "points": ["Point 1"],
+                            "speaker_notes": None,
+                            "sources": None,
+                        }
+                    ]
+                ),
+            },
+        )
+
+    @pytest.mark.asyncio
+    async def test_draft_slide_does_not_retry_empty_response(self):
+        """Test draft_slide writes one slide in one call and leaves the retries to its caller."""
+        from mcp_server.agents.writer.agent import WriterAgent
+        from mcp_server.agents.writer.schemas import SlideContent
+
+        agent = WriterAgent()
+        slide = SlideContent(title="Intro", points=["Point"], speaker_notes=None, sources=None)
+        empty = MagicMock(choices=[MagicMock(message=MagicMock(parsed=None))])
+        parsed = MagicMock(choices=[MagicMock(message=MagicMock(parsed=slide))])
+        kwargs = {
+            "topic": "Test",
+            "slide_plans": [{"title": "Intro"}, {"title": "Market"}],
+            "index": 0,
+            "research": {"facts": []},
+        }
+
+        with patch.object(
+            agent.client.beta.chat.completions, "parse", new_callable=AsyncMock
+        ) as mock_parse:
+            mock_parse.side_effect = [empty, parsed]
+
+            with pytest.raises(ValueError, match="No response for slide='Intro'"):
+                await agent.draft_slide(**kwargs)
+            assert mock_parse.call_count == 1
+
+            result = await agent.draft_slide(**kwargs)
+            assert result == slide
+            prompt = mock_parse.call_args.kwargs["messages"][-1]["content"]
+            assert "slide 1 of 2" in prompt
+
+    @pytest.mark.asyncio
+    async def test_slide_prompts_share_a_cacheable_prefix(self):
+        """Test the per-slide calls of a deck share every message but the last, carrying the
+        whole plan and research, long enough for provider-side prompt caching."""
+        from mcp_server.agents.writer.agent import WriterAgent
+        from mcp_server.agents.writer.schemas import ChartData, SlideContent, VisualRequest
+        from mcp_server.helper.search_payload import estimate_tokens
+
+        agent = WriterAgent()
+        slide = SlideContent(
+            title="Slide",
+            points=["Point"],
+            speaker_notes=None,
+            sources=None,
+            visual_request=VisualRequest(
+                type="chart",
+                prompt="Chart",
+                data_json=ChartData(labels=["a"], values=[1.0], unit="%"),
+            ),
+        )
+        parsed = MagicMock(choices=[MagicMock(message=MagicMock(parsed=slide))])
+        plan = {
+            "topic": "AI in healthcare",
+            "slides": [
+                {
+                    "slide_number": i + 1,
+                    "title": f"Slide {i}",
+                    "search_queries": [f"AI healthcare trend {i}", f"AI hospital adoption {i}"],
+                    "content_goal": f"Explain trend {i} of AI adoption in hospitals",
+                }
+                for i in range(5)
+            ],
+        }
+        research = [
+            {
+                "slide_topic": f"Slide {i}",
+                "facts": [
+                    {
+                        "content": f"Fact {i}.{j}: hospitals using AI diagnostics grew by {j}0% "
+                        "in 2024 according to a survey of 500 health systems.",
+                        "source_url": f"https://example.org/report-{i}-{j}",
+                    }
+                    for j in range(3)
+                ],
+            }
+            for i in range(5)
+        ]
+
+        with patch.object(
+            agent.client.beta.chat.completions, "parse", new_callable=AsyncMock
+        ) as mock_parse:
+            mock_parse.return_value = parsed
+            await agent.prepare_presentation_by_slide("AI in healthcare", plan, research)
+
+        calls = [call.kwargs for call in mock_parse.call_args_list]
+        prefix = calls[0]["messages"][:-1]
+        assert len(calls) == 5
+        assert all(call["messages"][:-1] == prefix for call in calls)
+        assert len({call["messages"][-1]["content"] for call in calls}) == 5
+        assert len({call["prompt_cache_key"] for call in calls}) == 1
+        assert all(f"report-{i}-2" in prefix[-1]["content"] for i in range(5))
+        assert estimate_tokens("".join(m["content"] for m in prefix)) >= 1024
+        assert "report-" not in calls[0]["messages"][-1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_pipelined_slide_prompts_share_the_plan(self):
+        """Test slides written before the others are researched share the plan, and get their
+        own research in the last message."""
+        from mcp_server.agents.writer.agent import WriterAgent
+        from mcp_server.agents.writer.schemas import SlideContent
+
+        agent = WriterAgent()
+        slide = SlideContent(title="Intro", points=["Point"], speaker_notes=None, sources=None)
+        parsed = MagicMock(choices=[MagicMock(message=MagicMock(parsed=slide))])
+        slide_plans = [{"title": "Intro"}, {"title": "Market"}]
 
         with patch.object(
             agent.client.beta.chat.completions, "parse", new_callable=AsyncMock
         ) as mock_parse:
-            mock_parse.return_value = mock_response
+            mock_parse.return_value = parsed
+            for index, plan in enumerate(slide_plans):
+                await agent.draft_slide(
+                    topic="Test",
+                    slide_plans=slide_plans,
+                    index=index,
+                    research={"facts": [plan["title"] + " fact"]},
+                )
 
-            result = await agent.prepare_presentation(
-                topic="Test",
-                plan_json={"topic": "Test", "slides": []},
-                research_data=[],
+        first, second = (call.kwargs for call in mock_parse.call_args_list)
+        assert first["messages"][:-1] == second["messages"][:-1]
+        assert '"Market"' in first["messages"][1]["content"]
+        assert "Intro fact" in first["messages"][-1]["content"]
+        assert "Market fact" in second["messages"][-1]["content"]
+        assert first["prompt_cache_key"] == second["prompt_cache_key"]
+        assert first["prompt_cache_key"].startswith("writer-")
+
+    @pytest.mark.asyncio
+    async def test_prepare_presentation_by_slide_retries_failed_slides(self):
+        """Test the per-slide mode merges slides in plan order and retries only failed slides."""
+        from mcp_server.agents.writer.agent import WriterAgent
+        from mcp_server.agents.writer.schemas import SlideContent
+
+        agent = WriterAgent()
+        calls = []
+
+        async def draft_slide(topic, slide_plans, index, research, deck_research=None):  # noqa: ARG001
+            calls.append(index)
+            if index == 1 and calls.count(1) == 1:
+                raise RuntimeError("Rate limited")
+            return SlideContent(
+                title=slide_plans[index]["title"],
+                points=[f["content"] for f in research["facts"]],
+                speaker_notes=None,
+                sources=None,
             )
 
-            assert result.filename_suggestion == "test_presentation"
-            assert len(result.slides) == 1
+        plan = {"topic": "Test", "slides": [{"title": f"Slide {i}"} for i in range(3)]}
+        research = [{"facts": [{"content": f"fact {i}"}]} for i in range(3)]
+
+        with (
+            patch.object(agent, "draft_slide", side_effect=draft_slide),
+            patch.object(agent, "repair_chart", new_callable=AsyncMock, return_value=None),
+        ):
+            result = await agent.prepare_presentation_by_slide("Test", plan, research)
+
+        assert [s.title for s in result.slides] == ["Slide 0", "Slide 1", "Slide 2"]
+        assert result.slides[1].points == ["fact 1"]
+        assert sorted(calls) == [0, 1, 1, 2]
 
     @pytest.mark.asyncio
-    async def test_write_presentation_calls_mcp_tool(self):
-        """Test write_presentation calls the MCP tool correctly."""
+    async def test_prepare_presentation_by_slide_bounds_the_calls_per_slide(self):
+        """Test a slide that keeps failing costs WRITER_SLIDE_ATTEMPTS calls, not more."""
+        from core.settings import settings
+        from mcp_server.agents.writer.agent import WriterAgent
+
+        agent = WriterAgent()
+        empty = MagicMock(choices=[MagicMock(message=MagicMock(parsed=None))])
+        plan = {"topic": "Test", "slides": [{"title": "Intro"}]}
+
+        with (
+            patch.object(settings, "WRITER_SLIDE_ATTEMPTS", 3),
+            patch.object(
+                agent.client.beta.chat.completions, "parse", new_callable=AsyncMock
+            ) as mock_parse,
+        ):
+            mock_parse.return_value = empty
+            with pytest.raises(ValueError, match=r"Slides \[1\] failed after retries"):
+                await agent.prepare_presentation_by_slide("Test", plan, [{"facts": []}])
+
+        assert mock_parse.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_validate_response_requires_chart(self):
+        """Test validation requires at least one chart."""
         from mcp_server.agents.writer.agent import WriterAgent
         from mcp_server.agents.writer.schemas import (
             PresentationContent,
@@ -277,66 +1775,74 @@ class TestWriterAgent:
         )
 
         agent = WriterAgent()
-        mock_session = AsyncMock()
 
         content = PresentationContent(
             filename_suggestion="test",
             slides=[
                 SlideContent(
-                    title="Test Slide",
-                    points=["Point 1"],
+                    title="Test",
+                    points=["Point"],
                     speaker_notes=None,
                     sources=None,
+                    visual_request=None,
                 ),
             ],
         )
 
-        await agent.write_presentation(content=content, session=mock_session, filename="test_file")
-
-        mock_session.call_tool.assert_called_once_with(
-            "create_presentation",
-            arguments={
-                "filename": "test_file",
-                "slides_content": json.dumps(
-                    [
-                        {
-                            "title": "Test Slide",
-                            "points": ["Point 1"],
-                            "speaker_notes": None,
-                            "sources": None,
-                        }
-                    ]
-                ),
-            },
-        )
+        with (
+            patch.object(agent, "repair_chart", new_callable=AsyncMock, return_value=None),
+            pytest.raises(ValueError, match="No chart generated"),
+        ):
+            await agent._validate_response(content, "Test", {}, [], attempt=3)
 
     @pytest.mark.asyncio
-    async def test_validate_response_requires_chart(self):
-        """Test validation requires at least one chart."""
+    async def test_validate_response_repairs_chart_on_most_numeric_slide(self):
+        """Test a missing chart is repaired on the most numeric slide without regenerating."""
         from mcp_server.agents.writer.agent import WriterAgent
         from mcp_server.agents.writer.schemas import (
+            ChartData,
             PresentationContent,
             SlideContent,
+            VisualRequest,
         )
 
         agent = WriterAgent()
-        agent.retry_count = 3
-
         content = PresentationContent(
             filename_suggestion="test",
             slides=[
-                SlideContent(
-                    title="Test",
-                    points=["Point"],
-                    speaker_notes=None,
-                    sources=None,
-                    visual_request=None,
-                ),
+                SlideContent(title="Intro", points=["Overview"], speaker_notes=None, sources=None),
+                SlideContent(title="Market", points=["Sales"], speaker_notes=None, sources=None),
             ],
         )
+        research = [{"facts": []}, {"facts": [{"content": "Sales grew 20% to 4.5B in 2024"}]}]
+        chart = VisualRequest(
+            type="chart",
+            prompt="Sales",
+            data_json=ChartData(labels=["2023", "2024"], values=[3.7, 4.5], unit="Billions USD"),
+        )
+        mock_response = MagicMock(
+            choices=[MagicMock(message=MagicMock(parsed=chart))],
+            usage=MagicMock(total_tokens=400),
+        )
+
+        with (
+            patch.object(
+                agent.client.beta.chat.completions, "parse", new_callable=AsyncMock
+            ) as mock_parse,
+            patch.object(agent, "prepare_presentation", new_callable=AsyncMock) as mock_prepare,
+        ):
+            mock_parse.return_value = mock_response
+            result = await agent._validate_response(
+                content, "Test", {}, research, generation={"tokens": 5000, "seconds": 20.0}
+            )
 
-        with pytest.raises(ValueError, match="No chart generated"):
-            await agent._validate_response(content, "Test", {}, [])
+        mock_prepare.assert_not_called()
+        assert mock_parse.call_args.kwargs["response_format"] is VisualRequest
+        assert result.slides[1].visual_request == chart
+        assert result.slides[0].visual_request is None
+        assert content.slides[1].visual_request is None
+        assert agent.repair_stats["repairs"] == 1
+        assert agent.repair_stats["tokens_saved"] == 4600
 
 
 class TestIllustratorAgent:
@@ -393,9 +1899,59 @@ class TestIllustratorAgent:
         assert len(result.assets) == 0
 
 
+class TestSearchPayload:
+    """Tests for the compact search payload helpers."""
+
+    def test_compact_results_drops_duplicate_chunks(self):
+        """Test only url/content are kept and exact or near duplicate chunks are dropped."""
+        from mcp_server.helper.search_payload import compact_results
+
+        shared = "The Brazilian construction market grew 4 percent in 2025 according to IBGE"
+        results = [
+            {
+                "url": "https://a.com",
+                "content": f"{shared} [...] Cement sales hit a record",
+                "score": 0.9,
+                "validation": {"tier": "S"},
+            },
+            {"url": "https://b.com", "content": f"{shared.upper()} [...] {shared}, data shows"},
+            {"url": "https://c.com", "content": f"{shared}."},
+        ]
+
+        assert compact_results(results, token_budget=1000) == [
+            {"url": "https://a.com", "content": f"{shared} [...] Cement sales hit a record"}
+        ]
+
+    def test_compact_results_respects_token_budget(self):
+        """Test the serialized output stays within the token budget, keeping the best results."""
+        from mcp_server.helper.search_payload import (
+            compact_results,
+            dumps_compact,
+            estimate_tokens,
+        )
+
+        results = [
+            {"url": f"https://site{i}.com", "content": f"Fact number {i} " + f"detail{i} " * 100}
+            for i in range(10)
+        ]
+        compact = compact_results(results, token_budget=400)
+
+        assert estimate_tokens(dumps_compact(compact)) <= 400
+        assert compact[0]["url"] == "https://site0.com"
+        assert len(compact) < len(results)
+
+
 class TestMcpServerTools:
     """Tests for MCP server tools."""
 
+    @pytest.fixture(autouse=True)
+    def no_search_cache(self):
+        """Disable the search cache so every test hits the mocked Tavily client."""
+        from core.settings import settings
+
+        with patch.object(settings, "SEARCH_CACHE_ENABLED", False):
+            yield
+
     @pytest.mark.parametrize("chart_type", ["bar", "line", "pie"])
     def test_generate_chart_valid_types(self, chart_type):
         """Test chart generation for all valid types."""
@@ -426,32 +1982,493 @@ class TestMcpServerTools:
             assert "Successfully saved" in result
             assert os.path.exists(Path(tmpdir) / "test_ppt.pptx")
 
+    @pytest.mark.asyncio
+    async def test_chart_tool_renders_in_tool_workers(self):
+        """Test the chart tool hands its rendering to the tool workers, off the event loop."""
+        from mcp_server.helper.tool_workers import tool_workers
+        from mcp_server.mcp_server import generate_chart_tool
+
+        calls = []
+        run = tool_workers.run
+
+        async def record_call(func, *args):
+            calls.append(func.__name__)
+            return await run(func, *args)
+
+        with (
+            tempfile.TemporaryDirectory() as tmpdir,
+            patch("mcp_server.mcp_server.FILE_PATH", Path(tmpdir)),
+            patch.object(tool_workers, "run", side_effect=record_call),
+        ):
+            data_json = json.dumps({"labels": ["A", "B"], "values": [1, 2]})
+            result = await generate_chart_tool(data_json, "bar", "Workers")
+
+        assert result.endswith(".png")
+        assert calls == ["generate_chart"]
+
+    @pytest.mark.asyncio
+    async def test_tool_workers_processes(self):
+        """Test the tool workers run in a thread by default and in processes when configured."""
+        import threading
+
+        from mcp_server.helper.tool_workers import ToolWorkers
+
+        thread_workers = ToolWorkers(processes=0)
+        process_workers = ToolWorkers(processes=1)
+        try:
+            thread = await thread_workers.run(threading.current_thread)
+            pid = await process_workers.run(os.getpid)
+        finally:
+            thread_workers.shutdown()
+            process_workers.shutdown()
+
+        assert thread is not threading.main_thread()
+        assert pid != os.getpid()
+
+    @pytest.mark.asyncio
     @patch("mcp_server.mcp_server.tavily_client")
     @patch("mcp_server.mcp_server.source_validator")
-    def test_search_web(self, mock_validator, mock_tavily):
+    async def test_search_web(self, mock_validator, mock_tavily):
         """Test web search with various scenarios."""
         from mcp_server.mcp_server import search_web
 
         mock_tavily.search.return_value = {
             "results": [{"content": "Content", "url": "https://example.com"}]
         }
-        mock_validator.rank_sources.return_value = [
-            {
-                "content": "Content",
-                "url": "https://example.com",
-                "validation": {"tier": "S", "score": 90},
-            }
-        ]
-        result = json.loads(search_web("query"))
-        assert len(result) == 1 and result[0]["validation"]["tier"] == "S"
+        mock_validator.arank_sources = AsyncMock(
+            return_value=[
+                {
+                    "content": "Content",
+                    "url": "https://example.com",
+                    "validation": {"tier": "S", "score": 90},
+                }
+            ]
+        )
+        result = json.loads(await search_web("query"))
+        assert result == [{"url": "https://example.com", "content": "Content"}]
 
-        mock_validator.rank_sources.return_value = [
+        mock_validator.arank_sources.return_value = [
             {"content": "Low", "url": "https://bad.com", "validation": {"tier": "C", "score": 30}}
         ]
-        assert json.loads(search_web("query")) == []
+        assert json.loads(await search_web("query")) == []
 
         mock_tavily.search.side_effect = Exception("API Error")
-        assert "Error" in search_web("query")
+        assert "Error" in await search_web("query")
+
+    @pytest.mark.asyncio
+    @patch("mcp_server.mcp_server.tavily_client")
+    @patch("mcp_server.mcp_server.source_validator")
+    async def test_search_web_coalesces_identical_queries(self, mock_validator, mock_tavily):
+        """Test identical concurrent searches share one Tavily call."""
+        import asyncio
+
+        from mcp_server.mcp_server import search_web
+
+        mock_tavily.search.side_effect = lambda **_kwargs: time.sleep(0.05) or {"results": []}
+        mock_validator.arank_sources = AsyncMock(return_value=[])
+
+        await asyncio.gather(
+            search_web("AI  trends", search_depth="advanced"),
+            search_web("ai trends", search_depth="advanced"),
+        )
+
+        assert mock_tavily.search.call_count == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "basic_tiers,expected_depths",
+        [(["S", "A", "S"], ["basic"]), (["S", "B"], ["basic", "advanced"])],
+    )
+    @patch("mcp_server.mcp_server.tavily_client")
+    @patch("mcp_server.mcp_server.source_validator")
+    async def test_search_web_adaptive_depth(
+        self, mock_validator, mock_tavily, basic_tiers, expected_depths
+    ):
+        """Test adaptive searches escalate to advanced only when too few S/A results are found."""
+        from mcp_server.mcp_server import adaptive_depth_stats, search_web
+
+        def search(query, search_depth, **_kwargs):  # noqa: ARG001
+            tiers = basic_tiers if search_depth == "basic" else ["S", "S", "S"]
+            return {
+                "results": [
+                    {
+                        "content": f"{tier} tier fact {search_depth} number {i}",
+                        "url": f"https://{search_depth}-{i}.com",
+                        "score": 0.9,
+                    }
+                    for i, tier in enumerate(tiers)
+                ]
+            }
+
+        async def rank(context, **_kwargs):
+            return [
+                {**c, "validation": {"tier": c["content"].split()[0], "score": 90}} for c in context
+            ]
+
+        mock_tavily.search.side_effect = search
+        mock_validator.arank_sources = AsyncMock(side_effect=rank)
+
+        with patch.dict(adaptive_depth_stats, {"searches": 0, "escalated": 0}):
+            result = json.loads(await search_web("query"))
+            depths = [c.kwargs["search_depth"] for c in mock_tavily.search.call_args_list]
+
+            assert depths == expected_depths
+            assert adaptive_depth_stats["escalated"] == len(expected_depths) - 1
+        assert len(result) == (3 if expected_depths == ["basic"] else 4)
+
+    @pytest.mark.asyncio
+    @patch("mcp_server.mcp_server.tavily_client")
+    @patch("mcp_server.mcp_server.source_validator")
+    async def test_search_web_batch(self, mock_validator, mock_tavily):
+        """Test the batch search returns per-query results in order, errors included."""
+        from mcp_server.mcp_server import search_web_batch
+
+        def search(query, **_kwargs):
+            if query == "broken":
+                raise Exception("API Error")
+            return {"results": [{"content": query, "url": f"https://{query}.com"}]}
+
+        async def rank(context, **_kwargs):
+            return [{**c, "validation": {"tier": "S", "score": 90}} for c in context]
+
+        mock_tavily.search.side_effect = search
+        mock_validator.arank_sources = AsyncMock(side_effect=rank)
+
+        result = json.loads(await search_web_batch(["alpha", "broken", "beta"]))
+
+        assert [r["query"] for r in result] == ["alpha", "broken", "beta"]
+        assert result[0]["results"][0]["url"] == "https://alpha.com"
+        assert result[1]["error"] == "API Error"
+        assert result[2]["results"][0]["content"] == "beta"
+
+    @pytest.mark.asyncio
+    @patch("mcp_server.mcp_server.tavily_client")
+    @patch("mcp_server.mcp_server.source_validator")
+    async def test_search_web_uses_search_cache(self, mock_validator, mock_tavily):
+        """Test repeated searches are served from the cache unless it is bypassed."""
+        from core.settings import settings
+        from mcp_server.helper.memory_cache import MemoryCache
+        from mcp_server.helper.search_cache import SearchCache
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+        from mcp_server.mcp_server import search_web
+
+        mock_tavily.search.return_value = {"results": []}
+        mock_validator.arank_sources = AsyncMock(return_value=[])
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SQLiteCache(Path(tmpdir) / "search.sqlite3", max_entries=10)
+            cache = SearchCache(ttl=60, memory=MemoryCache(max_entries=10), store=store)
+            with (
+                patch.object(settings, "SEARCH_CACHE_ENABLED", True),
+                patch("mcp_server.mcp_server.search_cache", cache),
+            ):
+                await search_web("AI Trends", search_depth="advanced")
+                await search_web(" ai   trends ", search_depth="advanced")
+                assert mock_tavily.search.call_count == 1
+
+                cache.memory.clear()
+                await search_web("ai trends", search_depth="advanced")
+                assert mock_tavily.search.call_count == 1
+                assert cache.stats() == {"memory_hits": 1, "disk_hits": 1, "misses": 1}
+
+                await search_web("ai trends", search_depth="basic")
+                await search_web("ai trends", search_depth="advanced", use_cache=False)
+                assert mock_tavily.search.call_count == 3
+
+    @pytest.mark.asyncio
+    @patch("mcp_server.mcp_server.tavily_client")
+    @patch("mcp_server.mcp_server.source_validator")
+    async def test_search_web_survives_a_failing_search_cache(self, mock_validator, mock_tavily):
+        """Test a failing cache store is a miss and a skipped write, not a failed search."""
+        import sqlite3
+
+        from core.settings import settings
+        from mcp_server.helper.memory_cache import MemoryCache
+        from mcp_server.helper.search_cache import SearchCache
+        from mcp_server.mcp_server import search_web
+
+        mock_tavily.search.return_value = {
+            "results": [{"url": "https://a.com", "content": "Fact", "score": 0.9}]
+        }
+        mock_validator.arank_sources = AsyncMock(
+            return_value=[
+                {"url": "https://a.com", "content": "Fact", "validation": {"tier": "S"}},
+            ]
+        )
+        store = MagicMock(
+            aget_entry=AsyncMock(side_effect=sqlite3.OperationalError("database is locked")),
+            aset=AsyncMock(side_effect=sqlite3.OperationalError("database is locked")),
+        )
+        cache = SearchCache(ttl=60, memory=MemoryCache(max_entries=10), store=store)
+        with (
+            patch.object(settings, "SEARCH_CACHE_ENABLED", True),
+            patch("mcp_server.mcp_server.search_cache", cache),
+        ):
+            results = json.loads(await search_web("AI", search_depth="advanced"))
+
+        assert [r["url"] for r in results] == ["https://a.com"]
+        assert mock_tavily.search.call_count == 1
+        assert store.aset.await_count == 1
+        assert cache.stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_search_cache_promotes_disk_hits_for_their_remaining_ttl(self):
+        """Test a disk hit is kept in memory only until its entry expires on disk."""
+        from mcp_server.helper.memory_cache import MemoryCache
+        from mcp_server.helper.search_cache import SearchCache
+        from mcp_server.helper.sqlite_cache import SQLiteCache
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            store = SQLiteCache(Path(tmpdir) / "search.sqlite3", max_entries=10)
+            cache = SearchCache(ttl=60, memory=MemoryCache(max_entries=10), store=store)
+            now = time.time()
+            with patch("mcp_server.helper.sqlite_cache.time.time", return_value=now - 50):
+                store.set("key", {"results": []}, ttl=60)
+
+            assert await cache.get("key") == {"results": []}
+            assert cache.memory.get("key") == {"results": []}
+            with patch("mcp_server.helper.memory_cache.time.time", return_value=now + 11):
+                assert cache.memory.get("key") is None
+
+
+class TestWorkflow:
+    """Tests for the workflow orchestration helpers."""
+
+    @pytest.mark.asyncio
+    async def test_research_slides_concurrently_in_plan_order(self):
+        """Test slides are researched concurrently, in plan order, and failures stay isolated."""
+        import asyncio
+
+        from mcp_server.agents.planner.schemas import PresentationPlan, SlidePlan
+        from mcp_server.agents.researcher.schemas import Fact, ResearchSummary
+        from mcp_server.workflow import research_slides
+
+        plan = PresentationPlan(
+            topic="Test",
+            slides=[
+                SlidePlan(slide_number=i, title=f"Slide {i}", search_queries=["q"], content_goal="")
+                for i in range(3)
+            ],
+        )
+        running = []
+        max_running = []
+
+        async def research_web(payload, session):  # noqa: ARG001
+            running.append(payload.slide_title)
+            max_running.append(len(running))
+            await asyncio.sleep(0.05 if payload.slide_title == "Slide 0" else 0.01)
+            running.remove(payload.slide_title)
+            if payload.slide_title == "Slide 1":
+                raise RuntimeError("Search failed")
+            return ResearchSummary(
+                slide_topic=payload.slide_title,
+                facts=[Fact(content="fact", source_url="https://a.com")],
+            )
+
+        researcher = MagicMock(research_web=AsyncMock(side_effect=research_web))
+        research_data = await research_slides(researcher, plan, AsyncMock(), run_id="run")
+
+        assert [r["slide_topic"] for r in research_data] == ["Slide 0", "Slide 1", "Slide 2"]
+        assert research_data[1]["facts"] == []
+        assert len(research_data[2]["facts"]) == 1
+        assert max(max_running) == 3
+
+    @pytest.mark.asyncio
+    async def test_workflow_releases_its_run(self):
+        """Test the URL checks of a run are released on the MCP server, even when the run fails."""
+        from mcp_server.mcp_server import source_validator
+        from mcp_server.workflow import run_ppt_workflow
+
+        async def check():
+            return "live", {}
+
+        await source_validator.registry.check("deck-123", "https://a.com", check)
+        assert source_validator.registry.stats("deck-123")["fetched"] == 1
+
+        planner = MagicMock(
+            create_presentation_plan=AsyncMock(side_effect=RuntimeError("Planner failed"))
+        )
+        with (
+            tempfile.TemporaryDirectory() as tmpdir,
+            patch("mcp_server.workflow.FILE_PATH", Path(tmpdir)),
+            pytest.raises(RuntimeError, match="Planner failed"),
+        ):
+            await run_ppt_workflow(
+                topic="AI",
+                num_slides=3,
+                filename="deck-123",
+                pipeline=False,
+                agents=MagicMock(planner=planner),
+                transport="local",
+            )
+
+        assert source_validator.registry.stats("deck-123")["fetched"] == 0
+
+    @pytest.mark.asyncio
+    async def test_slide_pipeline(self):
+        """Test the pipeline keeps plan order, charts slides and falls back on writer errors."""
+        import asyncio
+
+        from mcp_server.agents.illustrator.schemas import IllustrationResult, VisualAsset
+        from mcp_server.agents.planner.schemas import SlidePlan
+        from mcp_server.agents.researcher.schemas import Fact, ResearchSummary
+        from mcp_server.agents.writer.schemas import (
+            ChartData,
+            SlideContent,
+            VisualRequest,
+        )
+        from mcp_server.pipeline import SlidePipeline
+
+        slides = [
+            SlidePlan(slide_number=i, title=f"Slide {i}", search_queries=["q"], content_goal="")
+            for i in range(3)
+        ]
+
+        async def research_web(payload, session):  # noqa: ARG001
+            await asyncio.sleep(0.03 if payload.slide_title == "Slide 0" else 0.01)
+            return ResearchSummary(
+                slide_topic=payload.slide_title,
+                facts=[Fact(content=f"{payload.slide_title} fact", source_url="https://a.com")],
+            )
+
+        async def draft_slide(topic, slide_plans, index, research, deck_research=None):  # noqa: ARG001
+            if index == 1:
+                raise RuntimeError("Writer failed")
+            return SlideContent(
+                title=slide_plans[index]["title"],
+                points=["Point"],
+                speaker_notes=None,
+                sources=None,
+                visual_request=VisualRequest(
+                    type="chart",
+                    prompt="Chart",
+                    data_json=ChartData(labels=["a"], values=[1.0], unit="%"),
+                )
+                if index == 2
+                else None,
+            )
+
+        async def create_visuals(requests, session):  # noqa: ARG001
+            return IllustrationResult(
+                assets=[
+                    VisualAsset(
+                        slide_number=r["slide_number"],
+                        asset_type="chart",
+                        description=r["prompt"],
+                        file_path="chart.png",
+                    )
+                    for r in requests
+                ]
+            )
+
+        pipeline = SlidePipeline(
+            topic="Test",
+            session=AsyncMock(),
+            researcher=MagicMock(research_web=AsyncMock(side_effect=research_web)),
+            writer=MagicMock(draft_slide=AsyncMock(side_effect=draft_slide)),
+            illustrator=MagicMock(create_visuals=AsyncMock(side_effect=create_visuals)),
+            run_id="run",
+        )
+        content, assets = await pipeline.run(slides)
+
+        assert [s.title for s in content.slides] == ["Slide 0", "Slide 1", "Slide 2"]
+        assert content.slides[1].points == ["Slide 1 fact"]
+        assert content.slides[1].sources == ["https://a.com"]
+        assert [a.slide_number for a in assets] == [2]
+
+    @pytest.mark.asyncio
+    async def test_slide_pipeline_repairs_missing_chart(self):
+        """Test a deck written without a chart gets one through the writer's chart repair, and
+        the repaired slide is illustrated."""
+        from mcp_server.agents.illustrator.schemas import IllustrationResult, VisualAsset
+        from mcp_server.agents.planner.schemas import SlidePlan
+        from mcp_server.agents.researcher.schemas import ResearchSummary
+        from mcp_server.agents.writer.schemas import ChartData, SlideContent, VisualRequest
+        from mcp_server.pipeline import SlidePipeline
+
+        slides = [
+            SlidePlan(slide_number=i, title=f"Slide {i}", search_queries=["q"], content_goal="")
+            for i in range(2)
+        ]
+
+        async def draft_slide(topic, slide_plans, index, research, deck_research=None):  # noqa: ARG001
+            return SlideContent(
+                title=slide_plans[index]["title"],
+                points=["Point"],
+                speaker_notes=None,
+                sources=None,
+            )
+
+        async def repair_chart(content, topic, research_data):  # noqa: ARG001
+            repaired = content.model_copy(deep=True)
+            repaired.slides[1].visual_request = VisualRequest(
+                type="chart",
+                prompt="Chart",
+                data_json=ChartData(labels=["a"], values=[1.0], unit="%"),
+            )
+            return repaired
+
+        async def failed_repair(content, topic, research_data):  # noqa: ARG001
+            return None
+
+        visual = VisualAsset(
+            slide_number=1, asset_type="chart", description="Chart", file_path="chart.png"
+        )
+        for repair, expected_assets in ((repair_chart, [1]), (failed_repair, [])):
+            illustrator = MagicMock(
+                create_visuals=AsyncMock(return_value=IllustrationResult(assets=[visual]))
+            )
+            writer = MagicMock(
+                draft_slide=AsyncMock(side_effect=draft_slide),
+                repair_chart=AsyncMock(side_effect=repair),
+            )
+            pipeline = SlidePipeline(
+                topic="Test",
+                session=AsyncMock(),
+                researcher=MagicMock(
+                    research_web=AsyncMock(
+                        return_value=ResearchSummary(slide_topic="Slide", facts=[])
+                    )
+                ),
+                writer=writer,
+                illustrator=illustrator,
+                run_id="run",
+            )
+            content, assets = await pipeline.run(slides)
+
+            writer.repair_chart.assert_awaited_once()
+            assert [a.slide_number for a in assets] == expected_assets
+            assert bool(content.slides[1].visual_request) == bool(expected_assets)
+
+    @pytest.mark.asyncio
+    async def test_slide_pipeline_stops_on_failed_plan_stream(self):
+        """Test a plan stream that fails midway fails the pipeline instead of hanging it."""
+        import asyncio
+
+        from mcp_server.agents.planner.schemas import SlidePlan
+        from mcp_server.agents.researcher.schemas import ResearchSummary
+        from mcp_server.pipeline import SlidePipeline
+
+        async def planned():
+            yield SlidePlan(slide_number=0, title="Slide 0", search_queries=["q"], content_goal="")
+            raise ValueError("Number of slides does not match")
+
+        researcher = MagicMock(
+            research_web=AsyncMock(return_value=ResearchSummary(slide_topic="Slide 0", facts=[]))
+        )
+        writer = MagicMock(draft_slide=AsyncMock())
+        pipeline = SlidePipeline(
+            topic="Test",
+            session=AsyncMock(),
+            researcher=researcher,
+            writer=writer,
+            illustrator=MagicMock(),
+            run_id="run",
+        )
+
+        with pytest.raises(ValueError, match="does not match"):
+            await asyncio.wait_for(pipeline.run(planned()), timeout=1)
+        writer.draft_slide.assert_not_awaited()
 
 
 class TestPresentationRoutes:
@@ -468,19 +2485,73 @@ class TestPresentationRoutes:
         app.include_router(presentation_router)
         return TestClient(app)
 
+    @pytest.fixture
+    def queue(self):
+        """Create a job queue in a temporary directory, used by the routes."""
+        from mcp_server.job_queue import JobQueue
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            queue = JobQueue(Path(tmpdir) / "jobs.sqlite3", max_attempts=3, stale_after=60)
+            with patch("app.routes.presentation.router.job_queue", queue):
+                yield queue
+
+    @pytest.mark.usefixtures("queue")
     def test_generate_ppt_success(self, client):
         """Test successful presentation generation."""
-        with patch("app.routes.presentation.router.run_ppt_workflow"):
-            response = client.post(
-                "/presentation/generate_ppt",
-                json={"topic": "AI Trends", "slides": 5},
+        response = client.post(
+            "/presentation/generate_ppt",
+            json={"topic": "AI Trends", "slides": 5},
+        )
+
+        assert response.status_code == 202
+        data = response.json()
+        assert data["status"] == "Success"
+        assert "pprt_id" in data
+        assert "AI_Trends" in data["pprt_id"]
+
+    def test_generate_ppt_only_enqueues(self, client, queue):
+        """Test the endpoint queues the job without running the workflow, and the job endpoint
+        returns its state."""
+        with patch("mcp_server.workflow.run_ppt_workflow") as mock_workflow:
+            pprt_id = client.post(
+                "/presentation/generate_ppt", json={"topic": "AI", "slides": 3}
+            ).json()["pprt_id"]
+
+        mock_workflow.assert_not_called()
+        assert queue.get(pprt_id)["payload"] == {"topic": "AI", "num_slides": 3}
+        job = client.get(f"/presentation/job/{pprt_id}").json()
+        assert job["status"] == "queued" and job["attempts"] == 0
+        assert client.get("/presentation/job/missing-123").status_code == 404
+
+    def test_app_starts_and_stops_job_workers(self):
+        """Test the app starts the job workers with the API and stops them on shutdown."""
+        from main import api
+
+        workers = MagicMock(watch=AsyncMock())
+        with (
+            patch("main.JobWorkers", return_value=workers) as mock_workers,
+            TestClient(api),
+        ):
+            assert api.state.job_workers is workers
+            workers.start.assert_called_once()
+            workers.stop.assert_not_called()
+        assert mock_workers.call_args.args[0] > 0
+        workers.stop.assert_called_once()
+
+    def test_presentation_report(self, client):
+        """Test the report endpoint returns the saved report, or Pending before it exists."""
+        with tempfile.TemporaryDirectory() as tmpdir:
+            Path(tmpdir, "deck-123.report.json").write_text(
+                json.dumps({"pprt_id": "deck-123", "status": "completed"})
             )
 
-            assert response.status_code == 202
-            data = response.json()
-            assert data["status"] == "Success"
-            assert "pprt_id" in data
-            assert "AI_Trends" in data["pprt_id"]
+            with patch("app.routes.presentation.router.FILE_PATH", Path(tmpdir)):
+                found = client.get("/presentation/report/deck-123")
+                missing = client.get("/presentation/report/other-456")
+
+        assert found.status_code == 200
+        assert found.json() == {"pprt_id": "deck-123", "status": "completed"}
+        assert missing.json()["status"] == "Pending"
 
     def test_download_ppt_found(self, client):
         """Test downloading existing presentation."""